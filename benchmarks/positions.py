@@ -0,0 +1,57 @@
+from CheckersTournament.game_elements import get_board_class
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.game_elements.piece import PlayerId
+
+OPENING = str(Board())
+
+CAPTURE_MIDGAME = """---------------------------------
+|   |@@@|   |@@@|   |@@@|1,0|@@@|
+---------------------------------
+|@@@|1,0|@@@|   |@@@|1,0|@@@|   |
+---------------------------------
+|   |@@@|1,0|@@@|1,0|@@@|1,0|@@@|
+---------------------------------
+|@@@|1,0|@@@|1,1|@@@|1,0|@@@|   |
+---------------------------------
+|   |@@@|1,1|@@@|1,1|@@@|1,1|@@@|
+---------------------------------
+|@@@|1,1|@@@|1,1|@@@|   |@@@|   |
+---------------------------------
+|   |@@@|   |@@@|1,1|@@@|   |@@@|
+---------------------------------
+|@@@|   |@@@|   |@@@|   |@@@|1,1|
+---------------------------------"""
+
+KING_ENDGAME = """---------------------------------
+|2,0|@@@|   |@@@|   |@@@|   |@@@|
+---------------------------------
+|@@@|   |@@@|   |@@@|   |@@@|   |
+---------------------------------
+|   |@@@|   |@@@|2,0|@@@|   |@@@|
+---------------------------------
+|@@@|   |@@@|   |@@@|   |@@@|   |
+---------------------------------
+|   |@@@|   |@@@|   |@@@|   |@@@|
+---------------------------------
+|@@@|2,1|@@@|   |@@@|   |@@@|   |
+---------------------------------
+|   |@@@|   |@@@|   |@@@|1,1|@@@|
+---------------------------------
+|@@@|   |@@@|   |@@@|   |@@@|2,1|
+---------------------------------"""
+
+# name -> (board string, player to move, perft depth)
+POSITIONS = {
+    'opening': (OPENING, PlayerId.white.value, 5),
+    'capture_midgame': (CAPTURE_MIDGAME, PlayerId.white.value, 8),
+    'king_endgame': (KING_ENDGAME, PlayerId.white.value, 5),
+}
+
+
+def load_position(name: str, board_backend: str = 'list'):
+    board_str, player_id, depth = POSITIONS[name]
+    board = get_board_class(board_backend).load_from_str(board_str)
+    # White moves with orientation 1, black with -1
+    if player_id == PlayerId.black.value:
+        board.rotate()
+    return board, player_id, depth
@@ -0,0 +1,144 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from CheckersTournament.game import GameMechanics
+from CheckersTournament.game_elements import BOARD_BACKENDS
+from CheckersTournament.game_elements.piece import PlayerId
+from CheckersTournament.match import Player, Match
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.perft import perft
+from CheckersTournament.strategies import RandomStrategy, LongestLineStrategy, TowardEnemyCenter
+from CheckersTournament.tournament import Tournament
+
+from positions import POSITIONS, load_position
+
+SEED = 2024
+MOVE_GENERATORS = {'game_mechanics': GameMechanics, 'move_generator': MoveGenerator}
+# Metrics where a higher value is better, everything else is either exact (node counts) or lower is better
+THROUGHPUT_SUFFIX = '_per_sec'
+
+
+def measure(func):
+    # Timed and memory traced in separate runs, tracemalloc would otherwise dominate the timing
+    start = time.perf_counter()
+    value = func()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return value, elapsed, peak
+
+
+def bench_perft(quick: bool) -> dict:
+    results = {}
+    for name in POSITIONS:
+        for board_backend in BOARD_BACKENDS:
+            for generator_name, generator in MOVE_GENERATORS.items():
+                board, player_id, depth = load_position(name, board_backend)
+                depth -= int(quick)
+                nodes, elapsed, peak = measure(lambda: perft(board, player_id, depth, generator))
+                key = f'perft.{name}.{board_backend}.{generator_name}'
+                results[f'{key}.depth'] = depth
+                results[f'{key}.nodes'] = nodes
+                results[f'{key}.nodes_per_sec'] = nodes / elapsed
+                results[f'{key}.peak_memory_bytes'] = peak
+    return results
+
+
+def bench_match(quick: bool) -> dict:
+    num_of_games = 10 if quick else 50
+    results = {}
+    for board_backend, board_cls in BOARD_BACKENDS.items():
+        def play():
+            random.seed(SEED)
+            plies = 0
+            for _ in range(num_of_games):
+                match = Match([Player(PlayerId.white.value, RandomStrategy),
+                               Player(PlayerId.black.value, LongestLineStrategy)], board_cls())
+                match.match()
+                plies += match.moves_count
+            return plies
+
+        plies, elapsed, peak = measure(play)
+        results.update({f'match.{board_backend}.plies': plies,
+                        f'match.{board_backend}.plies_per_sec': plies / elapsed,
+                        f'match.{board_backend}.peak_memory_bytes': peak})
+    return results
+
+
+def bench_tournament(quick: bool) -> dict:
+    num_of_games = 2 if quick else 10
+    strategies = [RandomStrategy, LongestLineStrategy, TowardEnemyCenter]
+    games = num_of_games * len(strategies) * (len(strategies) - 1)
+    results = {}
+    for board_backend in BOARD_BACKENDS:
+        with contextlib.redirect_stdout(io.StringIO()):
+            _, elapsed, peak = measure(lambda: Tournament.run_tournament(board_backend=board_backend,
+                                                                         num_of_games=num_of_games, seed=SEED,
+                                                                         strategies=strategies))
+        results.update({f'tournament.{board_backend}.games': games,
+                        f'tournament.{board_backend}.games_per_sec': games / elapsed,
+                        f'tournament.{board_backend}.wall_time_sec': elapsed,
+                        f'tournament.{board_backend}.peak_memory_bytes': peak})
+    return results
+
+
+BENCHMARKS = {'perft': bench_perft, 'match': bench_match, 'tournament': bench_tournament}
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    for key, base_value in baseline.items():
+        if key not in results:
+            continue
+        value = results[key]
+        if key.endswith(THROUGHPUT_SUFFIX):
+            if value < base_value * (1 - threshold):
+                regressions.append(f'{key}: {value:.1f} < {base_value:.1f}')
+        elif key.endswith('.nodes') or key.endswith('.plies') or key.endswith('.depth'):
+            # Fixed seeds and positions, a different count means the rules changed
+            if value != base_value:
+                regressions.append(f'{key}: {value} != {base_value}')
+        elif value > base_value * (1 + threshold):
+            regressions.append(f'{key}: {value:.1f} > {base_value:.1f}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='CheckersTournament benchmarks')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', metavar='BASELINE', help='saved results file to flag regressions against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='allowed relative slowdown')
+    parser.add_argument('--only', choices=list(BENCHMARKS), action='append')
+    parser.add_argument('--quick', action='store_true')
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name in args.only or BENCHMARKS:
+        results.update(BENCHMARKS[name](args.quick))
+    for key, value in sorted(results.items()):
+        print(f'{key:60} {value:,.1f}' if isinstance(value, float) else f'{key:60} {value:,}')
+    with open(args.output, 'w') as f:
+        json.dump({'python': platform.python_version(), 'seed': SEED, 'quick': args.quick, 'results': results},
+                  f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -8,6 +8,7 @@ setup(
     packages=find_packages('src'),
     # packages=['CheckersTournament'],
     package_dir={'': 'src'},
+    install_requires=['numpy'],
     # package_dir={'CheckersTournament': 'src/CheckersTournament'},
     url='https://github.com/TheFrok',
     license='BSD-2-Clause',
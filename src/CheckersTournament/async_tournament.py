@@ -0,0 +1,283 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager, AsyncExitStack
+from typing import List
+
+from draw_rules import DrawRules
+from engine_protocol import encode_message, decode_message, encode_move_request, READY, NEW_GAME, MOVE, QUIT, \
+    PROTOCOL_VERSION
+from game_elements import get_board_class
+from game_elements.board import Board, Move
+from game_elements.piece import PlayerId
+from match import Player, Match
+from opening_book import random_opening
+from time_control import TimeControl, MoveTimeout, OVERRUN_POLICIES
+from tournament import Tournament, get_tournament_seed, get_game_seed, get_opening_seed, NUM_OF_GAMES
+
+DEFAULT_MOVE_TIME = 5.0
+
+
+class EngineError(Exception):
+    # An engine exited or broke the protocol
+    pass
+
+
+class EngineConnection:
+    # One external engine process (see engine_protocol), playing one side of one game at a time
+    def __init__(self, command: List[str], startup_timeout: float = 10.0):
+        self.command = command
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.name = None
+        self.request_id = 0
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    async def start(self):
+        self.process = await asyncio.create_subprocess_exec(*self.command, stdin=asyncio.subprocess.PIPE,
+                                                            stdout=asyncio.subprocess.PIPE)
+        try:
+            message = await self.read(self.startup_timeout)
+        except MoveTimeout:
+            await self.close()
+            raise EngineError(f'{self.command} did not start in {self.startup_timeout}s')
+        except EngineError:
+            await self.close(kill=True)
+            raise
+        if message.get('type') != READY or message.get('protocol') != PROTOCOL_VERSION:
+            await self.close()
+            raise EngineError(f'{self.command} does not speak protocol {PROTOCOL_VERSION}: {message}')
+        self.name = message['name']
+
+    async def read(self, timeout: float = None) -> dict:
+        try:
+            line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        except asyncio.TimeoutError:
+            raise MoveTimeout
+        if not line:
+            raise EngineError(f'{self.command} exited')
+        try:
+            message = decode_message(line)
+        except ValueError as e:
+            raise EngineError(f'{self.command} sent {line!r}, not a protocol message') from e
+        if not isinstance(message, dict):
+            raise EngineError(f'{self.command} sent {line!r}, not a protocol message')
+        return message
+
+    async def send(self, message: dict):
+        if not self.running:
+            raise EngineError(f'{self.command} is not running')
+        self.process.stdin.write(encode_message(message))
+        try:
+            # Waits while the engine is not reading its input
+            await self.process.stdin.drain()
+        except ConnectionError as e:
+            raise EngineError(f'{self.command} exited') from e
+
+    async def new_game(self, player_id: int):
+        await self.send({'type': NEW_GAME, 'player': player_id})
+
+    async def choose_move(self, board: Board, legal_moves: List[List[Move]], seed: int, time_left: float = None,
+                          timeout: float = None) -> int:
+        # Index of the engine's line in legal_moves. Raises MoveTimeout when no reply came in timeout seconds,
+        # the engine is killed then so its late reply can not be taken for the next one.
+        self.request_id += 1
+        await self.send(encode_move_request(self.request_id, board, legal_moves, seed, time_left))
+        try:
+            message = await self.read(timeout)
+        except (MoveTimeout, EngineError):
+            await self.close(kill=True)
+            raise
+        index = message.get('index')
+        if message.get('type') != MOVE or message.get('id') != self.request_id or \
+                not isinstance(index, int) or not 0 <= index < len(legal_moves):
+            await self.close(kill=True)
+            raise EngineError(f'{self.command} sent an invalid reply {message}')
+        return index
+
+    async def close(self, kill: bool = False):
+        if self.process is None:
+            return
+        if self.running:
+            try:
+                if kill:
+                    raise ConnectionError
+                await self.send({'type': QUIT})
+                await asyncio.wait_for(self.process.wait(), 1.0)
+            except (ConnectionError, EngineError, asyncio.TimeoutError):
+                self.process.kill()
+                await self.process.wait()
+        self.process = None
+
+
+class EnginePool:
+    # Up to size connections to one engine command, started on demand and reused between games.
+    # Games wait for a free connection, so an engine never plays more games at once than it has processes.
+    def __init__(self, command: List[str], size: int = 1):
+        self.command = command
+        self.size = size
+        self.semaphore = asyncio.Semaphore(size)
+        self.idle = []
+
+    @asynccontextmanager
+    async def connection(self):
+        async with self.semaphore:
+            connection = self.idle.pop() if self.idle else EngineConnection(self.command)
+            try:
+                # A connection whose engine was killed or crashed is restarted
+                if not connection.running:
+                    await connection.start()
+                yield connection
+            finally:
+                self.idle.append(connection)
+
+    async def close(self):
+        for connection in self.idle:
+            await connection.close()
+        self.idle = []
+
+
+class EngineSide:
+    # Stands for an engine in Match in place of a strategy, and is not one: Match only reads its name, sets its
+    # deadline and closes it. AsyncTournament.choose_line asks the engine for the lines.
+    def __init__(self, player_id: int, engine_name: str):
+        self.player_id = player_id
+        self.name = engine_name
+        self.deadline = None
+
+    def close(self):
+        pass
+
+
+class AsyncTournament:
+    # Round robin between external engines, engines maps a name to the command starting the engine.
+    # Up to max_concurrent_games games (by default as many as the engines have processes) are played at once on
+    # pool_size processes per engine. Every move has the time control's budget, plus its grace, to arrive.
+    def __init__(self, engines: dict, pool_size: int = 1, time_control: TimeControl = None,
+                 draw_rules: DrawRules = None, opening_plies: int = 0, max_concurrent_games: int = None,
+                 board_backend: str = 'list'):
+        self.names = list(engines)
+        self.engines = engines
+        self.pool_size = pool_size
+        self.time_control = time_control or TimeControl(move_time=DEFAULT_MOVE_TIME)
+        self.draw_rules = draw_rules
+        self.opening_plies = opening_plies
+        self.max_concurrent_games = max_concurrent_games or pool_size * len(engines)
+        self.board_backend = board_backend
+        self.pools = None
+
+    async def choose_line(self, match: Match, connection: EngineConnection, legal_moves: List[List[Move]],
+                          rng: random.Random):
+        budget = match.get_move_budget()
+        timeout = None if budget is None else budget + self.time_control.grace
+        start = time.perf_counter()
+        try:
+            best_move = legal_moves[await connection.choose_move(match.board, legal_moves, rng.getrandbits(32),
+                                                                 budget, timeout)]
+        except (MoveTimeout, EngineError):
+            # A crashed engine loses like one running out of time
+            best_move = None
+        player = match.players[match.current_player_index]
+        return match.end_timed_turn(player, legal_moves, best_move, budget, time.perf_counter() - start)
+
+    async def play_game(self, white: int, black: int, game_seed=None, opening_seed=None) -> int:
+        names = self.names[white], self.names[black]
+        opening = random_opening(self.opening_plies, opening_seed) if self.opening_plies else None
+        match = Match([Player(PlayerId.white.value, EngineSide, engine_name=names[0]),
+                       Player(PlayerId.black.value, EngineSide, engine_name=names[1])],
+                      get_board_class(self.board_backend)(), seed=game_seed, time_control=self.time_control,
+                      draw_rules=self.draw_rules, opening=opening)
+        # Seeds every engine move, so a game does not depend on the games played next to it
+        rng = random.Random(game_seed)
+        async with AsyncExitStack() as stack:
+            # Pools are entered in name order, two games waiting on each other's engine would never start
+            connections = {}
+            for name in sorted(set(names)):
+                try:
+                    connections[name] = await stack.enter_async_context(self.pools[name].connection())
+                except EngineError:
+                    # An engine that can not be restarted loses the game without playing it
+                    return PlayerId.black.value if name == names[0] else PlayerId.white.value
+            players = [connections[name] for name in names]
+            for player_id, connection in enumerate(players):
+                try:
+                    await connection.new_game(player_id)
+                except EngineError:
+                    # It loses on its first move
+                    pass
+            match.setup_match()
+            legal_moves = match.get_legal_moves_for_player()
+            is_over = False
+            while not is_over:
+                line = await self.choose_line(match, players[match.current_player_index], legal_moves, rng)
+                if line is None:
+                    break
+                match.play_line(line)
+                match.set_next_player()
+                is_over = match.is_over()
+                if not is_over:
+                    legal_moves = match.get_legal_moves_for_player()
+            return match.end_match()
+
+    async def play(self, num_of_games: int = NUM_OF_GAMES, seed=None) -> tuple:
+        # (pairings, winners) in the same order as Tournament.run_tournament
+        seed = get_tournament_seed(seed)
+        self.pools = {name: EnginePool(self.engines[name], self.pool_size) for name in self.names}
+        pairings = [(i, j) for i in range(len(self.names)) for j in range(len(self.names)) if i != j]
+        games = iter(enumerate((i, j, game_index) for i, j in pairings for game_index in range(num_of_games)))
+        winners = [None] * (len(pairings) * num_of_games)
+
+        async def play_games():
+            # Every runner takes the next game once its last one is over, so only max_concurrent_games are
+            # pending at any time
+            for index, (i, j, game_index) in games:
+                winners[index] = await self.play_game(i, j, get_game_seed(seed, i, j, game_index),
+                                                      get_opening_seed(seed, i, j, game_index))
+
+        try:
+            await asyncio.gather(*(play_games() for _ in range(self.max_concurrent_games)))
+        finally:
+            for pool in self.pools.values():
+                await pool.close()
+        return pairings, winners
+
+    def run(self, num_of_games: int = NUM_OF_GAMES, seed=None):
+        pairings, winners = asyncio.run(self.play(num_of_games, seed))
+        result, draws = Tournament.get_rates(winners, pairings, num_of_games, len(self.names))
+        for i, j in pairings:
+            print(f'Matching {self.names[i]} as white\n'
+                  f'     VS. {self.names[j]} as black')
+            print(f'White won {result[i][j] * 100}%, drew {draws[i][j] * 100}%')
+        print(self.names)
+        print('\n'.join([str(l) for l in result]))
+        return result
+
+
+if __name__ == '__main__':
+    import argparse
+    import shlex
+
+    parser = argparse.ArgumentParser(description='Round robin between external engines')
+    parser.add_argument('--engine', action='append', required=True, metavar='NAME=COMMAND',
+                        help='e.g. "search=python engine_protocol.py SearchStrategy", given once per engine')
+    parser.add_argument('--games', type=int, default=NUM_OF_GAMES)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--pool-size', type=int, default=1, help='processes started per engine')
+    parser.add_argument('--max-concurrent-games', type=int, default=None)
+    parser.add_argument('--move-time', type=float, default=DEFAULT_MOVE_TIME, help='seconds allowed per move')
+    parser.add_argument('--game-time', type=float, help='seconds on each clock for the whole game')
+    parser.add_argument('--increment', type=float, default=0.0, help='seconds added to the clock every move')
+    parser.add_argument('--on-overrun', choices=OVERRUN_POLICIES, default=OVERRUN_POLICIES[0])
+    parser.add_argument('--opening-plies', type=int, default=0, help='start every game with random plies')
+    args = parser.parse_args()
+    engines = {}
+    for engine in args.engine:
+        name, _, command = engine.partition('=')
+        engines[name] = shlex.split(command)
+    AsyncTournament(engines, args.pool_size,
+                    TimeControl(args.move_time, args.game_time, args.increment, args.on_overrun),
+                    opening_plies=args.opening_plies,
+                    max_concurrent_games=args.max_concurrent_games).run(args.games, args.seed)
@@ -0,0 +1,237 @@
+from typing import List
+
+import numpy as np
+
+from game_elements.board import Board, Square, Move
+from game_elements.piece import PieceType, PlayerId, DRAW
+
+# Board tensors are (N, 8, 8) int8: +1/+2 white man/king, -1/-2 black man/king, 0 empty
+EMPTY, MAN, KING = 0, 1, 2
+OFF_BOARD = 9
+PAD = 2
+DIAGONALS = ((-1, 1), (1, 1), (-1, -1), (1, -1))
+MAX_HOPS = 16
+PLAYER_SIGN = {PlayerId.white.value: 1, PlayerId.black.value: -1}
+
+
+def encode_board(board: Board) -> np.ndarray:
+    encoded = np.zeros((Board.MAX_ROW, Board.MAX_COL), dtype=np.int8)
+    for player_id, sign in PLAYER_SIGN.items():
+        for square in board.get_player_pieces_location(player_id):
+            piece_type, _ = board.get_location(square)
+            encoded[square.row, square.col] = sign * (KING if piece_type == PieceType.king else MAN)
+    return encoded
+
+
+def decode_board(encoded: np.ndarray, board_cls=Board) -> Board:
+    board = board_cls(empty=True)
+    for row, col in zip(*np.nonzero(encoded)):
+        value = int(encoded[row, col])
+        piece_type = PieceType.king if abs(value) == KING else PieceType.man
+        player_id = PlayerId.white.value if value > 0 else PlayerId.black.value
+        board.set_location(Square(int(row), int(col)), piece_type, player_id)
+    return board
+
+
+def _pad(boards: np.ndarray) -> np.ndarray:
+    padded = np.full((boards.shape[0], Board.MAX_ROW + 2 * PAD, Board.MAX_COL + 2 * PAD), OFF_BOARD, dtype=np.int8)
+    padded[:, PAD:-PAD, PAD:-PAD] = boards
+    return padded
+
+
+def _shifted(padded: np.ndarray, d_row: int, d_col: int) -> np.ndarray:
+    return padded[:, PAD + d_row:PAD + d_row + Board.MAX_ROW, PAD + d_col:PAD + d_col + Board.MAX_COL]
+
+
+class LineBatch:
+    # Every complete legal line of every game, flattened. Squares are flat row * 8 + col indices and
+    # hops holds the landing square of every hop (-1 padded), resulting_boards the position after the line.
+    FIELDS = ('game', 'from_square', 'to_square', 'length', 'hops', 'resulting_boards')
+
+    def __init__(self, game, from_square, to_square, length, hops, resulting_boards):
+        self.game = game
+        self.from_square = from_square
+        self.to_square = to_square
+        self.length = length
+        self.hops = hops
+        self.resulting_boards = resulting_boards
+
+    @classmethod
+    def concatenate(cls, batches: list):
+        if not batches:
+            return cls(*(np.zeros(0, dtype=np.int64) for _ in range(3)), np.zeros(0, dtype=np.int16),
+                       np.zeros((0, MAX_HOPS), dtype=np.int8),
+                       np.zeros((0, Board.MAX_ROW, Board.MAX_COL), dtype=np.int8))
+        return cls(*(np.concatenate([getattr(batch, field) for batch in batches]) for field in cls.FIELDS))
+
+    def __len__(self):
+        return len(self.game)
+
+    @property
+    def captures(self) -> np.ndarray:
+        return np.where(self.length > 1, self.length // 2, 0)
+
+    def select(self, mask: np.ndarray):
+        return LineBatch(*(getattr(self, field)[mask] for field in self.FIELDS))
+
+    def to_moves(self, index: int) -> List[Move]:
+        current = divmod(int(self.from_square[index]), Board.MAX_COL)
+        if self.length[index] == 1:
+            return [Move(Square(*current), Square(*divmod(int(self.to_square[index]), Board.MAX_COL)))]
+        moves = []
+        for landing in self.hops[index]:
+            if landing < 0:
+                break
+            landing = divmod(int(landing), Board.MAX_COL)
+            jumped = ((current[0] + landing[0]) // 2, (current[1] + landing[1]) // 2)
+            moves += [Move(Square(*current), Square(*jumped)), Move(Square(*jumped), Square(*landing))]
+            current = landing
+        return moves
+
+
+class BatchSimulator:
+    def __init__(self, num_of_games: int, max_plies: int = 400, seed=None, boards: np.ndarray = None):
+        self.rng = np.random.default_rng(seed)
+        self.max_plies = max_plies
+        if boards is None:
+            boards = np.repeat(encode_board(Board())[None], num_of_games, axis=0)
+        self.boards = boards.astype(np.int8)
+        self.num_of_games = len(self.boards)
+        self.winners = np.full(self.num_of_games, DRAW, dtype=np.int8)
+        self.plies = np.zeros(self.num_of_games, dtype=np.int32)
+        self.active = np.ones(self.num_of_games, dtype=bool)
+
+    @staticmethod
+    def _crown(boards: np.ndarray, rows: np.ndarray, cols: np.ndarray, sign: int, states: np.ndarray):
+        # A piece landing on the first or last row becomes a king, mid capture as well
+        last_row = (rows == 0) | (rows == Board.MAX_ROW - 1)
+        boards[states[last_row], rows[last_row], cols[last_row]] = sign * KING
+
+    @classmethod
+    def get_steps(cls, boards: np.ndarray, games: np.ndarray, player_id: int) -> LineBatch:
+        sign = PLAYER_SIGN[player_id]
+        own = boards * sign
+        padded = _pad(boards)
+        parts = []
+        for d_row, d_col in DIAGONALS:
+            movable = own > 0 if d_row == sign else own == KING
+            mask = movable & (_shifted(padded, d_row, d_col) == EMPTY)
+            index, rows, cols = np.nonzero(mask)
+            parts.append((index, rows, cols, rows + d_row, cols + d_col))
+        index, rows, cols, to_rows, to_cols = (np.concatenate(p) for p in zip(*parts))
+        resulting = boards[index].copy()
+        states = np.arange(len(index))
+        resulting[states, to_rows, to_cols] = resulting[states, rows, cols]
+        resulting[states, rows, cols] = EMPTY
+        cls._crown(resulting, to_rows, to_cols, sign, states)
+        hops = np.full((len(index), MAX_HOPS), -1, dtype=np.int8)
+        return LineBatch(games[index], rows * Board.MAX_COL + cols, to_rows * Board.MAX_COL + to_cols,
+                         np.ones(len(index), dtype=np.int16), hops, resulting)
+
+    @classmethod
+    def _hop(cls, boards, index, rows, cols, d_rows, d_cols, sign):
+        # Make one capture hop for every state on its own copy of the board
+        resulting = boards[index].copy()
+        states = np.arange(len(index))
+        land_rows, land_cols = rows + 2 * d_rows, cols + 2 * d_cols
+        resulting[states, land_rows, land_cols] = resulting[states, rows, cols]
+        resulting[states, rows, cols] = EMPTY
+        resulting[states, rows + d_rows, cols + d_cols] = EMPTY
+        cls._crown(resulting, land_rows, land_cols, sign, states)
+        return resulting, land_rows, land_cols
+
+    @classmethod
+    def get_captures(cls, boards: np.ndarray, games: np.ndarray, player_id: int) -> LineBatch:
+        sign = PLAYER_SIGN[player_id]
+        own = boards * sign
+        padded = _pad(boards)
+        parts = []
+        for d_row, d_col in DIAGONALS:
+            # The first hop follows the piece movement rules, continuations may go in any direction
+            movable = own > 0 if d_row == sign else own == KING
+            adjacent = _shifted(padded, d_row, d_col)
+            mask = movable & (adjacent != OFF_BOARD) & (adjacent * sign < 0) & \
+                (_shifted(padded, 2 * d_row, 2 * d_col) == EMPTY)
+            index, rows, cols = np.nonzero(mask)
+            parts.append((index, rows, cols, np.full(len(index), d_row), np.full(len(index), d_col)))
+        index, rows, cols, d_rows, d_cols = (np.concatenate(p) for p in zip(*parts))
+        state_boards, pos_rows, pos_cols = cls._hop(boards, index, rows, cols, d_rows, d_cols, sign)
+        state_games = games[index]
+        state_from = rows * Board.MAX_COL + cols
+        state_hops = np.full((len(index), MAX_HOPS), -1, dtype=np.int8)
+        state_hops[:, 0] = pos_rows * Board.MAX_COL + pos_cols
+        depth = 1
+        done = []
+        while len(state_games):
+            padded = _pad(state_boards)
+            states = np.arange(len(state_games))
+            continues = np.zeros(len(state_games), dtype=bool)
+            parts = []
+            for d_row, d_col in DIAGONALS:
+                adjacent = padded[states, PAD + pos_rows + d_row, PAD + pos_cols + d_col]
+                landing = padded[states, PAD + pos_rows + 2 * d_row, PAD + pos_cols + 2 * d_col]
+                mask = (adjacent != OFF_BOARD) & (adjacent * sign < 0) & (landing == EMPTY)
+                continues |= mask
+                (next_states, ) = np.nonzero(mask)
+                parts.append((next_states, np.full(len(next_states), d_row), np.full(len(next_states), d_col)))
+            finished = ~continues
+            done.append((state_games[finished], state_from[finished], pos_rows[finished] * Board.MAX_COL +
+                         pos_cols[finished], np.full(finished.sum(), 2 * depth, dtype=np.int16),
+                         state_hops[finished], state_boards[finished]))
+            next_states, d_rows, d_cols = (np.concatenate(p) for p in zip(*parts))
+            state_boards, new_rows, new_cols = cls._hop(state_boards, next_states, pos_rows[next_states],
+                                                        pos_cols[next_states], d_rows, d_cols, sign)
+            pos_rows, pos_cols = new_rows, new_cols
+            state_games, state_from = state_games[next_states], state_from[next_states]
+            state_hops = state_hops[next_states].copy()
+            if len(next_states):
+                state_hops[:, depth] = pos_rows * Board.MAX_COL + pos_cols
+            depth += 1
+        return LineBatch.concatenate([LineBatch(*part) for part in done])
+
+    @classmethod
+    def get_legal_lines(cls, boards: np.ndarray, games: np.ndarray, player_id: int) -> LineBatch:
+        # Captures are mandatory, so a game only gets step lines when it has no capture at all
+        active_boards = boards[games]
+        local = np.arange(len(games))
+        captures = cls.get_captures(active_boards, local, player_id)
+        has_capture = np.zeros(len(games), dtype=bool)
+        has_capture[captures.game] = True
+        steps = cls.get_steps(active_boards, local, player_id)
+        steps = steps.select(~has_capture[steps.game])
+        lines = LineBatch.concatenate([captures, steps])
+        lines.game = games[lines.game]
+        return lines
+
+    def group_argmax(self, games: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        # Index of the best scoring line of every game, ties broken at random
+        order = np.lexsort((self.rng.random(len(scores)), scores, games))
+        sorted_games = games[order]
+        last = np.append(sorted_games[1:] != sorted_games[:-1], True)
+        return order[last]
+
+    def step(self, white_strategy, black_strategy, ply: int):
+        player_id = ply % 2
+        strategy = white_strategy if player_id == PlayerId.white.value else black_strategy
+        (games, ) = np.nonzero(self.active)
+        lines = self.get_legal_lines(self.boards, games, player_id)
+        has_moves = np.zeros(self.num_of_games, dtype=bool)
+        has_moves[lines.game] = True
+        stuck = self.active & ~has_moves
+        self.winners[stuck] = player_id ^ 1
+        self.active &= has_moves
+        if len(lines) == 0:
+            return
+        chosen = self.group_argmax(lines.game, strategy.rank_lines(lines, player_id))
+        self.boards[lines.game[chosen]] = lines.resulting_boards[chosen]
+        self.plies[lines.game[chosen]] += 1
+
+    def run(self, white_strategy, black_strategy):
+        for ply in range(self.max_plies):
+            if not self.active.any():
+                break
+            self.step(white_strategy, black_strategy, ply)
+        # Games still going after max_plies stay draws
+        self.active[:] = False
+        return self.winners, self.plies
+
@@ -0,0 +1,21 @@
+class DrawRules:
+    # repetitions - reaching the same position with the same player to move that many times is a draw,
+    # quiet_plies - that many plies in a row without a capture or a man moving is a draw,
+    # max_plies - games reaching that many plies are drawn,
+    # material_margin - a player ahead by at least that much material (men 1, kings 1.5) is declared the winner.
+    # Any of the rules can be None (off).
+    def __init__(self, repetitions: int = 3, quiet_plies: int = None, max_plies: int = None,
+                 material_margin: float = None):
+        self.repetitions = repetitions
+        self.quiet_plies = quiet_plies
+        self.max_plies = max_plies
+        self.material_margin = material_margin
+
+    def is_draw(self, repetitions: int, quiet_plies: int, plies: int) -> bool:
+        return ((self.repetitions is not None and repetitions >= self.repetitions) or
+                (self.quiet_plies is not None and quiet_plies >= self.quiet_plies) or
+                (self.max_plies is not None and plies >= self.max_plies))
+
+    def is_decisive_material(self, material: float) -> bool:
+        # material is the difference between the two players' material, from either side
+        return self.material_margin is not None and abs(material) >= self.material_margin
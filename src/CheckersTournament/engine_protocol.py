@@ -0,0 +1,89 @@
+import contextlib
+import json
+import random
+import sys
+import time
+from typing import List
+
+from game_elements.board import Board, Move, PLAYABLE_SQUARES
+from game_record import encode_line, decode_line
+
+# Engines talk JSON, one message per line, over their stdin (requests) and stdout (replies):
+#   engine -> host  {"type": "ready", "name": str, "protocol": PROTOCOL_VERSION}    once started
+#   host -> engine  {"type": "new_game", "player": int}                             before every game
+#   host -> engine  {"type": "move", "id": int, "cells": [32 ints], "orientation": 1 | -1,
+#                    "legal_moves": [[square index, ...], ...], "seed": int, "time_left": float | null}
+#   engine -> host  {"type": "move", "id": int, "index": int}                       index into legal_moves
+#   host -> engine  {"type": "quit"}
+# cells holds the cell code of every playable square (see game_elements.piece), legal lines are the playable
+# square indices of their start square and of the landing square of every hop, as in game records.
+PROTOCOL_VERSION = 1
+READY, NEW_GAME, MOVE, QUIT = 'ready', 'new_game', 'move', 'quit'
+
+
+def encode_message(message: dict) -> bytes:
+    return (json.dumps(message, separators=(',', ':')) + '\n').encode()
+
+
+def decode_message(line: bytes) -> dict:
+    return json.loads(line)
+
+
+def encode_move_request(request_id: int, board: Board, legal_moves: List[List[Move]], seed: int,
+                        time_left: float = None) -> dict:
+    return {'type': MOVE, 'id': request_id, 'cells': [board.get_cell(square) for square in PLAYABLE_SQUARES],
+            'orientation': board.orientation, 'legal_moves': [list(encode_line(line)[1:]) for line in legal_moves],
+            'seed': seed, 'time_left': time_left}
+
+
+def decode_move_request(message: dict) -> tuple:
+    # (board, legal moves) of a move request
+    board = Board(empty=True)
+    for square, cell in zip(PLAYABLE_SQUARES, message['cells']):
+        if cell != board.get_cell(square):
+            board.set_cell(square, cell)
+    if message['orientation'] == -1:
+        board.rotate()
+    return board, [decode_line(indices) for indices in message['legal_moves']]
+
+
+def serve_strategy(strategy_cls, input_stream=None, output_stream=None, **params):
+    # Plays strategy_cls as an engine until quit or the end of input. Anything the strategy prints goes to
+    # stderr, stdout is kept for replies.
+    input_stream = input_stream or sys.stdin.buffer
+    output_stream = output_stream or sys.stdout.buffer
+    with contextlib.redirect_stdout(sys.stderr):
+        output_stream.write(encode_message({'type': READY, 'name': strategy_cls.__name__,
+                                            'protocol': PROTOCOL_VERSION}))
+        output_stream.flush()
+        strategy = strategy_cls(None, **params)
+        for line in input_stream:
+            message = decode_message(line)
+            if message['type'] == QUIT:
+                break
+            if message['type'] == NEW_GAME:
+                strategy.close()
+                strategy = strategy_cls(message['player'], **params)
+            elif message['type'] == MOVE:
+                board, legal_moves = decode_move_request(message)
+                # Seeded by the host so games replay the same whatever engine process plays them
+                random.seed(message['seed'])
+                time_left = message['time_left']
+                strategy.deadline = None if time_left is None else time.perf_counter() + time_left
+                best_move = strategy.choose_best_move(board, legal_moves)
+                output_stream.write(encode_message({'type': MOVE, 'id': message['id'],
+                                                    'index': legal_moves.index(best_move)}))
+                output_stream.flush()
+        strategy.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    import strategies
+
+    parser = argparse.ArgumentParser(description='Serve a built in strategy as an external engine')
+    parser.add_argument('strategy', help='strategy class name, e.g. SearchStrategy')
+    parser.add_argument('--params', default='{}', help='JSON object of strategy parameters')
+    args = parser.parse_args()
+    serve_strategy(getattr(strategies, args.strategy), **json.loads(args.params))
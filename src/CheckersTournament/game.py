@@ -2,6 +2,7 @@ from typing import List, Tuple
 
 from game_elements.board import Board, Vector, Square, Move
 from game_elements.piece import PieceType
+from profiling import Profiler
 
 
 class GameMechanics:
@@ -19,9 +20,15 @@ class GameMechanics:
             piece_captures, piece_steps = cls.get_piece_legal_moves(board, square)
             steps += piece_steps
             captures += piece_captures
-        if captures:
-            return captures
-        return steps
+        legal_moves = captures or steps
+        if Profiler.active is not None:
+            Profiler.active.record_legal_moves('GameMechanics', legal_moves)
+        return legal_moves
+
+    @classmethod
+    def count_legal_moves(cls, board: Board, player_id: int, limit: int = None) -> int:
+        count = len(cls.get_player_legal_moves(board, player_id))
+        return count if limit is None else min(count, limit)
 
     @classmethod
     def get_piece_legal_moves(cls, board: Board, square: Square) -> Tuple[List[List[Move]], List[List[Move]]]:
@@ -63,9 +70,14 @@ class GameMechanics:
                 continue
             captures = cls.get_valid_captures_in_vector(board, square, vector)
             if captures:
-                new_board = Board.duplicate(board)
-                last_square = new_board.run_moves(captures)
-                next_captures = cls.get_valid_captures(new_board, last_square, all_direction=True)
+                if Profiler.active is not None:
+                    Profiler.active.count('GameMechanics.capture_branches')
+                # Continuing captures are looked for on the board itself, with the hop made and unmade around it
+                undo = board.make_move(captures, rotate=False)
+                try:
+                    next_captures = cls.get_valid_captures(board, captures[-1].to_square, all_direction=True)
+                finally:
+                    board.unmake_move(undo)
                 if next_captures:
                     lines = []
                     for line in next_captures:
@@ -0,0 +1,11 @@
+from .board import Board
+from .bitboard import BitBoard
+
+BOARD_BACKENDS = {'list': Board,
+                  'bitboard': BitBoard}
+
+
+def get_board_class(backend: str = 'list'):
+    if backend not in BOARD_BACKENDS:
+        raise ValueError(f'unknown board backend {backend!r}, expected one of {list(BOARD_BACKENDS)}')
+    return BOARD_BACKENDS[backend]
@@ -0,0 +1,208 @@
+from typing import Tuple, List
+
+from .board import Board, Square, Move
+from .piece import PieceType, CELL_VALUES, CELL_CODES, CELL_OWNER, CROWNED_CELL, ILLEGAL_CELL, EMPTY_CELL, \
+    WHITE_MAN_CELL, BLACK_MAN_CELL, WHITE_KING_CELL, BLACK_KING_CELL
+from .zobrist import Zobrist
+
+# Only the 32 dark squares are playable, each one gets a bit: index = row * 4 + col // 2
+NUM_OF_SQUARES = 32
+ALL_SQUARES_MASK = (1 << NUM_OF_SQUARES) - 1
+
+
+def square_to_index(square: Square) -> int:
+    return square.row * 4 + square.col // 2
+
+
+def index_to_square(index: int) -> Square:
+    return Square.from_index(index)
+
+
+SQUARES = tuple(index_to_square(i) for i in range(NUM_OF_SQUARES))
+# Squares of row 0 and row 7, a man landing on one of them is crowned
+CROWNING_MASK = sum(1 << i for i in range(0, 4)) | sum(1 << i for i in range(28, 32))
+# Zobrist.CELL_KEYS index, row * 8 + col, of every bit
+CELL_INDICES = tuple(square.row * Board.MAX_COL + square.col for square in SQUARES)
+MAN_CELLS = (WHITE_MAN_CELL, BLACK_MAN_CELL)
+KING_CELLS = (WHITE_KING_CELL, BLACK_KING_CELL)
+# Squares of the set bits of every byte value, per byte of a mask
+BYTE_SQUARES = tuple(tuple(tuple(SQUARES[byte * 8 + i] for i in range(8) if value >> i & 1) for value in range(256))
+                     for byte in range(NUM_OF_SQUARES // 8))
+# Owners of 4 consecutive squares, by white nibble | black nibble << 4
+NIBBLE_OWNERS = tuple(tuple(Board.WHITE if value >> i & 1 else Board.BLACK if value >> i + 4 & 1 else Board.NULL_PLAYER
+                            for i in range(4))
+                      for value in range(256))
+
+
+class BitBoard(Board):
+    WHITE_START = sum(1 << i for i in range(0, 12))
+    BLACK_START = sum(1 << i for i in range(20, 32))
+
+    @classmethod
+    def duplicate(cls, board):
+        assert isinstance(board, cls)
+        new = cls(empty=True)
+        new.pieces = dict(board.pieces)
+        new.kings = board.kings
+        new.zobrist_hash = board.zobrist_hash ^ Zobrist.orientation_key(board.orientation)
+        return new
+
+    def __init__(self, empty: bool = False):
+        if empty:
+            self.pieces = {self.WHITE: 0, self.BLACK: 0}
+        else:
+            self.pieces = {self.WHITE: self.WHITE_START, self.BLACK: self.BLACK_START}
+        self.kings = 0
+        self.orientation = 1
+        self.zobrist_hash = Zobrist.hash_board(self)
+
+    @property
+    def player_pieces(self):
+        return {player: self.get_player_pieces_location(player) for player in self.pieces}
+
+    def reset(self):
+        self.pieces = {self.WHITE: self.WHITE_START, self.BLACK: self.BLACK_START}
+        self.kings = 0
+        self.orientation = 1
+        self.zobrist_hash = Zobrist.hash_board(self)
+
+    def set_location(self, square: Square, piece_type: PieceType, player_id: int):
+        self.set_cell(square, CELL_CODES[(piece_type, player_id)])
+
+    def set_cell(self, square: Square, cell: int):
+        assert self.is_valid_square(square)
+        if (square.row + square.col) % 2 == 1:
+            assert cell == ILLEGAL_CELL
+            return
+        cur_cell = self.get_cell(square)
+        cell_index = square.row * self.MAX_COL + square.col
+        self.zobrist_hash ^= Zobrist.CELL_KEYS[cur_cell][cell_index] ^ Zobrist.CELL_KEYS[cell][cell_index]
+        bit = 1 << square_to_index(square)
+        self.pieces[self.WHITE] &= ~bit
+        self.pieces[self.BLACK] &= ~bit
+        self.kings &= ~bit
+        player_id = CELL_OWNER[cell]
+        if player_id != self.NULL_PLAYER:
+            self.pieces[player_id] |= bit
+            if CROWNED_CELL[cell] == cell:
+                self.kings |= bit
+
+    def get_cell(self, square: Square) -> int:
+        if (square.row + square.col) % 2 == 1:
+            return ILLEGAL_CELL
+        return self._cell_at(1 << square_to_index(square))
+
+    def get_location(self, square: Square) -> Tuple:
+        assert self.is_valid_square(square)
+        return CELL_VALUES[self.get_cell(square)]
+
+    def get_owners(self) -> list:
+        white, black = self.pieces[self.WHITE], self.pieces[self.BLACK]
+        owners = []
+        for shift in range(0, NUM_OF_SQUARES, 4):
+            owners += NIBBLE_OWNERS[(white >> shift & 15) | (black >> shift & 15) << 4]
+        return owners
+
+    def _cell_at(self, bit: int) -> int:
+        if self.pieces[self.WHITE] & bit:
+            return WHITE_KING_CELL if self.kings & bit else WHITE_MAN_CELL
+        if self.pieces[self.BLACK] & bit:
+            return BLACK_KING_CELL if self.kings & bit else BLACK_MAN_CELL
+        return EMPTY_CELL
+
+    def move(self, move: Move):
+        # A single hop, a piece already on to_square is the one being jumped and is removed
+        from_index, to_index = square_to_index(move.from_square), square_to_index(move.to_square)
+        from_bit, to_bit = 1 << from_index, 1 << to_index
+        cell = self._cell_at(from_bit)
+        to_cell = self._cell_at(to_bit)
+        new_cell = CROWNED_CELL[cell] if to_bit & CROWNING_MASK else cell
+        keys = Zobrist.CELL_KEYS
+        self.zobrist_hash ^= keys[cell][CELL_INDICES[from_index]] ^ keys[to_cell][CELL_INDICES[to_index]] ^ \
+            keys[new_cell][CELL_INDICES[to_index]]
+        pieces = self.pieces
+        pieces[self.WHITE] &= ~(from_bit | to_bit)
+        pieces[self.BLACK] &= ~(from_bit | to_bit)
+        self.kings &= ~(from_bit | to_bit)
+        player_id = CELL_OWNER[cell]
+        if player_id != self.NULL_PLAYER:
+            pieces[player_id] |= to_bit
+            if new_cell == KING_CELLS[player_id]:
+                self.kings |= to_bit
+        return move.to_square
+
+    def run_moves(self, move_list: List[Move]):
+        if len(move_list) == 0:
+            return None
+        self._play_line(move_list)
+        return move_list[-1].to_square
+
+    def _play_line(self, move_list: List[Move]):
+        # The whole line in one update of the masks: the piece leaves its square, the jumped pieces of a capture
+        # line, (start, jumped) (jumped, landing) pairs, are removed and the piece lands, crowned if it reached
+        # a crowning row on the way
+        pieces = self.pieces
+        kings = self.kings
+        keys = Zobrist.CELL_KEYS
+        start = square_to_index(move_list[0].from_square)
+        end = square_to_index(move_list[-1].to_square)
+        start_bit = 1 << start
+        player_id = self.WHITE if pieces[self.WHITE] & start_bit else self.BLACK
+        is_king = kings & start_bit
+        cell = KING_CELLS[player_id] if is_king else MAN_CELLS[player_id]
+        zobrist_hash = self.zobrist_hash ^ keys[cell][CELL_INDICES[start]]
+        removed = start_bit
+        reached = 0
+        for move in move_list:
+            reached |= 1 << square_to_index(move.to_square)
+        if len(move_list) > 1:
+            opponent = player_id ^ 1
+            for move in move_list[:-1:2]:
+                jumped = square_to_index(move.to_square)
+                jumped_bit = 1 << jumped
+                removed |= jumped_bit
+                jumped_cell = KING_CELLS[opponent] if kings & jumped_bit else MAN_CELLS[opponent]
+                zobrist_hash ^= keys[jumped_cell][CELL_INDICES[jumped]]
+            pieces[opponent] &= ~removed
+        end_bit = 1 << end
+        pieces[player_id] = pieces[player_id] & ~start_bit | end_bit
+        kings &= ~removed
+        if is_king or reached & CROWNING_MASK:
+            kings |= end_bit
+            cell = KING_CELLS[player_id]
+        self.kings = kings
+        self.zobrist_hash = zobrist_hash ^ keys[cell][CELL_INDICES[end]]
+
+    def is_empty(self, square: Square):
+        if (square.row + square.col) % 2 == 1:
+            return False
+        bit = 1 << square_to_index(square)
+        return not (self.pieces[self.WHITE] | self.pieces[self.BLACK]) & bit
+
+    def snapshot(self):
+        # Pieces are ints, copying them is as cheap as sharing
+        new = self.__class__.__new__(self.__class__)
+        new.pieces = dict(self.pieces)
+        new.kings = self.kings
+        new.orientation = self.orientation
+        new.zobrist_hash = self.zobrist_hash
+        return new
+
+    def make_move(self, move_list: List[Move], rotate: bool = True) -> tuple:
+        # The masks are ints, the undo token is the masks themselves
+        undo = (self.pieces[self.WHITE], self.pieces[self.BLACK], self.kings, self.zobrist_hash, rotate)
+        self._play_line(move_list)
+        if rotate:
+            self.orientation *= -1
+            self.zobrist_hash ^= Zobrist.ORIENTATION_KEY
+        return undo
+
+    def unmake_move(self, undo: tuple):
+        self.pieces[self.WHITE], self.pieces[self.BLACK], self.kings, self.zobrist_hash, rotate = undo
+        if rotate:
+            self.orientation *= -1
+
+    def get_player_pieces_location(self, player_id) -> List:
+        pieces = self.pieces[player_id]
+        return list(BYTE_SQUARES[0][pieces & 255] + BYTE_SQUARES[1][pieces >> 8 & 255] +
+                    BYTE_SQUARES[2][pieces >> 16 & 255] + BYTE_SQUARES[3][pieces >> 24])
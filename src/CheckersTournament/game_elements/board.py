@@ -1,27 +1,51 @@
 from collections import namedtuple
 from typing import Tuple, List
 
-from .piece import PieceType, PlayerId
+from .piece import PieceType, PlayerId, CELL_VALUES, CELL_CODES, CELL_OWNER, CROWNED_CELL, ILLEGAL_CELL, \
+    EMPTY_CELL, WHITE_MAN_CELL, BLACK_MAN_CELL
+from .zobrist import Zobrist
 
 Vector = namedtuple('Vector', 'row col')
 Move = namedtuple('Move', 'from_square to_square')
 
 
 class Square:
+    # Squares are immutable flyweights: every on-board square is created once and shared,
+    # so equality is almost always an identity check
+    __slots__ = ('row', 'col', '_hash')
+    _interned = {}
+
     @classmethod
     def tuple_to_square(cls, tup):
         assert len(tup) == 2
         return Square(row=tup[0], col=tup[1])
 
-    def __init__(self, row: int, col: int):
-        self.row = row
-        self.col = col
+    @classmethod
+    def from_index(cls, index: int):
+        # Playable squares only, index = row * 4 + col // 2
+        return PLAYABLE_SQUARES[index]
+
+    def __new__(cls, row: int, col: int):
+        square = cls._interned.get((row, col))
+        if square is None:
+            square = object.__new__(cls)
+            square.row = row
+            square.col = col
+            square._hash = hash((row, col))
+            if 0 <= row < Board.MAX_ROW and 0 <= col < Board.MAX_COL:
+                cls._interned[(row, col)] = square
+        return square
+
+    def __reduce__(self):
+        return Square, (self.row, self.col)
 
     def __hash__(self):
-        return hash((self.row, self.col))
+        return self._hash
 
     def __eq__(self, other):
-        return hash(self) == hash(other)
+        if self is other:
+            return True
+        return isinstance(other, Square) and self.row == other.row and self.col == other.col
 
     def __lt__(self, other):
         s1 = self.row, self.col
@@ -51,15 +75,15 @@ class Board:
             board.append([None] * cls.MAX_COL)
             for col in range(cls.MAX_COL):
                 if (col + row) % 2 == 1:
-                    board[row][col] = (PieceType.illegal, cls.NULL_PLAYER)
+                    board[row][col] = ILLEGAL_CELL
                 elif row <= 2:
-                    board[row][col] = (PieceType.man, cls.WHITE)
+                    board[row][col] = WHITE_MAN_CELL
                     piece_location[cls.WHITE].append(Square(row, col))
                 elif row >= 5:
-                    board[row][col] = (PieceType.man, cls.BLACK)
+                    board[row][col] = BLACK_MAN_CELL
                     piece_location[cls.BLACK].append(Square(row, col))
                 else:
-                    board[row][col] = (PieceType.empty, cls.NULL_PLAYER)
+                    board[row][col] = EMPTY_CELL
         return board, piece_location
 
     @classmethod
@@ -70,14 +94,14 @@ class Board:
             board.append([None] * cls.MAX_COL)
             for col in range(cls.MAX_COL):
                 if (col + row) % 2 == 1:
-                    board[row][col] = (PieceType.illegal, cls.NULL_PLAYER)
+                    board[row][col] = ILLEGAL_CELL
                 else:
-                    board[row][col] = (PieceType.empty, cls.NULL_PLAYER)
+                    board[row][col] = EMPTY_CELL
         return board, piece_location
 
     @classmethod
     def load_from_str(cls, str_board: str):
-        new_board = Board(empty=True)
+        new_board = cls(empty=True)
         lines = [line for line in str_board.splitlines()
                  if not line.startswith('-')]
         for row in range(cls.MAX_ROW):
@@ -93,11 +117,11 @@ class Board:
     @classmethod
     def duplicate(cls, board):
         assert isinstance(board, cls)
-        new = Board(empty=True)
-        for player, pieces_list in board.player_pieces.items():
-            for square in pieces_list:
-                pt, _ = board.get_location(square)
-                new.set_location(square, pt, player)
+        new = cls(empty=True)
+        new._board = [list(row) for row in board._board]
+        new.player_pieces = {player: list(pieces_list) for player, pieces_list in board.player_pieces.items()}
+        # The copy is not rotated
+        new.zobrist_hash = board.zobrist_hash ^ Zobrist.orientation_key(board.orientation)
         return new
 
     def __init__(self, empty: bool =False):
@@ -106,11 +130,31 @@ class Board:
         else:
             self._board, self.player_pieces = self.get_new_board()
         self.orientation = 1
+        self.zobrist_hash = Zobrist.hash_board(self)
+        # Set while the cells and piece lists are shared with a snapshot
+        self._shared = False
+
+    def snapshot(self):
+        # An independent copy, orientation included. Both boards share their cells until either one changes.
+        new = self.__class__.__new__(self.__class__)
+        new._board = self._board
+        new.player_pieces = self.player_pieces
+        new.orientation = self.orientation
+        new.zobrist_hash = self.zobrist_hash
+        new._shared = self._shared = True
+        return new
+
+    def _own(self):
+        # Copy on write, the first change after a snapshot gives the board cells and piece lists of its own
+        self._board = [list(row) for row in self._board]
+        self.player_pieces = {player: list(pieces) for player, pieces in self.player_pieces.items()}
+        self._shared = False
 
     def __str__(self):
         sep = '-' * (8*4 + 1)
         lines = [sep]
-        for line in self._board:
+        for row in range(self.MAX_ROW):
+            line = [self.get_location(Square(row, col)) for col in range(self.MAX_COL)]
             str_line = [piece.to_str(player) for piece, player in line]
             lines += [f'|{"|".join(str_line)}|']
             lines += [sep]
@@ -119,26 +163,44 @@ class Board:
     def reset(self):
         self._board, self.player_pieces = self.get_new_board()
         self.orientation = 1
+        self.zobrist_hash = Zobrist.hash_board(self)
+        self._shared = False
 
     def get_dims(self):
         return self.MAX_ROW, self.MAX_COL
 
     def set_location(self, square: Square, piece_type: PieceType, player_id: int):
-        _, cur_player_id = self.get_location(square)
-        if cur_player_id in self.player_pieces.keys():
+        self.set_cell(square, CELL_CODES[(piece_type, player_id)])
+
+    def set_cell(self, square: Square, cell: int):
+        if self._shared:
+            self._own()
+        row, col = square.row, square.col
+        cur_cell = self._board[row][col]
+        cur_player_id = CELL_OWNER[cur_cell]
+        if cur_player_id != self.NULL_PLAYER:
             self.player_pieces[cur_player_id].remove(square)
-        self._board[square.row][square.col] = (piece_type, player_id)
-        if player_id in self.player_pieces.keys():
+        self._board[row][col] = cell
+        cell_index = row * self.MAX_COL + col
+        self.zobrist_hash ^= Zobrist.CELL_KEYS[cur_cell][cell_index] ^ Zobrist.CELL_KEYS[cell][cell_index]
+        player_id = CELL_OWNER[cell]
+        if player_id != self.NULL_PLAYER:
             self.player_pieces[player_id].append(square)
 
+    def get_cell(self, square: Square) -> int:
+        return self._board[square.row][square.col]
+
     def get_location(self, square: Square) -> Tuple:
         assert self.is_valid_square(square)
-        piece = self._board[square.row][square.col]
-        return piece
+        return CELL_VALUES[self._board[square.row][square.col]]
+
+    def get_owners(self) -> list:
+        # Owner of every playable square, indexed like Square.from_index
+        board = self._board
+        return [CELL_OWNER[board[square.row][square.col]] for square in PLAYABLE_SQUARES]
 
     def is_empty(self, square: Square):
-        piece_type = self.get_location(square)[0]
-        return piece_type.value == PieceType.empty.value
+        return self._board[square.row][square.col] == EMPTY_CELL
 
     def is_valid_square(self, square: Square) -> bool:
         if square.row >= self.MAX_ROW or square.col >= self.MAX_COL:
@@ -149,15 +211,16 @@ class Board:
 
     def rotate(self):
         self.orientation *= -1
+        self.zobrist_hash ^= Zobrist.ORIENTATION_KEY
 
     def move(self, move: Move):
         assert self.is_valid_square(move.to_square) and self.is_valid_square(move.from_square)
-        piece_type, player = self.get_location(move.from_square)
+        cell = self.get_cell(move.from_square)
         # Crown a man when reaching last row
         if move.to_square.row in (0, self.MAX_ROW-1):
-            piece_type = PieceType.king
-        self.set_location(move.to_square, piece_type, player)
-        self.set_location(move.from_square, PieceType.empty, self.NULL_PLAYER)
+            cell = CROWNED_CELL[cell]
+        self.set_cell(move.to_square, cell)
+        self.set_cell(move.from_square, EMPTY_CELL)
         return move.to_square
 
     def run_moves(self, move_list: List[Move]):
@@ -167,9 +230,67 @@ class Board:
             self.move(move)
         return move.to_square
 
+    def make_move(self, move_list: List[Move], rotate: bool = True) -> tuple:
+        # Plays a whole line like run_moves and, with rotate, passes the turn. The returned undo token is handed
+        # back to unmake_move, which restores the board exactly, player_pieces order included. Both cost O(hops).
+        if self._shared:
+            self._own()
+        board = self._board
+        start, end = move_list[0].from_square, move_list[-1].to_square
+        cell = board[start.row][start.col]
+        pieces = self.player_pieces[CELL_OWNER[cell]]
+        index = pieces.index(start)
+        del pieces[index]
+        board[start.row][start.col] = EMPTY_CELL
+        zobrist_hash = self.zobrist_hash
+        keys = Zobrist.CELL_KEYS
+        zobrist_hash ^= keys[cell][start.row * self.MAX_COL + start.col]
+        # A capture line is made of (start, jumped) (jumped, landing) pairs
+        captured = []
+        for move in move_list[:-1:2]:
+            jumped = move.to_square
+            jumped_cell = board[jumped.row][jumped.col]
+            opponent_pieces = self.player_pieces[CELL_OWNER[jumped_cell]]
+            jumped_index = opponent_pieces.index(jumped)
+            del opponent_pieces[jumped_index]
+            board[jumped.row][jumped.col] = EMPTY_CELL
+            zobrist_hash ^= keys[jumped_cell][jumped.row * self.MAX_COL + jumped.col]
+            captured.append((jumped, jumped_cell, jumped_index))
+        end_cell = cell
+        for move in move_list:
+            if move.to_square.row in (0, self.MAX_ROW - 1):
+                end_cell = CROWNED_CELL[cell]
+        board[end.row][end.col] = end_cell
+        pieces.append(end)
+        undo = (start, cell, index, end, captured, self.zobrist_hash, rotate)
+        self.zobrist_hash = zobrist_hash ^ keys[end_cell][end.row * self.MAX_COL + end.col]
+        if rotate:
+            self.rotate()
+        return undo
+
+    def unmake_move(self, undo: tuple):
+        start, cell, index, end, captured, zobrist_hash, rotate = undo
+        if self._shared:
+            self._own()
+        board = self._board
+        pieces = self.player_pieces[CELL_OWNER[cell]]
+        pieces.pop()
+        board[end.row][end.col] = EMPTY_CELL
+        for jumped, jumped_cell, jumped_index in reversed(captured):
+            board[jumped.row][jumped.col] = jumped_cell
+            self.player_pieces[CELL_OWNER[jumped_cell]].insert(jumped_index, jumped)
+        board[start.row][start.col] = cell
+        pieces.insert(index, start)
+        if rotate:
+            self.orientation *= -1
+        self.zobrist_hash = zobrist_hash
+
     def get_player_pieces_location(self, player_id) -> List:
         return self.player_pieces[player_id]
 
 
+PLAYABLE_SQUARES = tuple(Square(index // 4, (index % 4) * 2 + (index // 4) % 2) for index in range(32))
+
+
 if __name__ == '__main__':
     print(Board())
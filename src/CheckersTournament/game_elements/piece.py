@@ -43,3 +43,19 @@ class PieceType(Enum):
         if self.name == 'king':
             return (forward, backward)
         return tuple()
+
+
+# Reported instead of a winner player id for drawn games
+DRAW = -1
+
+# Board cells are stored as small ints, the (PieceType, player id) tuples are only handed out at the API boundary
+ILLEGAL_CELL, EMPTY_CELL, WHITE_MAN_CELL, BLACK_MAN_CELL, WHITE_KING_CELL, BLACK_KING_CELL = range(6)
+CELL_VALUES = ((PieceType.illegal, PlayerId.null.value),
+               (PieceType.empty, PlayerId.null.value),
+               (PieceType.man, PlayerId.white.value),
+               (PieceType.man, PlayerId.black.value),
+               (PieceType.king, PlayerId.white.value),
+               (PieceType.king, PlayerId.black.value))
+CELL_CODES = {value: code for code, value in enumerate(CELL_VALUES)}
+CELL_OWNER = tuple(player_id for _, player_id in CELL_VALUES)
+CROWNED_CELL = (ILLEGAL_CELL, EMPTY_CELL, WHITE_KING_CELL, BLACK_KING_CELL, WHITE_KING_CELL, BLACK_KING_CELL)
@@ -0,0 +1,41 @@
+import random
+
+from .piece import PieceType, PlayerId, CELL_VALUES
+
+_NUM_OF_CELLS = 8 * 8
+_rng = random.Random(0x5EED)
+
+
+class Zobrist:
+    # One random key per (piece type, player, cell), the board hash is the xor of the keys of every piece on it
+    PIECE_KEYS = {(piece_type, player_id): tuple(_rng.getrandbits(64) for _ in range(_NUM_OF_CELLS))
+                  for piece_type in (PieceType.man, PieceType.king)
+                  for player_id in (PlayerId.white.value, PlayerId.black.value)}
+    # Xored in while the board is rotated. Orientation is what decides the side to move in a match,
+    # so this key covers both.
+    ORIENTATION_KEY = _rng.getrandbits(64)
+
+    @classmethod
+    def piece_key(cls, row: int, col: int, piece_type: PieceType, player_id: int) -> int:
+        keys = cls.PIECE_KEYS.get((piece_type, player_id))
+        if keys is None:
+            return 0
+        return keys[row * 8 + col]
+
+    @classmethod
+    def orientation_key(cls, orientation: int) -> int:
+        return cls.ORIENTATION_KEY if orientation == -1 else 0
+
+    @classmethod
+    def hash_board(cls, board) -> int:
+        # Full recomputation, boards keep their hash up to date incrementally
+        value = cls.orientation_key(board.orientation)
+        for player_id in (PlayerId.white.value, PlayerId.black.value):
+            for square in board.get_player_pieces_location(player_id):
+                piece_type, _ = board.get_location(square)
+                value ^= cls.piece_key(square.row, square.col, piece_type, player_id)
+        return value
+
+
+# The same keys indexed by board cell code, empty and illegal cells hash to 0
+Zobrist.CELL_KEYS = tuple(Zobrist.PIECE_KEYS.get(value, (0, ) * _NUM_OF_CELLS) for value in CELL_VALUES)
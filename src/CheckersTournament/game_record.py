@@ -0,0 +1,210 @@
+import mmap
+import os
+import queue
+import struct
+import threading
+from array import array
+from collections import namedtuple
+from typing import List
+
+from game_elements.bitboard import square_to_index
+from game_elements.board import Board, Square, Move
+
+# File layout: FILE_HEADER followed by records, each one
+#   u32 length of the rest of the record | u64 seed | i8 result | u16 plies
+#   u8 + utf8 white strategy name | u8 + utf8 black strategy name
+#   every ply: u8 number of squares n, then n playable square indices (start square and the landing square of
+#   every hop, a hop of two rows is a capture)
+FILE_HEADER = b'CKGR\x01'
+RECORD_HEADER = struct.Struct('<IQbH')
+NO_SEED = 2 ** 64 - 1
+
+GameRecord = namedtuple('GameRecord', 'white black seed result lines')
+
+
+def encode_line(line: List[Move]) -> bytes:
+    hops = line[1::2] if len(line) > 1 else line
+    squares = [line[0].from_square] + [move.to_square for move in hops]
+    return bytes([len(squares)] + [square_to_index(square) for square in squares])
+
+
+def decode_line(indices) -> List[Move]:
+    squares = [Square.from_index(index) for index in indices]
+    line = []
+    for start, end in zip(squares, squares[1:]):
+        if abs(end.row - start.row) == 2:
+            jumped = Square((start.row + end.row) // 2, (start.col + end.col) // 2)
+            line += [Move(start, jumped), Move(jumped, end)]
+        else:
+            line.append(Move(start, end))
+    return line
+
+
+def _encode_name(name: str) -> bytes:
+    encoded = name.encode()[:255]
+    return bytes([len(encoded)]) + encoded
+
+
+def decode_record(data, offset: int = 0) -> GameRecord:
+    # The record starting at offset of data, as written by GameRecordEncoder
+    _, seed, result, plies = RECORD_HEADER.unpack_from(data, offset)
+    offset += RECORD_HEADER.size
+    names = []
+    for _ in range(2):
+        length = data[offset]
+        names.append(data[offset + 1:offset + 1 + length].decode())
+        offset += 1 + length
+    lines = []
+    for _ in range(plies):
+        length = data[offset]
+        lines.append(decode_line(data[offset + 1:offset + 1 + length]))
+        offset += 1 + length
+    return GameRecord(names[0], names[1], None if seed == NO_SEED else seed, result, lines)
+
+
+class GameRecordEncoder:
+    # Match calls start_game, record_line for every ply and end_game, the finished record goes to write_record
+    def start_game(self, white: str, black: str, seed=None):
+        self._names = _encode_name(white) + _encode_name(black)
+        self._seed = NO_SEED if seed is None else seed
+        self._lines = []
+
+    def record_line(self, line: List[Move]):
+        self._lines.append(encode_line(line))
+
+    def end_game(self, result: int):
+        body = self._names + b''.join(self._lines)
+        header = RECORD_HEADER.pack(RECORD_HEADER.size - 4 + len(body), self._seed, result, len(self._lines))
+        self.write_record(header + body)
+
+    def write_record(self, record: bytes):
+        raise NotImplementedError
+
+
+class GameRecordBuffer(GameRecordEncoder):
+    # Keeps finished records in memory, used by worker processes that hand their games back to the parent
+    def __init__(self):
+        self.records = []
+
+    def write_record(self, record: bytes):
+        self.records.append(record)
+
+    def getvalue(self) -> bytes:
+        return b''.join(self.records)
+
+
+class BackgroundRecordWriter(GameRecordEncoder):
+    # Writes records from a background thread so the game loop never waits on the disk. Subclasses write a record
+    # in _write and release what they write to in _close_output, both called on that thread. An exception raised by
+    # either ends the thread, it is kept in error and raised again by write_record and close.
+    def __init__(self):
+        self.error = None
+        self.queue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread.start()
+
+    def _write(self, record: bytes):
+        raise NotImplementedError
+
+    def _close_output(self):
+        raise NotImplementedError
+
+    def _write_loop(self):
+        try:
+            try:
+                while True:
+                    record = self.queue.get()
+                    if record is None:
+                        break
+                    self._write(record)
+            finally:
+                self._close_output()
+        except Exception as error:
+            self.error = error
+
+    def _raise_error(self):
+        if self.error is not None:
+            raise self.error
+
+    def write_record(self, record: bytes):
+        self._raise_error()
+        self.queue.put(record)
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        self._raise_error()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class GameRecorder(BackgroundRecordWriter):
+    # Appends records to a file
+    def __init__(self, path: str, buffer_size: int = 2 ** 20):
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        if not is_new:
+            with open(path, 'rb') as f:
+                if f.read(len(FILE_HEADER)) != FILE_HEADER:
+                    raise ValueError(f'{path} is not a game record file')
+        self.path = path
+        self.file = open(path, 'ab', buffering=buffer_size)
+        if is_new:
+            self.file.write(FILE_HEADER)
+        super().__init__()
+
+    def _write(self, record: bytes):
+        self.file.write(record)
+
+    def _close_output(self):
+        self.file.close()
+
+
+class GameRecordReader:
+    def __init__(self, path: str):
+        self.file = open(path, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.data[:len(FILE_HEADER)] != FILE_HEADER:
+            raise ValueError(f'{path} is not a game record file')
+        self.offsets = array('Q')
+        offset = len(FILE_HEADER)
+        while offset + 4 <= len(self.data):
+            (length, ) = struct.unpack_from('<I', self.data, offset)
+            if offset + 4 + length > len(self.data):
+                # A record cut by a crash while writing, ignore it
+                break
+            self.offsets.append(offset)
+            offset += 4 + length
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, index: int) -> GameRecord:
+        return decode_record(self.data, self.offsets[index])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def replay(self, index: int, board: Board = None, plies: int = None) -> Board:
+        # Plays the first plies lines (all of them by default) of a game from the starting position
+        board = board if board is not None else Board()
+        board.reset()
+        for line in self[index].lines[:plies]:
+            board.run_moves(line)
+            board.rotate()
+        return board
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,30 +1,82 @@
 import random
+import time
 from typing import List, Type
 
-from game import GameMechanics
+from game_elements import get_board_class
 from game_elements.board import Board, Move
-from game_elements.piece import PlayerId
+from draw_rules import DrawRules
+from game_elements.piece import PieceType, PlayerId, DRAW
+from game_record import GameRecordEncoder
+from move_generator import MoveGenerator, IncrementalMoveGenerator
+from profiling import Profiler
+from tablebase import Tablebase, WIN, LOSS
+from time_control import TimeControl, MoveTimeout, FORFEIT
 from strategies import Strategy, ALL_STRATEGIES
+from strategies.search_strategy import material_evaluation
+from transposition_table import TranspositionTable
 
 
 class Player:
-    def __init__(self, player_id: int, strategy: Type[Strategy]):
+    def __init__(self, player_id: int, strategy: Type[Strategy], **strategy_params):
         self.player_id = player_id
-        self.strategy = strategy(player_id)
+        self.strategy = strategy(player_id, **strategy_params)
 
-    def play_turn(self, board: Board, legal_moves: List[List[Move]]):
-        best_move = self.strategy.choose_best_move(board, legal_moves)
-        board.run_moves(best_move)
+    def choose_move(self, board: Board, legal_moves: List[List[Move]], profiler: Profiler = None):
+        if profiler is None:
+            return self.strategy.choose_best_move(board, legal_moves)
+        with profiler.timer(f'{Match.PROFILE_STACK};{self.strategy.name}.choose_best_move'):
+            return self.strategy.choose_best_move(board, legal_moves)
+
+    def play_turn(self, board: Board, legal_moves: List[List[Move]], profiler: Profiler = None):
+        best_move = self.choose_move(board, legal_moves, profiler)
+        Player.run_move(board, best_move, profiler)
         return best_move
 
+    @staticmethod
+    def run_move(board: Board, line: List[Move], profiler: Profiler = None):
+        if profiler is None:
+            board.run_moves(line)
+            return
+        with profiler.timer(f'{Match.PROFILE_STACK};Board.run_moves'):
+            board.run_moves(line)
+
     def get_player_id(self) -> int:
         return self.player_id
 
 
 class Match:
-    def __init__(self, players: List[Player], board: Board):
+    PROFILE_STACK = 'Match.match'
+    # Returned by match instead of a winner index for drawn games
+    DRAW = DRAW
+
+    def __init__(self, players: List[Player], board: Board, move_cache: TranspositionTable = None,
+                 recorder: GameRecordEncoder = None, seed=None,
+                 incremental_moves: IncrementalMoveGenerator = None, profiler: Profiler = None,
+                 time_control: TimeControl = None, tablebase: Tablebase = None, draw_rules: DrawRules = None,
+                 opening: List[List[Move]] = None):
         self.players: List[Player] = players
         self.board: Board = board
+        self.move_cache: TranspositionTable = move_cache
+        self.recorder: GameRecordEncoder = recorder
+        self.seed = seed
+        self.incremental_moves: IncrementalMoveGenerator = incremental_moves
+        # Off unless given, the engine reports to the profiler while a match is played
+        self.profiler: Profiler = profiler
+        self.time_control: TimeControl = time_control
+        # Seconds left on every player's game clock, None when unlimited
+        self.clocks: list = None
+        self.forfeited: bool = False
+        # Games reaching a position the tablebase knows to be won end there
+        self.tablebase: Tablebase = tablebase
+        # Games are only drawn or won on material when given draw rules
+        self.draw_rules: DrawRules = draw_rules
+        # Times every position was reached since the last capture or man move, by zobrist hash
+        self.position_counts: dict = {}
+        self.quiet_plies: int = 0
+        # Winner index or DRAW once the game was adjudicated
+        self.adjudicated_winner: int = None
+        # Lines played for the players before their strategies take over, from the starting position
+        self.opening: List[List[Move]] = opening or []
         self.last_move: Move = None
         self.moves_count: int = 0
         self.current_player_index: int = None
@@ -45,32 +97,171 @@ class Match:
         return False
 
     def setup_match(self):
+        if self.seed is not None:
+            random.seed(self.seed)
         self.board.reset()
         self.current_player_index = 0
+        self.moves_count = 0
+        self.forfeited = False
+        self.adjudicated_winner = None
+        self.position_counts.clear()
+        self.quiet_plies = 0
+        if self.time_control is not None:
+            self.clocks = [self.time_control.game_time] * len(self.players)
+        if self.incremental_moves is not None:
+            self.incremental_moves.reset()
+        if self.recorder is not None:
+            white, black = (p.strategy.name for p in self.players)
+            self.recorder.start_game(white, black, self.seed)
+        for line in self.opening:
+            self.play_line(line)
+            self.set_next_player()
+
+    def adjudicate(self):
+        # Index of the winner or DRAW when the tablebase or the draw rules end the game, None otherwise
+        player_id = self.players[self.current_player_index].player_id
+        if self.tablebase is not None:
+            probe = self.tablebase.probe(self.board, player_id)
+            if probe is not None and probe[0] in (WIN, LOSS):
+                return self.current_player_index if probe[0] == WIN else self.get_previous_player()
+        if self.draw_rules is None:
+            return None
+        if self.draw_rules.material_margin is not None:
+            material = material_evaluation(self.board, player_id)
+            if self.draw_rules.is_decisive_material(material):
+                return self.current_player_index if material > 0 else self.get_previous_player()
+        # The zobrist hash covers the orientation, so equal hashes also have the same player to move
+        position = self.board.zobrist_hash
+        repetitions = self.position_counts[position] = self.position_counts.get(position, 0) + 1
+        if self.draw_rules.is_draw(repetitions, self.quiet_plies, self.moves_count):
+            return self.DRAW
+        return None
+
+    def is_over(self, legal_moves: List[List[Move]] = None) -> bool:
+        # Without legal_moves only whether the player to move has any line is looked for
+        if self.is_win():
+            return True
+        if legal_moves is None:
+            player_id = self.players[self.current_player_index].player_id
+            if not MoveGenerator.has_any_legal_move(self.board, player_id):
+                return True
+        elif len(legal_moves) == 0:
+            return True
+        self.adjudicated_winner = self.adjudicate()
+        return self.adjudicated_winner is not None
+
+    def end_match(self) -> int:
+        winner = self.get_previous_player()
+        if self.adjudicated_winner is not None:
+            winner = self.adjudicated_winner
+        if self.recorder is not None:
+            self.recorder.end_game(winner)
+        for player in self.players:
+            player.strategy.close()
+        if self.profiler is not None:
+            self.profiler.count('games')
+            self.profiler.observe('plies_per_game', self.moves_count)
+        return winner
 
     def get_legal_moves_for_player(self, player: Player = None) -> List[List[Move]]:
+        if self.profiler is not None:
+            start = time.perf_counter()
+            legal_moves = self.generate_legal_moves(player)
+            self.profiler.add_time(f'{self.PROFILE_STACK};Match.get_legal_moves_for_player',
+                                   time.perf_counter() - start)
+            return legal_moves
+        return self.generate_legal_moves(player)
+
+    def generate_legal_moves(self, player: Player = None) -> List[List[Move]]:
         if player is None:
             player = self.players[self.current_player_index]
-        return GameMechanics.get_player_legal_moves(self.board, player.player_id)
+        if self.incremental_moves is not None:
+            return self.incremental_moves.get_player_legal_moves(self.board, player.player_id)
+        if self.move_cache is not None:
+            return MoveGenerator.get_cached_player_legal_moves(self.board, player.player_id, self.move_cache)
+        return MoveGenerator.get_player_legal_moves(self.board, player.player_id)
 
     def match(self):
+        if self.profiler is None:
+            return self.run_match()
+        with self.profiler, self.profiler.timer(self.PROFILE_STACK):
+            return self.run_match()
+
+    def run_match(self):
         self.setup_match()
         is_over = False
         legal_moves = self.get_legal_moves_for_player()
         while not is_over:
-            self.play_once(legal_moves)
+            if self.play_once(legal_moves) is None:
+                # Forfeited on time, the previous player wins
+                break
             self.set_next_player()
-            legal_moves = self.get_legal_moves_for_player()
-            is_over = self.is_win() or len(legal_moves) == 0
-        return self.get_previous_player()
+            # The lines are only generated once the game goes on
+            is_over = self.is_over()
+            if not is_over:
+                legal_moves = self.get_legal_moves_for_player()
+        return self.end_match()
+
+    def get_move_budget(self):
+        # Seconds the current player has for its move, None when unlimited
+        return self.time_control.get_move_budget(self.clocks[self.current_player_index])
+
+    def play_timed_turn(self, player: Player, legal_moves: List[List[Move]]):
+        # Returns the line to play, or None when the player forfeited by running out of time
+        budget = self.get_move_budget()
+        start = time.perf_counter()
+        player.strategy.deadline = None if budget is None else start + budget
+        try:
+            best_move = player.choose_move(self.board, legal_moves, self.profiler)
+        except MoveTimeout:
+            best_move = None
+        return self.end_timed_turn(player, legal_moves, best_move, budget, time.perf_counter() - start)
+
+    def end_timed_turn(self, player: Player, legal_moves: List[List[Move]], best_move: List[Move], budget: float,
+                       elapsed: float):
+        # Charges the player's clock, best_move is None when the player could not choose one in time
+        clock = self.clocks[self.current_player_index]
+        self.clocks[self.current_player_index] = self.time_control.update_clock(clock, elapsed)
+        if best_move is None or self.time_control.is_overrun(budget, elapsed):
+            if self.profiler is not None:
+                self.profiler.count(f'{player.strategy.name}.time_overruns')
+            if self.time_control.on_overrun == FORFEIT:
+                self.forfeited = True
+                return None
+            best_move = legal_moves[0]
+        return best_move
+
+    def update_quiet_plies(self, line: List[Move]):
+        # Captures and man moves can not be undone, no position before them can repeat
+        piece_type, _ = self.board.get_location(line[0].from_square)
+        if len(line) > 1 or piece_type == PieceType.man:
+            self.quiet_plies = 0
+            self.position_counts.clear()
+        else:
+            self.quiet_plies += 1
 
     def play_once(self, legal_moves: List[List[Move]]):
         player = self.players[self.current_player_index]
-        played_move = player.play_turn(self.board, legal_moves)
-        self.last_move = played_move
-        self.moves_count += 1
+        if self.time_control is None:
+            played_move = player.choose_move(self.board, legal_moves, self.profiler)
+        else:
+            played_move = self.play_timed_turn(player, legal_moves)
+            if played_move is None:
+                return None
+        self.play_line(played_move)
         return played_move
 
+    def play_line(self, line: List[Move]):
+        if self.draw_rules is not None:
+            self.update_quiet_plies(line)
+        Player.run_move(self.board, line, self.profiler)
+        if self.recorder is not None:
+            self.recorder.record_line(line)
+        if self.incremental_moves is not None:
+            self.incremental_moves.invalidate_line(line)
+        self.last_move = line
+        self.moves_count += 1
+
     def set_next_player(self):
         self.current_player_index += 1
         self.current_player_index %= len(self.players)
@@ -84,25 +275,32 @@ class Match:
             input("Press any key for next move...")
             print(self.get_state_str())
             played_move = self.play_once(legal_moves)
+            if played_move is None:
+                break
             self.set_next_player()
-            legal_moves = self.get_legal_moves_for_player()
-            is_over = self.is_win() or len(legal_moves) == 0
-        return self.get_previous_player()
+            # The lines are only generated once the game goes on
+            is_over = self.is_over()
+            if not is_over:
+                legal_moves = self.get_legal_moves_for_player()
+        return self.end_match()
 
     def get_previous_player(self):
         return (self.current_player_index - 1) % len(self.players)
 
 
-def play_match():
+def play_match(board_backend: str = 'list'):
     strat1 = random.choice(ALL_STRATEGIES)
     strat2 = random.choice(ALL_STRATEGIES)
     player1 = Player(PlayerId.white.value, strat1)
     player2 = Player(PlayerId.black.value, strat2)
-    board = Board()
+    board = get_board_class(board_backend)()
     players = [player1, player2]
     match = Match(players, board)
     winner_id = match.match()
     print(match.get_state_str())
+    if winner_id == Match.DRAW:
+        print('the game is a draw')
+        return
     print(f'player {winner_id} wins with strategy {players[winner_id].strategy.__class__}\n'
           f'other staretegy was: {players[winner_id^1].strategy.__class__}')
 
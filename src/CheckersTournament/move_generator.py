@@ -0,0 +1,377 @@
+import itertools
+from typing import List, Iterator
+
+from game import GameMechanics
+from game_elements.bitboard import BitBoard, NUM_OF_SQUARES, ALL_SQUARES_MASK, square_to_index, index_to_square
+from game_elements.board import Board, Move
+from game_elements.piece import PieceType
+from profiling import Profiler
+from transposition_table import TranspositionTable
+
+
+class MoveTables:
+    # Diagonals only, in the same order GameMechanics visits them so the generated lines keep its ordering
+    DIRECTIONS = tuple(v for v in GameMechanics.DIRECTION_VECTORS if 0 not in v)
+    ALL_DIRECTIONS = tuple(range(len(DIRECTIONS)))
+    SQUARES = tuple(index_to_square(i) for i in range(NUM_OF_SQUARES))
+
+    @classmethod
+    def _target(cls, index: int, direction: int, distance: int) -> int:
+        square = cls.SQUARES[index]
+        vector = cls.DIRECTIONS[direction]
+        row = square.row + vector.row * distance
+        col = square.col + vector.col * distance
+        if not (0 <= row < Board.MAX_ROW and 0 <= col < Board.MAX_COL):
+            return -1
+        return row * 4 + col // 2
+
+    @classmethod
+    def _piece_directions(cls, piece_type: PieceType, orientation: int) -> tuple:
+        rows = piece_type.valid_movement_direction(orientation)
+        return tuple(d for d, vector in enumerate(cls.DIRECTIONS) if vector.row in rows)
+
+    @staticmethod
+    def _shifts(targets: list) -> tuple:
+        offsets = sorted({target - index for index, target in enumerate(targets) if target >= 0})
+        return tuple((max(offset, 0), max(-offset, 0), sum(1 << index for index, target in enumerate(targets)
+                                                           if target == index + offset))
+                     for offset in offsets)
+
+
+MoveTables.NEIGHBORS = tuple(tuple(MoveTables._target(i, d, 1) for d in MoveTables.ALL_DIRECTIONS)
+                             for i in range(NUM_OF_SQUARES))
+MoveTables.JUMPS = tuple(tuple(MoveTables._target(i, d, 2) for d in MoveTables.ALL_DIRECTIONS)
+                         for i in range(NUM_OF_SQUARES))
+MoveTables.PIECE_DIRECTIONS = {(piece_type, orientation): MoveTables._piece_directions(piece_type, orientation)
+                               for piece_type in (PieceType.man, PieceType.king)
+                               for orientation in (1, -1)}
+# Bit mask of the piece square and the squares a piece's steps and first jumps look at, per set of directions
+MoveTables.READS = tuple({directions: sum({1 << i} | {1 << s for d in directions
+                                                      for s in (MoveTables.NEIGHBORS[i][d], MoveTables.JUMPS[i][d])
+                                                      if s >= 0})
+                          for directions in set(MoveTables.PIECE_DIRECTIONS.values())}
+                         for i in range(NUM_OF_SQUARES))
+# Per direction, (right shift, left shift, mask of the squares it applies to) bringing the bit of the neighbor
+# that way, or of the jump landing square, onto every square's own bit. Neighbor offsets alternate with the row.
+MoveTables.NEIGHBOR_SHIFTS = tuple(MoveTables._shifts([MoveTables.NEIGHBORS[i][d] for i in range(NUM_OF_SQUARES)])
+                                   for d in MoveTables.ALL_DIRECTIONS)
+MoveTables.JUMP_SHIFTS = tuple(MoveTables._shifts([MoveTables.JUMPS[i][d] for i in range(NUM_OF_SQUARES)])
+                               for d in MoveTables.ALL_DIRECTIONS)
+# Both flattened, direction first, for MoveGenerator.get_bitboard_movers
+MoveTables.DIRECTION_SHIFTS = tuple((d, ) + sum(MoveTables.NEIGHBOR_SHIFTS[d] + MoveTables.JUMP_SHIFTS[d], ())
+                                    for d in MoveTables.ALL_DIRECTIONS)
+MoveTables.STEPS = tuple(tuple(Move(MoveTables.SQUARES[i], MoveTables.SQUARES[n]) if n >= 0 else None
+                               for n in MoveTables.NEIGHBORS[i])
+                         for i in range(NUM_OF_SQUARES))
+
+
+# Table driven replacement for GameMechanics.get_player_legal_moves, returning exactly the same lines.
+# Multi jump chains are built by making and unmaking each hop on a flat owner list instead of
+# duplicating the board for every capture.
+class MoveGenerator:
+    NULL_PLAYER = Board.NULL_PLAYER
+
+    @classmethod
+    def get_player_legal_moves(cls, board: Board, player_id: int) -> List[List[Move]]:
+        if isinstance(board, BitBoard):
+            legal_moves = cls.get_bitboard_legal_moves(board, player_id)
+        else:
+            legal_moves = list(cls.iter_player_legal_moves(board, player_id))
+        if Profiler.active is not None:
+            Profiler.active.record_legal_moves('MoveGenerator', legal_moves)
+        return legal_moves
+
+    @classmethod
+    def _piece_directions(cls, board: Board, player_id: int) -> list:
+        # (square index, directions) of every piece of player_id, in get_player_legal_moves order
+        pieces = []
+        for square in board.get_player_pieces_location(player_id):
+            piece_type, _ = board.get_location(square)
+            pieces.append((square_to_index(square), MoveTables.PIECE_DIRECTIONS[(piece_type, board.orientation)]))
+        return pieces
+
+    @classmethod
+    def iter_player_legal_moves(cls, board: Board, player_id: int) -> Iterator[List[Move]]:
+        # The lines of get_player_legal_moves in the same order, generated as they are asked for. Every capture
+        # comes before any step is looked at, steps are never generated once a capture was found.
+        # The board must not change while iterating.
+        owners = board.get_owners()
+        pieces = cls._piece_directions(board, player_id)
+        captured = False
+        for index, directions in pieces:
+            for line in cls.iter_captures(owners, index, player_id, directions):
+                captured = True
+                yield line
+        if captured:
+            return
+        for index, directions in pieces:
+            for direction in directions:
+                target = MoveTables.NEIGHBORS[index][direction]
+                if target >= 0 and owners[target] == cls.NULL_PLAYER:
+                    yield [MoveTables.STEPS[index][direction]]
+
+    @classmethod
+    def has_any_legal_move(cls, board: Board, player_id: int) -> bool:
+        # Stops at the first step or first hop found, no line is built
+        if isinstance(board, BitBoard):
+            steps, jumps = cls.get_bitboard_movers(board, player_id)
+            return any(steps) or any(jumps)
+        owners = board.get_owners()
+        for index, directions in cls._piece_directions(board, player_id):
+            for direction in directions:
+                target = MoveTables.NEIGHBORS[index][direction]
+                if target < 0:
+                    continue
+                if owners[target] == cls.NULL_PLAYER:
+                    return True
+                landing = MoveTables.JUMPS[index][direction]
+                if landing >= 0 and owners[landing] == cls.NULL_PLAYER and owners[target] != player_id:
+                    return True
+        return False
+
+    @classmethod
+    def count_legal_moves(cls, board: Board, player_id: int, limit: int = None) -> int:
+        # len(get_player_legal_moves), counting stops once limit lines were found
+        if isinstance(board, BitBoard):
+            return cls.count_bitboard_legal_moves(board, player_id, limit)
+        return sum(1 for _ in itertools.islice(cls.iter_player_legal_moves(board, player_id), limit))
+
+    @classmethod
+    def get_cached_player_legal_moves(cls, board: Board, player_id: int,
+                                      table: TranspositionTable) -> List[List[Move]]:
+        key = (board.zobrist_hash, player_id)
+        legal_moves = table.get(key)
+        if legal_moves is None:
+            legal_moves = cls.get_player_legal_moves(board, player_id)
+            table.put(key, legal_moves)
+        return legal_moves
+
+    # BitBoard positions are generated bit-parallel: a few shifts and masks per direction find every piece able to
+    # step or to jump that way, lines are only built for those pieces. Pieces are visited in index order, the order
+    # of BitBoard.get_player_pieces_location, so the lines come out as get_player_legal_moves builds them.
+
+    @classmethod
+    def get_bitboard_movers(cls, board: BitBoard, player_id: int) -> (list, list):
+        # Per direction, the pieces of player_id with an empty neighbor that way and those able to jump that way
+        pieces = board.pieces[player_id]
+        opponent = board.pieces[player_id ^ 1]
+        kings = pieces & board.kings
+        empty = ~(pieces | opponent) & ALL_SQUARES_MASK
+        man_directions = MoveTables.PIECE_DIRECTIONS[(PieceType.man, board.orientation)]
+        steps, jumps = [], []
+        for direction, right, left, squares, right2, left2, squares2, jump_right, jump_left, landings \
+                in MoveTables.DIRECTION_SHIFTS:
+            movers = pieces if direction in man_directions else kings
+            steps.append(movers & ((empty >> right << left) & squares | (empty >> right2 << left2) & squares2))
+            jumps.append(movers & ((opponent >> right << left) & squares | (opponent >> right2 << left2) & squares2)
+                         & (empty >> jump_right << jump_left) & landings)
+        return steps, jumps
+
+    @classmethod
+    def get_bitboard_legal_moves(cls, board: BitBoard, player_id: int) -> List[List[Move]]:
+        steps, jumps = cls.get_bitboard_movers(board, player_id)
+        legal_moves = []
+        jumpers = jumps[0] | jumps[1] | jumps[2] | jumps[3]
+        if jumpers:
+            opponent = board.pieces[player_id ^ 1]
+            empty = ~(board.pieces[player_id] | opponent) & ALL_SQUARES_MASK
+            while jumpers:
+                bit = jumpers & -jumpers
+                jumpers ^= bit
+                directions = tuple(d for d in MoveTables.ALL_DIRECTIONS if jumps[d] & bit)
+                legal_moves += cls.get_bitboard_captures(opponent, empty, bit.bit_length() - 1, directions)
+            return legal_moves
+        steppers = steps[0] | steps[1] | steps[2] | steps[3]
+        while steppers:
+            bit = steppers & -steppers
+            steppers ^= bit
+            piece_steps = MoveTables.STEPS[bit.bit_length() - 1]
+            for direction in MoveTables.ALL_DIRECTIONS:
+                if steps[direction] & bit:
+                    legal_moves.append([piece_steps[direction]])
+        return legal_moves
+
+    @classmethod
+    def count_bitboard_legal_moves(cls, board: BitBoard, player_id: int, limit: int = None) -> int:
+        steps, jumps = cls.get_bitboard_movers(board, player_id)
+        jumpers = jumps[0] | jumps[1] | jumps[2] | jumps[3]
+        if not jumpers:
+            count = sum(mask.bit_count() for mask in steps)
+            return count if limit is None else min(count, limit)
+        opponent = board.pieces[player_id ^ 1]
+        empty = ~(board.pieces[player_id] | opponent) & ALL_SQUARES_MASK
+        count = 0
+        while jumpers:
+            bit = jumpers & -jumpers
+            jumpers ^= bit
+            directions = tuple(d for d in MoveTables.ALL_DIRECTIONS if jumps[d] & bit)
+            count += cls.count_bitboard_captures(opponent, empty, bit.bit_length() - 1, directions)
+            if limit is not None and count >= limit:
+                return limit
+        return count
+
+    @classmethod
+    def get_bitboard_captures(cls, opponent: int, empty: int, index: int, directions: tuple) -> List[List[Move]]:
+        return list(cls.iter_bitboard_captures(opponent, empty, index, directions))
+
+    @classmethod
+    def count_bitboard_captures(cls, opponent: int, empty: int, index: int, directions: tuple) -> int:
+        return sum(1 for _ in cls.iter_bitboard_captures(opponent, empty, index, directions))
+
+    @classmethod
+    def iter_bitboard_captures(cls, opponent: int, empty: int, index: int, directions: tuple) -> Iterator[List[Move]]:
+        # iter_captures on masks, a hop flips the bits of the start, jumped and landing squares
+        squares = MoveTables.SQUARES
+        for direction in directions:
+            landing = MoveTables.JUMPS[index][direction]
+            if landing < 0 or not empty >> landing & 1:
+                continue
+            jumped = MoveTables.NEIGHBORS[index][direction]
+            if not opponent >> jumped & 1:
+                continue
+            hop = [Move(squares[index], squares[jumped]), Move(squares[jumped], squares[landing])]
+            continued = False
+            for line in cls.iter_bitboard_captures(opponent ^ 1 << jumped,
+                                                   empty ^ (1 << index | 1 << jumped | 1 << landing),
+                                                   landing, MoveTables.ALL_DIRECTIONS):
+                continued = True
+                yield hop + line
+            if not continued:
+                yield hop
+
+    # get_steps and get_captures add every square index whose owner they looked at to reads, when given
+
+    @classmethod
+    def get_steps(cls, owners: list, index: int, directions: tuple, reads: set = None) -> List[List[Move]]:
+        steps = []
+        for direction in directions:
+            target = MoveTables.NEIGHBORS[index][direction]
+            if target < 0:
+                continue
+            if reads is not None:
+                reads.add(target)
+            if owners[target] == cls.NULL_PLAYER:
+                steps.append([MoveTables.STEPS[index][direction]])
+        return steps
+
+    @classmethod
+    def get_captures(cls, owners: list, index: int, player_id: int, directions: tuple,
+                     reads: set = None) -> List[List[Move]]:
+        return list(cls.iter_captures(owners, index, player_id, directions, reads))
+
+    @classmethod
+    def count_captures(cls, owners: list, index: int, player_id: int, directions: tuple) -> int:
+        return sum(1 for _ in cls.iter_captures(owners, index, player_id, directions))
+
+    @classmethod
+    def iter_captures(cls, owners: list, index: int, player_id: int, directions: tuple,
+                      reads: set = None) -> Iterator[List[Move]]:
+        # get_captures and count_captures are built on it, iter_bitboard_captures is the same walk on masks
+        squares = MoveTables.SQUARES
+        for direction in directions:
+            landing = MoveTables.JUMPS[index][direction]
+            if landing < 0:
+                continue
+            jumped = MoveTables.NEIGHBORS[index][direction]
+            if reads is not None:
+                reads.add(landing)
+                reads.add(jumped)
+            if owners[landing] != cls.NULL_PLAYER:
+                continue
+            victim = owners[jumped]
+            if victim == cls.NULL_PLAYER or victim == player_id:
+                continue
+            hop = [Move(squares[index], squares[jumped]), Move(squares[jumped], squares[landing])]
+            # make the hop, a continuing capture may go in any direction
+            owners[index], owners[jumped], owners[landing] = cls.NULL_PLAYER, cls.NULL_PLAYER, player_id
+            continued = False
+            for line in cls.iter_captures(owners, landing, player_id, MoveTables.ALL_DIRECTIONS, reads):
+                continued = True
+                yield hop + line
+            # unmake it
+            owners[index], owners[jumped], owners[landing] = player_id, victim, cls.NULL_PLAYER
+            if not continued:
+                yield hop
+
+
+class IncrementalMoveGenerator:
+    # Legal move lists kept per piece between plies, owned by a single Match. Every piece entry remembers a bit
+    # mask of the squares its lines depend on, after a line is played only the pieces depending on one of its
+    # squares are regenerated. Entries are kept per (player, orientation) since a man's directions depend on
+    # orientation. With debug set every answer is checked against a full regeneration.
+    def __init__(self, debug: bool = False):
+        self.debug = debug
+        # (player, orientation) -> piece index -> (captures, steps, reads mask)
+        self.entries = {}
+        # (player, orientation) -> mask of the squares changed since the entries were last used
+        self.dirty = {}
+        # Owner of every playable square, kept up to date by invalidate_line
+        self.owners = None
+        self.regenerated = 0
+
+    def reset(self):
+        self.entries.clear()
+        self.dirty.clear()
+        self.owners = None
+
+    def invalidate_line(self, line: List[Move]):
+        # Must be called with every line played on the board once the board has been passed in
+        owners = self.owners
+        start = square_to_index(line[0].from_square)
+        changed = 1 << start
+        for move in line:
+            index = square_to_index(move.to_square)
+            changed |= 1 << index
+            if owners is not None:
+                owners[index], owners[start] = owners[start], MoveGenerator.NULL_PLAYER
+                start = index
+        for key in self.dirty:
+            self.dirty[key] |= changed
+
+    def _piece_entry(self, board: Board, owners: list, index: int, player_id: int) -> tuple:
+        piece_type, _ = board.get_location(MoveTables.SQUARES[index])
+        directions = MoveTables.PIECE_DIRECTIONS[(piece_type, board.orientation)]
+        squares = set()
+        captures = MoveGenerator.get_captures(owners, index, player_id, directions, squares)
+        steps = MoveGenerator.get_steps(owners, index, directions)
+        reads = MoveTables.READS[index][directions]
+        if captures:
+            # Continuing jumps read squares further away than the steps and first jumps
+            for square in squares:
+                reads |= 1 << square
+        self.regenerated += 1
+        if Profiler.active is not None:
+            Profiler.active.count('IncrementalMoveGenerator.regenerated')
+        return captures, steps, reads
+
+    def get_player_legal_moves(self, board: Board, player_id: int) -> List[List[Move]]:
+        key = (player_id, board.orientation)
+        entries = self.entries.get(key)
+        if entries is None:
+            entries = self.entries[key] = {}
+        dirty = self.dirty.get(key, 0)
+        if dirty:
+            for index in [index for index, entry in entries.items() if entry[2] & dirty]:
+                del entries[index]
+        self.dirty[key] = 0
+        owners = self.owners
+        if owners is None:
+            owners = self.owners = board.get_owners()
+        steps = []
+        captures = []
+        for square in board.get_player_pieces_location(player_id):
+            index = square_to_index(square)
+            entry = entries.get(index)
+            if entry is None:
+                entry = entries[index] = self._piece_entry(board, owners, index, player_id)
+            captures += entry[0]
+            if not captures:
+                steps += entry[1]
+        legal_moves = captures or steps
+        if Profiler.active is not None:
+            Profiler.active.record_legal_moves('IncrementalMoveGenerator', legal_moves)
+        if self.debug:
+            assert owners == board.get_owners(), 'a line was played without calling invalidate_line'
+            assert legal_moves == MoveGenerator.get_player_legal_moves(board, player_id), \
+                f'incremental legal moves diverged for player {player_id} on\n{board}'
+        return legal_moves
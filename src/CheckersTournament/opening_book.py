@@ -0,0 +1,156 @@
+import hashlib
+import random
+import struct
+from typing import List
+
+import numpy as np
+
+from game_elements.board import Board, Move
+from game_elements.piece import DRAW
+from game_record import GameRecordReader, encode_line
+from move_generator import MoveGenerator
+
+# File layout: FILE_HEADER | u32 number of entries n, padded to DATA_ALIGNMENT, then three arrays of n entries:
+#   u64 position (zobrist hash, which covers the player to move) | u64 line key | u32 x 3 games, wins, draws
+# Entries are sorted by position so the lines of a position are found with a binary search on the memory
+# mapped positions. Wins and draws are counted for the player playing the line.
+FILE_HEADER = b'CKOB\x01'
+ENTRY_COUNT = struct.Struct('<I')
+DATA_ALIGNMENT = 64
+GAMES, WINS, DRAWS = 0, 1, 2
+
+
+def line_key(line: List[Move]) -> int:
+    # Lines are told apart by their squares, any two legal lines of a position get different keys
+    return int.from_bytes(hashlib.blake2b(encode_line(line), digest_size=8).digest(), 'little')
+
+
+def collect_statistics(record_paths: List[str], max_plies: int = 16) -> dict:
+    # (position, line key) -> [games, wins, draws] over the first max_plies plies of every recorded game
+    statistics = {}
+    board = Board()
+    for path in record_paths:
+        with GameRecordReader(path) as reader:
+            for record in reader:
+                board.reset()
+                for ply, line in enumerate(record.lines[:max_plies]):
+                    stats = statistics.setdefault((board.zobrist_hash, line_key(line)), [0, 0, 0])
+                    stats[GAMES] += 1
+                    if record.result == DRAW:
+                        stats[DRAWS] += 1
+                    elif record.result == ply % 2:
+                        stats[WINS] += 1
+                    board.run_moves(line)
+                    board.rotate()
+    return statistics
+
+
+def write_opening_book(path: str, statistics: dict, min_games: int = 1):
+    entries = sorted((key, stats) for key, stats in statistics.items() if stats[GAMES] >= min_games)
+    positions = np.array([position for (position, _), _ in entries], dtype='<u8')
+    lines = np.array([line for (_, line), _ in entries], dtype='<u8')
+    stats = np.array([stats for _, stats in entries], dtype='<u4').reshape(len(entries), 3)
+    header = FILE_HEADER + ENTRY_COUNT.pack(len(entries))
+    with open(path, 'wb') as f:
+        f.write(header + bytes(-len(header) % DATA_ALIGNMENT))
+        for array in (positions, lines, stats):
+            f.write(array.tobytes())
+
+
+def build_opening_book(path: str, record_paths: List[str], max_plies: int = 16, min_games: int = 1):
+    write_opening_book(path, collect_statistics(record_paths, max_plies), min_games)
+
+
+class OpeningBook:
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            if f.read(len(FILE_HEADER)) != FILE_HEADER:
+                raise ValueError(f'{path} is not an opening book file')
+            (size, ) = ENTRY_COUNT.unpack(f.read(ENTRY_COUNT.size))
+        offset = len(FILE_HEADER) + ENTRY_COUNT.size
+        offset += -offset % DATA_ALIGNMENT
+        self.size = size
+        if size == 0:
+            self.positions = np.zeros(0, dtype='<u8')
+            self.lines = np.zeros(0, dtype='<u8')
+            self.stats = np.zeros((0, 3), dtype='<u4')
+            return
+        self.positions = np.memmap(path, dtype='<u8', mode='r', offset=offset, shape=(size, ))
+        self.lines = np.memmap(path, dtype='<u8', mode='r', offset=offset + 8 * size, shape=(size, ))
+        self.stats = np.memmap(path, dtype='<u4', mode='r', offset=offset + 16 * size, shape=(size, 3))
+
+    def __len__(self):
+        return self.size
+
+    def get_lines(self, board: Board) -> dict:
+        # line key -> (games, wins, draws) of every line played from the position
+        position = np.uint64(board.zobrist_hash)
+        start = int(np.searchsorted(self.positions, position, 'left'))
+        end = int(np.searchsorted(self.positions, position, 'right'))
+        return {int(key): tuple(int(value) for value in stats)
+                for key, stats in zip(self.lines[start:end], self.stats[start:end])}
+
+    def get_book_lines(self, board: Board, legal_moves: List[List[Move]], min_games: int = 1) -> list:
+        # [(line, (games, wins, draws))] for the legal lines played at least min_games times. An empty list is a
+        # book exit: the position was not played often enough to be trusted and the strategy takes over.
+        book = self.get_lines(board)
+        if not book:
+            return []
+        book_lines = []
+        for line in legal_moves:
+            stats = book.get(line_key(line))
+            if stats is not None and stats[GAMES] >= min_games:
+                book_lines.append((line, stats))
+        return book_lines
+
+    def best_move(self, board: Board, legal_moves: List[List[Move]], min_games: int = 1):
+        # The line scoring best (a draw is half a win) for the player to move, None out of book
+        best_line, best_score = None, None
+        for line, (games, wins, draws) in self.get_book_lines(board, legal_moves, min_games):
+            score = ((wins + draws / 2) / games, games)
+            if best_score is None or score > best_score:
+                best_line, best_score = line, score
+        return best_line
+
+    def random_move(self, board: Board, legal_moves: List[List[Move]], rng: random.Random = random,
+                    min_games: int = 1):
+        # A line picked with the odds it was played with, None out of book
+        book_lines = self.get_book_lines(board, legal_moves, min_games)
+        if not book_lines:
+            return None
+        return rng.choices([line for line, _ in book_lines], [stats[GAMES] for _, stats in book_lines])[0]
+
+
+def random_opening(plies: int, seed=None, book: OpeningBook = None, min_games: int = 1) -> List[List[Move]]:
+    # The first plies lines of a game, picked from the book with the odds they were played with, or random legal
+    # lines without a book. The opening is cut short at a book exit, where the strategies take over.
+    rng = random.Random(seed)
+    board = Board()
+    opening = []
+    for ply in range(plies):
+        legal_moves = MoveGenerator.get_player_legal_moves(board, ply % 2)
+        if not legal_moves:
+            break
+        if book is None:
+            line = rng.choice(legal_moves)
+        else:
+            line = book.random_move(board, legal_moves, rng, min_games)
+            if line is None:
+                break
+        opening.append(line)
+        board.run_moves(line)
+        board.rotate()
+    return opening
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Build an opening book from game record files')
+    parser.add_argument('path')
+    parser.add_argument('records', nargs='+')
+    parser.add_argument('--max-plies', type=int, default=16, help='plies of every game that go in the book')
+    parser.add_argument('--min-games', type=int, default=1, help='leave out lines played fewer times')
+    args = parser.parse_args()
+    build_opening_book(args.path, args.records, args.max_plies, args.min_games)
+    print(f'{len(OpeningBook(args.path))} book entries written to {args.path}')
@@ -0,0 +1,84 @@
+from typing import List
+
+from game_elements.board import Board, Move
+from game_elements.piece import PlayerId
+from move_generator import MoveGenerator
+from transposition_table import TranspositionTable
+
+
+def line_to_str(line: List[Move]) -> str:
+    # Start square followed by the square every hop lands on, e.g. 2,2-4,4-2,6
+    hops = line[1::2] if len(line) > 1 else line
+    squares = [line[0].from_square] + [move.to_square for move in hops]
+    return '-'.join(f'{square.row},{square.col}' for square in squares)
+
+
+def perft(board: Board, player_id: int, depth: int, move_generator=MoveGenerator,
+          cache: TranspositionTable = None) -> int:
+    # Counts the move paths of the given length. The board must be oriented for player_id and is
+    # left unchanged. GameMechanics can be passed as move_generator to validate the rules.
+    if depth == 0:
+        return 1
+    if cache is not None:
+        key = (board.zobrist_hash, player_id, depth)
+        nodes = cache.get(key)
+        if nodes is not None:
+            return nodes
+    if depth == 1:
+        # Leaves are counted without building their lines
+        nodes = move_generator.count_legal_moves(board, player_id)
+    else:
+        nodes = 0
+        for line in move_generator.get_player_legal_moves(board, player_id):
+            undo = board.make_move(line)
+            nodes += perft(board, player_id ^ 1, depth - 1, move_generator, cache)
+            board.unmake_move(undo)
+    if cache is not None:
+        cache.put(key, nodes)
+    return nodes
+
+
+def perft_divide(board: Board, player_id: int, depth: int, move_generator=MoveGenerator,
+                 cache: TranspositionTable = None) -> dict:
+    assert depth > 0
+    divide = {}
+    for line in move_generator.get_player_legal_moves(board, player_id):
+        undo = board.make_move(line)
+        divide[line_to_str(line)] = perft(board, player_id ^ 1, depth - 1, move_generator, cache)
+        board.unmake_move(undo)
+    return divide
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+    from game import GameMechanics
+
+    parser = argparse.ArgumentParser(description='Count move paths from a position')
+    parser.add_argument('depth', type=int)
+    parser.add_argument('--board', help='file holding a board as printed by Board.__str__')
+    parser.add_argument('--player', type=int, default=PlayerId.white.value)
+    parser.add_argument('--divide', action='store_true', help='break the count down per root move')
+    parser.add_argument('--cache-size', type=int, default=0)
+    parser.add_argument('--reference', action='store_true', help='use GameMechanics to generate moves')
+    args = parser.parse_args()
+
+    if args.board:
+        with open(args.board) as f:
+            board = Board.load_from_str(f.read())
+    else:
+        board = Board()
+    if args.player == PlayerId.black.value:
+        board.rotate()
+    generator = GameMechanics if args.reference else MoveGenerator
+    cache = TranspositionTable(args.cache_size) if args.cache_size else None
+    start = time.perf_counter()
+    if args.divide:
+        divide = perft_divide(board, args.player, args.depth, generator, cache)
+        for line, nodes in sorted(divide.items()):
+            print(f'{line}: {nodes}')
+        total = sum(divide.values())
+    else:
+        total = perft(board, args.player, args.depth, generator, cache)
+    elapsed = time.perf_counter() - start
+    print(f'nodes {total} in {elapsed:.3f}s ({total / elapsed:,.0f} nodes/sec)')
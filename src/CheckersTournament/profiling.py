@@ -0,0 +1,115 @@
+import json
+import time
+from contextlib import contextmanager
+from typing import List
+
+from game_elements.board import Move
+
+STACK_SEPARATOR = ';'
+
+
+class Profiler:
+    # The profiler engine code reports to, None while profiling is off so the hot paths only pay for one check.
+    # Entering a profiler makes it the active one until exit.
+    active = None
+
+    def __init__(self):
+        self.counters = {}
+        # name -> {value: count}
+        self.histograms = {}
+        # frames joined by STACK_SEPARATOR -> [seconds, calls], a stack's time includes its children
+        self.timers = {}
+        self._previous = []
+
+    def __enter__(self):
+        self._previous.append(Profiler.active)
+        Profiler.active = self
+        return self
+
+    def __exit__(self, *exc_info):
+        Profiler.active = self._previous.pop()
+
+    def count(self, name: str, amount: int = 1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: int):
+        histogram = self.histograms.setdefault(name, {})
+        histogram[value] = histogram.get(value, 0) + 1
+
+    def add_time(self, stack: str, seconds: float, calls: int = 1):
+        timer = self.timers.get(stack)
+        if timer is None:
+            self.timers[stack] = [seconds, calls]
+        else:
+            timer[0] += seconds
+            timer[1] += calls
+
+    @contextmanager
+    def timer(self, stack: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stack, time.perf_counter() - start)
+
+    def record_legal_moves(self, generator: str, legal_moves: List[List[Move]]):
+        self.count(f'{generator}.get_player_legal_moves')
+        # Every hop of a capture line is one level of capture recursion
+        for line in legal_moves:
+            if len(line) < 2:
+                break
+            self.observe('capture_depth', len(line) // 2)
+
+    def merge(self, other: 'Profiler'):
+        for name, amount in other.counters.items():
+            self.count(name, amount)
+        for name, histogram in other.histograms.items():
+            own = self.histograms.setdefault(name, {})
+            for value, amount in histogram.items():
+                own[value] = own.get(value, 0) + amount
+        for stack, (seconds, calls) in other.timers.items():
+            self.add_time(stack, seconds, calls)
+
+    def to_dict(self) -> dict:
+        return {
+            'counters': dict(self.counters),
+            'histograms': {name: {str(value): amount for value, amount in sorted(histogram.items())}
+                           for name, histogram in self.histograms.items()},
+            'timers': {stack: {'seconds': seconds, 'calls': calls}
+                       for stack, (seconds, calls) in self.timers.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'Profiler':
+        profiler = cls()
+        profiler.counters = dict(data['counters'])
+        profiler.histograms = {name: {int(value): amount for value, amount in histogram.items()}
+                               for name, histogram in data['histograms'].items()}
+        profiler.timers = {stack: [timer['seconds'], timer['calls']] for stack, timer in data['timers'].items()}
+        return profiler
+
+    def collapsed_stacks(self, root: str = None) -> List[str]:
+        # Lines of "frame;frame microseconds" with the time spent in each stack itself, as flamegraph.pl expects
+        self_times = {stack: seconds for stack, (seconds, _) in self.timers.items()}
+        for stack, (seconds, _) in self.timers.items():
+            parent = stack.rpartition(STACK_SEPARATOR)[0]
+            if parent in self_times:
+                self_times[parent] -= seconds
+        lines = []
+        for stack, seconds in sorted(self_times.items()):
+            if root is not None:
+                stack = root + STACK_SEPARATOR + stack
+            lines.append(f'{stack} {max(round(seconds * 1e6), 0)}')
+        return lines
+
+
+def write_profiles(profiles: dict, json_path: str = None, stacks_path: str = None):
+    # profiles maps a name (a strategy pairing in tournaments) to its Profiler
+    if json_path is not None:
+        with open(json_path, 'w') as f:
+            json.dump({name: profiler.to_dict() for name, profiler in profiles.items()}, f, indent=2)
+    if stacks_path is not None:
+        with open(stacks_path, 'w') as f:
+            for name, profiler in profiles.items():
+                for line in profiler.collapsed_stacks(name):
+                    f.write(line + '\n')
@@ -0,0 +1,139 @@
+import hashlib
+import inspect
+import json
+import sqlite3
+import sys
+import time
+from functools import lru_cache
+from typing import List
+
+SCHEMA_VERSION = 1
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS games (
+    key TEXT PRIMARY KEY,
+    white TEXT NOT NULL,
+    black TEXT NOT NULL,
+    game_index INTEGER NOT NULL,
+    winner INTEGER NOT NULL,
+    record BLOB,
+    profile TEXT,
+    played_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pairings (
+    white TEXT NOT NULL,
+    black TEXT NOT NULL,
+    white_fingerprint TEXT NOT NULL,
+    black_fingerprint TEXT NOT NULL,
+    games INTEGER NOT NULL,
+    white_wins INTEGER NOT NULL,
+    draws INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (white, black)
+);
+'''
+# SQLite limits the number of parameters of a statement
+MAX_PARAMETERS = 500
+
+
+@lru_cache(maxsize=None)
+def strategy_fingerprint(strategy) -> str:
+    # Hash of the source of every module the strategy class and its base classes are defined in, so editing a
+    # strategy, or a helper next to it, changes its fingerprint
+    digest = hashlib.sha1(strategy.__qualname__.encode())
+    for cls in strategy.__mro__:
+        module = sys.modules.get(cls.__module__)
+        if cls is object or module is None:
+            continue
+        try:
+            digest.update(inspect.getsource(module).encode())
+        except (OSError, TypeError):
+            digest.update(cls.__module__.encode())
+    return digest.hexdigest()
+
+
+def _describe(value):
+    # JSON friendly description of a setting, objects like TimeControl are described by their attributes
+    if hasattr(value, '__dict__'):
+        return [type(value).__name__, {name: _describe(v) for name, v in sorted(vars(value).items())}]
+    return value
+
+
+def game_key(white, black, game_index: int, *settings) -> str:
+    # Identifies a game by both strategies' fingerprints and everything it was played with, a game stored under
+    # the same key would be played exactly the same again
+    description = [white.__name__, strategy_fingerprint(white), black.__name__, strategy_fingerprint(black),
+                   game_index, [_describe(setting) for setting in settings]]
+    return hashlib.sha1(json.dumps(description, default=repr).encode()).hexdigest()
+
+
+class ResultStore:
+    # Every finished game of a tournament, kept in SQLite so a killed run resumes where it stopped and a run with
+    # one strategy changed only plays the pairings of that strategy again. Games are written in batches, in a
+    # transaction, once batch_size games are waiting or flush_interval seconds went by.
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 5.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.connection = sqlite3.connect(path)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('PRAGMA synchronous=NORMAL')
+        (version, ) = self.connection.execute('PRAGMA user_version').fetchone()
+        if version not in (0, SCHEMA_VERSION):
+            raise ValueError(f'{path} has result store schema {version}, expected {SCHEMA_VERSION}')
+        with self.connection:
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(f'PRAGMA user_version={SCHEMA_VERSION}')
+        self.pending = []
+        self.last_flush = time.monotonic()
+
+    def load(self, keys: List[str]) -> dict:
+        # key -> (winner, record, profile) of the stored games among keys
+        games = {}
+        for start in range(0, len(keys), MAX_PARAMETERS):
+            chunk = keys[start:start + MAX_PARAMETERS]
+            rows = self.connection.execute(
+                f'SELECT key, winner, record, profile FROM games WHERE key IN ({",".join("?" * len(chunk))})', chunk)
+            for key, winner, record, profile in rows:
+                games[key] = (winner, record, None if profile is None else json.loads(profile))
+        return games
+
+    def add_game(self, key: str, white: str, black: str, game_index: int, winner: int, record: bytes = None,
+                 profile: dict = None):
+        self.pending.append((key, white, black, game_index, winner, record,
+                             None if profile is None else json.dumps(profile), time.time()))
+        if len(self.pending) >= self.batch_size or time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def add_pairing(self, white, black, games: int, white_wins: int, draws: int):
+        # white and black are strategy classes, the pairing row is replaced on every run
+        self.flush()
+        with self.connection:
+            self.connection.execute('INSERT OR REPLACE INTO pairings VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                    (white.__name__, black.__name__, strategy_fingerprint(white),
+                                     strategy_fingerprint(black), games, white_wins, draws, time.time()))
+
+    def get_pairings(self) -> dict:
+        # (white, black) -> (games, white wins, draws) of the last run of every pairing
+        rows = self.connection.execute('SELECT white, black, games, white_wins, draws FROM pairings')
+        return {(white, black): (games, white_wins, draws) for white, black, games, white_wins, draws in rows}
+
+    def flush(self):
+        if self.pending:
+            with self.connection:
+                self.connection.executemany('INSERT OR REPLACE INTO games VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                            self.pending)
+            self.pending = []
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        if self.connection is None:
+            return
+        self.flush()
+        self.connection.close()
+        self.connection = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
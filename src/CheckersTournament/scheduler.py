@@ -0,0 +1,182 @@
+import math
+from typing import List
+
+import numpy as np
+
+from game_elements.piece import PlayerId, DRAW
+
+SPRT, WILSON = 'sprt', 'wilson'
+STOPPING_RULES = (SPRT, WILSON)
+ELO_SCALE = 400 / math.log(10)
+# 95% two sided
+Z_SCORE = 1.96
+WINS, DRAWS, LOSSES = 0, 1, 2
+
+
+def expected_score(elo: float) -> float:
+    return 1 / (1 + 10 ** (-elo / 400))
+
+
+def wilson_interval(points: float, games: int, z: float = Z_SCORE) -> tuple:
+    # Bounds of the expected score given points (a draw is half a point) out of games
+    if games == 0:
+        return 0.0, 1.0
+    p = points / games
+    denominator = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return center - margin, center + margin
+
+
+def sprt_bounds(alpha: float, beta: float) -> tuple:
+    # The test accepts H0 once the log likelihood ratio falls under the lower bound and H1 over the upper one
+    return math.log(beta / (1 - alpha)), math.log((1 - beta) / alpha)
+
+
+def sprt_llr(wins: int, draws: int, losses: int, elo0: float, elo1: float) -> float:
+    # Log likelihood ratio of H1 (the player is elo1 stronger) against H0 (elo0 stronger), in the normal
+    # approximation of the game outcomes. Half a win and half a loss are added so one sided results have a variance.
+    wins, losses = wins + 0.5, losses + 0.5
+    games = wins + draws + losses
+    score = (wins + draws / 2) / games
+    variance = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / games
+    score0, score1 = expected_score(elo0), expected_score(elo1)
+    return (score1 - score0) * (2 * score - score0 - score1) * games / (2 * variance)
+
+
+def fit_ratings(results: dict, num_of_players: int, prior_elo: float = 1000.0) -> tuple:
+    # Bradley-Terry Elo ratings (mean 0) and their 95% error bars from results[(a, b)] = [wins, draws, losses]
+    # of a against b, a draw counting half a win for both. A weak prior of prior_elo standard deviation keeps
+    # ratings finite when a player won or lost every game.
+    prior = (ELO_SCALE / prior_elo) ** 2
+    theta = np.zeros(num_of_players)
+    for _ in range(100):
+        gradient = -prior * theta
+        hessian = np.eye(num_of_players) * prior
+        for (a, b), (wins, draws, losses) in results.items():
+            games = wins + draws + losses
+            if games == 0:
+                continue
+            p = 1 / (1 + math.exp(theta[b] - theta[a]))
+            residual = wins + draws / 2 - games * p
+            gradient[a] += residual
+            gradient[b] -= residual
+            information = games * p * (1 - p)
+            hessian[a, a] += information
+            hessian[b, b] += information
+            hessian[a, b] -= information
+            hessian[b, a] -= information
+        step = np.linalg.solve(hessian, gradient)
+        theta += step
+        if np.abs(step).max() < 1e-9:
+            break
+    # Ratings are only known relative to each other, report them around their mean
+    centering = np.eye(num_of_players) - 1 / num_of_players
+    covariance = centering @ np.linalg.inv(hessian) @ centering
+    errors = Z_SCORE * ELO_SCALE * np.sqrt(np.clip(np.diag(covariance), 0, None))
+    return ELO_SCALE * (theta - theta.mean()), errors
+
+
+class AdaptiveScheduler:
+    # Plays a round robin in rounds of color swapped game pairs, a pairing being the two strategies regardless of
+    # color. A pairing stops once min_games were played and its result is settled:
+    #   sprt - a sequential probability ratio test finds either side elo1 stronger, or both within elo1 of each
+    #          other, with alpha and beta error rates
+    #   wilson - the Wilson interval of the score no longer holds 0.5
+    # or once it played max_pairing_games. Rounds go on while games are left out of budget, the most uncertain
+    # pairings (widest score interval) first, so games saved on lopsided pairings go to close ones.
+    def __init__(self, num_of_strategies: int, budget: int, min_games: int = 10, max_pairing_games: int = None,
+                 stopping: str = SPRT, elo1: float = 50.0, alpha: float = 0.05, beta: float = 0.05):
+        if stopping not in STOPPING_RULES:
+            raise ValueError(f'Unknown stopping rule {stopping}, expected one of {STOPPING_RULES}')
+        self.num_of_strategies = num_of_strategies
+        self.budget = budget
+        self.min_games = min_games
+        self.max_pairing_games = max_pairing_games if max_pairing_games is not None else budget
+        self.stopping = stopping
+        self.elo1 = elo1
+        self.bounds = sprt_bounds(alpha, beta)
+        self.pairings = [(a, b) for a in range(num_of_strategies) for b in range(a + 1, num_of_strategies)]
+        # (a, b) with a < b -> [wins, draws, losses] of a
+        self.results = {pairing: [0, 0, 0] for pairing in self.pairings}
+        # (white, black) -> [white wins, draws, games]
+        self.color_results = {}
+        # Game pairs handed out per pairing, every one is game index k with both colorings
+        self.scheduled = {pairing: 0 for pairing in self.pairings}
+        self.games_scheduled = 0
+
+    def get_games(self, pairing: tuple) -> int:
+        return sum(self.results[pairing])
+
+    def get_interval(self, pairing: tuple) -> tuple:
+        wins, draws, _ = self.results[pairing]
+        return wilson_interval(wins + draws / 2, self.get_games(pairing))
+
+    def get_verdict(self, pairing: tuple):
+        # 'first' or 'second' when that strategy was found stronger, 'close' when SPRT found them within elo1,
+        # None while the pairing is open
+        games = self.get_games(pairing)
+        if games < self.min_games:
+            return None
+        wins, draws, losses = self.results[pairing]
+        if self.stopping == WILSON:
+            low, high = self.get_interval(pairing)
+            return 'first' if low > 0.5 else 'second' if high < 0.5 else None
+        lower, upper = self.bounds
+        first = sprt_llr(wins, draws, losses, 0, self.elo1)
+        second = sprt_llr(losses, draws, wins, 0, self.elo1)
+        if first >= upper:
+            return 'first'
+        if second >= upper:
+            return 'second'
+        if first <= lower and second <= lower:
+            return 'close'
+        return None
+
+    def is_open(self, pairing: tuple) -> bool:
+        return 2 * self.scheduled[pairing] < self.max_pairing_games and self.get_verdict(pairing) is None
+
+    def next_round(self) -> List[tuple]:
+        # (white, black, game index) of the games of the next round, empty once the tournament is over
+        def uncertainty(pairing):
+            low, high = self.get_interval(pairing)
+            return -(high - low), self.scheduled[pairing], pairing
+
+        open_pairings = sorted((pairing for pairing in self.pairings if self.is_open(pairing)), key=uncertainty)
+        games = []
+        for a, b in open_pairings:
+            if self.games_scheduled + 2 > self.budget:
+                break
+            game_index = self.scheduled[(a, b)]
+            games += [(a, b, game_index), (b, a, game_index)]
+            self.scheduled[(a, b)] += 1
+            self.games_scheduled += 2
+        return games
+
+    def add_result(self, white: int, black: int, winner: int):
+        # winner is the index of the winning player in the match (0 for white), or DRAW
+        color = self.color_results.setdefault((white, black), [0, 0, 0])
+        color[2] += 1
+        if winner == DRAW:
+            color[1] += 1
+        elif winner == PlayerId.white.value:
+            color[0] += 1
+        pairing, first_is_white = ((white, black), True) if white < black else ((black, white), False)
+        if winner == DRAW:
+            outcome = DRAWS
+        else:
+            outcome = WINS if (winner == PlayerId.white.value) == first_is_white else LOSSES
+        self.results[pairing][outcome] += 1
+
+    def get_rates(self) -> tuple:
+        # White win and draw rates by white and black strategy index, -1 on the diagonal and for unplayed pairs
+        n = self.num_of_strategies
+        win_rates = [[-1] * n for _ in range(n)]
+        draw_rates = [[-1] * n for _ in range(n)]
+        for (white, black), (wins, draws, games) in self.color_results.items():
+            win_rates[white][black] = wins / games
+            draw_rates[white][black] = draws / games
+        return win_rates, draw_rates
+
+    def get_ratings(self) -> tuple:
+        return fit_ratings(self.results, self.num_of_strategies)
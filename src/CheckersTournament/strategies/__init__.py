@@ -1,9 +1,16 @@
-from .base_strategy import Strategy
+from .base_strategy import Strategy, PackedLines
 from .simple_strategies import StayBack, RandomStrategy, LongestLineStrategy, PushForward, \
     TowardEnemyCenter
+from .search_strategy import SearchStrategy, material_evaluation
+from .isolated_strategy import IsolatedStrategy
+from .linear_evaluation import LinearEvaluation, LinearEvaluationStrategy
+from .mcts_strategy import MCTSStrategy
+from .batch_strategies import BatchStrategy, BatchRandomStrategy, BatchLongestLineStrategy
 
 ALL_STRATEGIES = [RandomStrategy,
                   # StayBack,
                   # PushForward,
                   LongestLineStrategy,
-                  TowardEnemyCenter]
+                  TowardEnemyCenter,
+                  # SearchStrategy,
+                  ]
@@ -1,14 +1,41 @@
 import random
 from typing import List
-from collections import defaultdict
+
+import numpy as np
 
 from game_elements.board import Move, Board, Square
 
 
+class PackedLines:
+    # The legal lines of a position as parallel arrays, one entry per line in legal_moves order, for strategies
+    # scoring every line at once in rank_moves. captures is the number of pieces the line takes.
+    def __init__(self, legal_moves: List[List[Move]]):
+        self.legal_moves = legal_moves
+        squares = np.array([(line[0].from_square.row, line[0].from_square.col,
+                             line[-1].to_square.row, line[-1].to_square.col, len(line)) for line in legal_moves],
+                           dtype=np.int64).reshape(-1, 5)
+        self.from_row, self.from_col, self.to_row, self.to_col, self.length = squares.T
+        # A capture line holds a (start, jumped) (jumped, landing) pair of moves per hop
+        self.captures = np.where(self.length > 1, self.length // 2, 0)
+
+    def __len__(self):
+        return len(self.legal_moves)
+
+
 class Strategy:
     def __init__(self, player_id=None, **kwargs):
         self.player_id = player_id
         self.other_params = kwargs
+        # time.perf_counter() value the move has to be chosen by, set by Match when playing under a time control
+        self.deadline = None
+
+    @property
+    def name(self) -> str:
+        return self.__class__.__name__
+
+    def close(self):
+        # Called once a match is over, for strategies holding on to processes or files
+        pass
 
     @staticmethod
     def _get_start_end_squares(move: List[Move]) -> (Square, Square):
@@ -22,12 +49,50 @@ class Strategy:
     def analyze_board(self, board: Board) -> dict:
         pass
 
-    def choose_best_move(self, board: Board, legal_moves: List[List[Move]]) -> List[Move]:
-        d = defaultdict(list)
+    def rank_moves(self, board: Board, lines: PackedLines) -> np.ndarray:
+        # The rank of every line, in lines order. Strategies scoring one line at a time only implement rank_move.
         board_data = self.analyze_board(board) or dict()
-        for line in legal_moves:
-            d[self.rank_move(board, line, **board_data)].append(line)
-        best_rank = max(d.keys())
-        return random.choice(d[best_rank])
+        return np.array([self.rank_move(board, line, **board_data) for line in lines.legal_moves])
+
+    def rank_legal_moves(self, board: Board, legal_moves: List[List[Move]]) -> np.ndarray:
+        return self.rank_moves(board, PackedLines(legal_moves))
+
+    def get_tablebase_move(self, board: Board, legal_moves: List[List[Move]]):
+        # Pass a Tablebase as tablebase to play the positions it covers perfectly, None when it does not
+        tablebase = self.other_params.get('tablebase')
+        if tablebase is None:
+            return None
+        return tablebase.best_move(board, self.player_id, legal_moves)
+
+    def get_book_move(self, board: Board, legal_moves: List[List[Move]]):
+        # Pass an OpeningBook as opening_book to play its best scoring line while the position is in the book,
+        # lines played fewer than book_min_games times do not count. None once out of the book.
+        book = self.other_params.get('opening_book')
+        if book is None:
+            return None
+        return book.best_move(board, legal_moves, self.other_params.get('book_min_games', 1))
+
+    def choose_best_move(self, board: Board, legal_moves: List[List[Move]]) -> List[Move]:
+        tablebase_move = self.get_tablebase_move(board, legal_moves)
+        if tablebase_move is not None:
+            return tablebase_move
+        book_move = self.get_book_move(board, legal_moves)
+        if book_move is not None:
+            return book_move
+        # Pass a TranspositionTable as evaluation_cache to reuse the ranks of positions seen before
+        cache = self.other_params.get('evaluation_cache')
+        if cache is None:
+            ranks = self.rank_legal_moves(board, legal_moves)
+        else:
+            # Ranks are cached by line, the same position reached another way may list its lines in another order
+            key = (board.zobrist_hash, self.player_id)
+            cached = cache.get(key)
+            if cached is None:
+                ranks = self.rank_legal_moves(board, legal_moves)
+                cache.put(key, dict(zip(map(tuple, legal_moves), ranks.tolist())))
+            else:
+                ranks = np.array([cached[tuple(line)] for line in legal_moves])
+        best_lines = np.flatnonzero(ranks == ranks.max())
+        return legal_moves[random.choice(best_lines)]
 
 
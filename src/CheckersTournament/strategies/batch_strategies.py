@@ -0,0 +1,18 @@
+import numpy as np
+
+
+# Batched counterparts of the simple strategies for BatchSimulator. rank_lines scores every line of a
+# LineBatch at once, the simulator then plays the best scoring line of every game, breaking ties at random.
+class BatchStrategy:
+    def rank_lines(self, lines, player_id: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+class BatchRandomStrategy(BatchStrategy):
+    def rank_lines(self, lines, player_id):
+        return np.zeros(len(lines))
+
+
+class BatchLongestLineStrategy(BatchStrategy):
+    def rank_lines(self, lines, player_id):
+        return lines.length
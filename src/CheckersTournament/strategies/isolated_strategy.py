@@ -0,0 +1,78 @@
+import multiprocessing
+import random
+import time
+
+from time_control import MoveTimeout
+
+from .base_strategy import Strategy
+
+
+def _strategy_worker(connection, strategy_cls, player_id, params):
+    strategy = strategy_cls(player_id, **params)
+    while True:
+        try:
+            request = connection.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        board, legal_moves, seed, timeout = request
+        # Seeded by the parent so isolated games replay like in process ones
+        random.seed(seed)
+        strategy.deadline = None if timeout is None else time.perf_counter() + timeout
+        line = strategy.choose_best_move(board, legal_moves)
+        connection.send(legal_moves.index(line))
+
+
+class IsolatedStrategy(Strategy):
+    # Runs another strategy in a process of its own so a move overrunning its deadline can be pre-empted.
+    # other_params: wrapped_strategy - the strategy class to run, every other parameter is passed on to it.
+    # A pre-empted strategy raises MoveTimeout and is restarted, losing its state, on the next move.
+    def __init__(self, player_id=None, wrapped_strategy=None, **kwargs):
+        super().__init__(player_id, wrapped_strategy=wrapped_strategy, **kwargs)
+        assert wrapped_strategy is not None
+        self.strategy_cls = wrapped_strategy
+        self.strategy_params = kwargs
+        self.process = None
+        self.connection = None
+
+    @property
+    def name(self) -> str:
+        return self.strategy_cls.__name__
+
+    def start(self):
+        self.connection, worker_connection = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(
+            target=_strategy_worker, args=(worker_connection, self.strategy_cls, self.player_id,
+                                           self.strategy_params), daemon=True)
+        self.process.start()
+        worker_connection.close()
+
+    def close(self):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+        self.connection.close()
+        self.process = None
+        self.connection = None
+
+    def __del__(self):
+        self.close()
+
+    def choose_best_move(self, board, legal_moves):
+        if self.process is None:
+            self.start()
+        timeout = None if self.deadline is None else max(self.deadline - time.perf_counter(), 0.0)
+        self.connection.send((board, legal_moves, random.getrandbits(32), timeout))
+        if not self.connection.poll(timeout):
+            self.close()
+            raise MoveTimeout
+        try:
+            index = self.connection.recv()
+        except EOFError:
+            # The worker died, most likely because the wrapped strategy raised
+            self.close()
+            raise RuntimeError(f'{self.name} exited while choosing a move') from None
+        return legal_moves[index]
@@ -0,0 +1,73 @@
+import numpy as np
+
+from game_elements.board import Board, PLAYABLE_SQUARES
+from game_elements.piece import PlayerId, WHITE_MAN_CELL, BLACK_MAN_CELL, WHITE_KING_CELL, BLACK_KING_CELL
+
+from .search_strategy import SearchStrategy, MAN_VALUE, KING_VALUE
+
+# Every feature is counted for white and subtracted for black:
+#   man, king - pieces, advancement - rows a man went up from its first row, out of 6
+#   back_rank - men still on the first row, center - pieces on the 4 middle squares, edge - pieces on the side columns
+FEATURES = ('man', 'king', 'advancement', 'back_rank', 'center', 'edge')
+# material_evaluation, as a starting point
+DEFAULT_WEIGHTS = {'man': MAN_VALUE, 'king': KING_VALUE}
+CENTER_SQUARES = {(3, 3), (3, 5), (4, 2), (4, 4)}
+
+
+def _square_features(cell: int, row: int, col: int) -> list:
+    features = [0.0] * len(FEATURES)
+    if cell not in (WHITE_MAN_CELL, BLACK_MAN_CELL, WHITE_KING_CELL, BLACK_KING_CELL):
+        return features
+    white = cell in (WHITE_MAN_CELL, WHITE_KING_CELL)
+    # White men start on the low rows and go up, black men come down
+    advancement = row if white else Board.MAX_ROW - 1 - row
+    if cell in (WHITE_MAN_CELL, BLACK_MAN_CELL):
+        features[FEATURES.index('man')] = 1
+        features[FEATURES.index('advancement')] = advancement / (Board.MAX_ROW - 2)
+        features[FEATURES.index('back_rank')] = advancement == 0
+    else:
+        features[FEATURES.index('king')] = 1
+    features[FEATURES.index('center')] = (row, col) in CENTER_SQUARES
+    features[FEATURES.index('edge')] = col in (0, Board.MAX_COL - 1)
+    return [feature if white else -feature for feature in features]
+
+
+# Features of every cell code on every playable square, (cells, squares, features)
+FEATURE_TABLES = np.array([[_square_features(cell, square.row, square.col) for square in PLAYABLE_SQUARES]
+                           for cell in range(BLACK_KING_CELL + 1)])
+
+
+def position_features(cells: np.ndarray) -> np.ndarray:
+    # (positions, features) of (positions, 32) cell codes, as in training data
+    return FEATURE_TABLES[cells, np.arange(len(PLAYABLE_SQUARES))].sum(axis=1)
+
+
+def get_weights_vector(weights: dict) -> np.ndarray:
+    unknown = set(weights) - set(FEATURES)
+    if unknown:
+        raise ValueError(f'unknown features {sorted(unknown)}, expected some of {FEATURES}')
+    return np.array([float(weights.get(name, 0.0)) for name in FEATURES])
+
+
+class LinearEvaluation:
+    # Weighted sum of FEATURES from the point of view of player_id, an evaluation for SearchStrategy
+    def __init__(self, weights: dict):
+        self.weights = dict(weights)
+        # Score of every cell code on every playable square for white
+        self.scores = (FEATURE_TABLES @ get_weights_vector(weights)).tolist()
+
+    def __call__(self, board: Board, player_id: int) -> float:
+        scores = self.scores
+        score = 0.0
+        for owner in (PlayerId.white.value, PlayerId.black.value):
+            for square in board.get_player_pieces_location(owner):
+                score += scores[board.get_cell(square)][square.row * 4 + square.col // 2]
+        return score if player_id == PlayerId.white.value else -score
+
+
+class LinearEvaluationStrategy(SearchStrategy):
+    # SearchStrategy with a LinearEvaluation, other_params: weights - feature name -> weight, as tuner.py writes
+    # them. Every other SearchStrategy parameter applies too.
+    def __init__(self, player_id=None, **kwargs):
+        super().__init__(player_id, **kwargs)
+        self.evaluate = LinearEvaluation(kwargs.get('weights', DEFAULT_WEIGHTS))
@@ -0,0 +1,187 @@
+import math
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List
+
+from game_elements.board import Move, Board
+from game_elements.piece import DRAW
+from move_generator import MoveGenerator
+
+from .base_strategy import Strategy
+
+RANDOM_ROLLOUT, LONGEST_LINE_ROLLOUT = 'random', 'longest_line'
+ROLLOUT_POLICIES = (RANDOM_ROLLOUT, LONGEST_LINE_ROLLOUT)
+
+
+def rollout(board: Board, player_id: int, seed: int, policy: str = RANDOM_ROLLOUT, max_plies: int = 150) -> int:
+    # Plays the position out with the policy, player_id to move, and returns the winner or DRAW after max_plies.
+    # The board is played on, pass a snapshot.
+    rng = random.Random(seed)
+    for _ in range(max_plies):
+        legal_moves = MoveGenerator.get_player_legal_moves(board, player_id)
+        if not legal_moves:
+            return player_id ^ 1
+        if policy == LONGEST_LINE_ROLLOUT:
+            longest = max(len(line) for line in legal_moves)
+            legal_moves = [line for line in legal_moves if len(line) == longest]
+        board.make_move(rng.choice(legal_moves))
+        player_id ^= 1
+    return DRAW
+
+
+def _rollout_task(task: tuple) -> int:
+    return rollout(*task)
+
+
+class Node:
+    # A position of the tree, player_id is to move in it and line is what the other player played to reach it.
+    # wins are counted for the player who played line.
+    __slots__ = ('line', 'parent', 'player_id', 'key', 'children', 'untried', 'visits', 'wins', 'virtual_losses')
+
+    def __init__(self, line: List[Move], parent, player_id: int, key: int):
+        self.line = line
+        self.parent = parent
+        self.player_id = player_id
+        self.key = key
+        self.children = []
+        # Legal lines not expanded yet, None until the node is first selected
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.0
+        self.virtual_losses = 0
+
+    @property
+    def is_terminal(self) -> bool:
+        return self.untried == [] and not self.children
+
+
+class MCTSStrategy(Strategy):
+    # Monte Carlo tree search with UCT selection. Parameters (all optional, through other_params):
+    #   time_limit - wall clock seconds per move, max_nodes - simulations per move, the search also stops at the
+    #   deadline Match sets under a time control, whichever comes first
+    #   exploration - the UCT constant, rollout_policy - one of ROLLOUT_POLICIES, max_rollout_plies - rollouts
+    #   reaching it are draws
+    #   At least one of time_limit and max_nodes must be set, the deadline alone is only there under a time control
+    #   workers - processes running the rollouts, batch_size - leaves selected before their rollouts are run
+    #   (workers by default). Leaves of a batch are told apart with virtual losses.
+    # The tree is kept between moves, the search goes on from the node of the opponent's reply.
+    def __init__(self, player_id=None, **kwargs):
+        super().__init__(player_id, **kwargs)
+        self.time_limit = kwargs.get('time_limit', 0.1)
+        self.max_nodes = kwargs.get('max_nodes')
+        if self.time_limit is None and self.max_nodes is None:
+            raise ValueError('MCTSStrategy needs a time_limit or max_nodes, the search would never stop')
+        self.exploration = kwargs.get('exploration', math.sqrt(2))
+        self.rollout_policy = kwargs.get('rollout_policy', RANDOM_ROLLOUT)
+        if self.rollout_policy not in ROLLOUT_POLICIES:
+            raise ValueError(f'unknown rollout policy {self.rollout_policy}, expected one of {ROLLOUT_POLICIES}')
+        self.max_rollout_plies = kwargs.get('max_rollout_plies', 150)
+        self.workers = kwargs.get('workers', 1)
+        self.batch_size = kwargs.get('batch_size', self.workers)
+        self.executor = None
+        self.root = None
+        self.simulations = 0
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def get_root(self, board: Board, legal_moves: List[List[Move]]) -> Node:
+        # The node of this position two plies below the last root, or a new tree
+        if self.root is not None:
+            for child in self.root.children:
+                for grandchild in child.children:
+                    if grandchild.key == board.zobrist_hash and grandchild.untried is not None and \
+                            len(grandchild.children) + len(grandchild.untried) == len(legal_moves):
+                        grandchild.parent = None
+                        return grandchild
+        root = Node(None, None, self.player_id, board.zobrist_hash)
+        root.untried = random.sample(legal_moves, len(legal_moves))
+        return root
+
+    def uct(self, node: Node, log_visits: float) -> float:
+        visits = node.visits + node.virtual_losses
+        return node.wins / visits + self.exploration * math.sqrt(log_visits / visits)
+
+    def select(self, board: Board) -> (Node, list):
+        # Descends to a leaf, expanding the first untried line on the way, with the lines made on board
+        node = self.root
+        undos = []
+        while True:
+            if node.untried is None:
+                legal_moves = MoveGenerator.get_player_legal_moves(board, node.player_id)
+                node.untried = random.sample(legal_moves, len(legal_moves))
+            if node.untried:
+                line = node.untried.pop()
+                undos.append(board.make_move(line))
+                child = Node(line, node, node.player_id ^ 1, board.zobrist_hash)
+                node.children.append(child)
+                return child, undos
+            if not node.children:
+                return node, undos
+            log_visits = math.log(node.visits + node.virtual_losses)
+            node = max(node.children, key=lambda child: self.uct(child, log_visits))
+            undos.append(board.make_move(node.line))
+
+    @staticmethod
+    def backpropagate(node: Node, winner: int):
+        while node is not None:
+            node.virtual_losses -= 1
+            node.visits += 1
+            if winner == DRAW:
+                node.wins += 0.5
+            elif winner != node.player_id:
+                node.wins += 1
+            node = node.parent
+
+    def run_batch(self, board: Board) -> int:
+        leaves, tasks = [], []
+        for _ in range(self.batch_size):
+            leaf, undos = self.select(board)
+            # Counted as a loss for every player on the path until its rollout is back
+            node = leaf
+            while node is not None:
+                node.virtual_losses += 1
+                node = node.parent
+            leaves.append(leaf)
+            if not leaf.is_terminal:
+                tasks.append((board.snapshot(), leaf.player_id, random.getrandbits(32), self.rollout_policy,
+                              self.max_rollout_plies))
+            for undo in reversed(undos):
+                board.unmake_move(undo)
+        if self.workers > 1 and self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+        results = iter(map(_rollout_task, tasks) if self.executor is None else
+                       self.executor.map(_rollout_task, tasks))
+        for leaf in leaves:
+            # The player to move in a terminal position has no line left and lost
+            self.backpropagate(leaf, leaf.player_id ^ 1 if leaf.is_terminal else next(results))
+        return len(leaves)
+
+    def search(self, board: Board, legal_moves: List[List[Move]]) -> List[Move]:
+        self.root = self.get_root(board, legal_moves)
+        self.simulations = 0
+        deadline = self.deadline
+        if self.time_limit is not None:
+            time_limit_deadline = time.perf_counter() + self.time_limit
+            if deadline is None or time_limit_deadline < deadline:
+                deadline = time_limit_deadline
+        while self.max_nodes is None or self.simulations < self.max_nodes:
+            self.simulations += self.run_batch(board)
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+        best = max(self.root.children, key=lambda child: child.visits)
+        return legal_moves[legal_moves.index(best.line)]
+
+    def choose_best_move(self, board: Board, legal_moves: List[List[Move]]) -> List[Move]:
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        tablebase_move = self.get_tablebase_move(board, legal_moves)
+        if tablebase_move is not None:
+            return tablebase_move
+        book_move = self.get_book_move(board, legal_moves)
+        if book_move is not None:
+            return book_move
+        return self.search(board, legal_moves)
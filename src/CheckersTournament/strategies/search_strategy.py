@@ -0,0 +1,190 @@
+import random
+import time
+from collections import defaultdict
+from typing import List
+
+from game_elements.board import Move, Board
+from game_elements.piece import PieceType, PlayerId
+from move_generator import MoveGenerator
+from transposition_table import TranspositionTable
+
+from .base_strategy import Strategy
+
+MAN_VALUE = 1.0
+KING_VALUE = 1.5
+
+
+def material_evaluation(board: Board, player_id: int) -> float:
+    score = 0.0
+    for owner in (PlayerId.white.value, PlayerId.black.value):
+        sign = 1 if owner == player_id else -1
+        for square in board.get_player_pieces_location(owner):
+            piece_type, _ = board.get_location(square)
+            score += sign * (KING_VALUE if piece_type == PieceType.king else MAN_VALUE)
+    return score
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class SearchStrategy(Strategy):
+    # Negamax alpha-beta with iterative deepening. Parameters (all optional, through other_params):
+    #   evaluation - f(board, player_id) -> float, from the point of view of player_id
+    #   time_limit - wall clock seconds per move, max_nodes - node budget per move, max_depth
+    # The search also stops at the deadline Match sets under a time control, whichever comes first
+    #   tt_size - number of positions kept in the transposition table
+    WIN_SCORE = 10 ** 6
+    MAX_PLY = 1000
+    EXACT, LOWER_BOUND, UPPER_BOUND = range(3)
+    TIME_CHECK_INTERVAL = 256
+
+    def __init__(self, player_id=None, **kwargs):
+        super().__init__(player_id, **kwargs)
+        self.evaluate = kwargs.get('evaluation', material_evaluation)
+        self.time_limit = kwargs.get('time_limit', 0.1)
+        self.max_nodes = kwargs.get('max_nodes')
+        self.max_depth = kwargs.get('max_depth', 64)
+        self.table = TranspositionTable(kwargs.get('tt_size', 2 ** 16))
+        self.killers = defaultdict(list)
+        self.history = defaultdict(int)
+        self.nodes = 0
+        self.search_deadline = None
+        self.completed_depth = 0
+
+    @staticmethod
+    def _line_key(line: List[Move]) -> tuple:
+        return line[0].from_square, line[-1].to_square
+
+    def _check_budget(self):
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise SearchTimeout
+        if self.search_deadline is not None and self.nodes % self.TIME_CHECK_INTERVAL == 0 \
+                and time.perf_counter() > self.search_deadline:
+            raise SearchTimeout
+
+    def order_moves(self, legal_moves: List[List[Move]], ply: int, first_line: tuple = None) -> List[List[Move]]:
+        # Best line from the table first, then longer captures, then killers, then by history score
+        killers = self.killers[ply]
+
+        def move_order(line):
+            key = self._line_key(line)
+            if key == first_line:
+                return 0, 0
+            if len(line) > 1:
+                return 1, -len(line)
+            if key in killers:
+                return 2, killers.index(key)
+            return 3, -self.history[key]
+
+        return sorted(legal_moves, key=move_order)
+
+    def _store_cutoff(self, line: List[Move], ply: int, depth: int):
+        if len(line) > 1:
+            return
+        key = self._line_key(line)
+        self.history[key] += depth * depth
+        killers = self.killers[ply]
+        if key not in killers:
+            killers.insert(0, key)
+            del killers[2:]
+
+    def _score_to_table(self, score: float, ply: int) -> float:
+        # Win/loss scores are stored relative to the position, not to the root
+        if score >= self.WIN_SCORE - self.MAX_PLY:
+            return score + ply
+        if score <= -self.WIN_SCORE + self.MAX_PLY:
+            return score - ply
+        return score
+
+    def _score_from_table(self, score: float, ply: int) -> float:
+        if score >= self.WIN_SCORE - self.MAX_PLY:
+            return score - ply
+        if score <= -self.WIN_SCORE + self.MAX_PLY:
+            return score + ply
+        return score
+
+    def negamax(self, board: Board, player_id: int, depth: int, alpha: float, beta: float, ply: int,
+                legal_moves: List[List[Move]] = None) -> (float, List[Move]):
+        self._check_budget()
+        if legal_moves is None:
+            legal_moves = MoveGenerator.get_player_legal_moves(board, player_id)
+        if not legal_moves:
+            return -self.WIN_SCORE + ply, None
+        if depth <= 0:
+            return self.evaluate(board, player_id), None
+
+        key = (board.zobrist_hash, player_id)
+        entry = self.table.get(key)
+        first_line = None
+        if entry is not None:
+            entry_depth, entry_score, entry_flag, first_line = entry
+            entry_score = self._score_from_table(entry_score, ply)
+            if ply > 0 and entry_depth >= depth:
+                if entry_flag == self.EXACT:
+                    return entry_score, None
+                if entry_flag == self.LOWER_BOUND and entry_score >= beta:
+                    return entry_score, None
+                if entry_flag == self.UPPER_BOUND and entry_score <= alpha:
+                    return entry_score, None
+
+        alpha_orig = alpha
+        best_score, best_line = -float('inf'), None
+        for line in self.order_moves(legal_moves, ply, first_line):
+            undo = board.make_move(line)
+            try:
+                score, _ = self.negamax(board, player_id ^ 1, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(undo)
+            score = -score
+            if score > best_score:
+                best_score, best_line = score, line
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self._store_cutoff(line, ply, depth)
+                break
+
+        if best_score <= alpha_orig:
+            flag = self.UPPER_BOUND
+        elif best_score >= beta:
+            flag = self.LOWER_BOUND
+        else:
+            flag = self.EXACT
+        self.table.put(key, (depth, self._score_to_table(best_score, ply), flag, self._line_key(best_line)))
+        return best_score, best_line
+
+    def search(self, board: Board, legal_moves: List[List[Move]]) -> List[Move]:
+        self.nodes = 0
+        self.completed_depth = 0
+        self.killers.clear()
+        self.search_deadline = self.deadline
+        if self.time_limit is not None:
+            time_limit_deadline = time.perf_counter() + self.time_limit
+            if self.search_deadline is None or time_limit_deadline < self.search_deadline:
+                self.search_deadline = time_limit_deadline
+        # Shuffling first makes the sort below break ties at random, like the other strategies do
+        legal_moves = random.sample(legal_moves, len(legal_moves))
+        best_line = legal_moves[0]
+        for depth in range(1, self.max_depth + 1):
+            try:
+                score, line = self.negamax(board, self.player_id, depth, -float('inf'), float('inf'), 0,
+                                           legal_moves)
+            except SearchTimeout:
+                break
+            best_line = line
+            self.completed_depth = depth
+            if abs(score) >= self.WIN_SCORE - self.MAX_PLY:
+                break
+        return best_line
+
+    def choose_best_move(self, board: Board, legal_moves: List[List[Move]]) -> List[Move]:
+        if len(legal_moves) == 1:
+            return legal_moves[0]
+        tablebase_move = self.get_tablebase_move(board, legal_moves)
+        if tablebase_move is not None:
+            return tablebase_move
+        book_move = self.get_book_move(board, legal_moves)
+        if book_move is not None:
+            return book_move
+        return self.search(board, legal_moves)
@@ -1,6 +1,6 @@
 import random
-from math import sqrt
-from statistics import mean
+
+import numpy as np
 
 from .base_strategy import Strategy
 
@@ -11,33 +11,43 @@ class RandomStrategy(Strategy):
 
 
 class LongestLineStrategy(Strategy):
-    def rank_move(self, board, move, **kwargs):
-        return len(move)
+    def rank_moves(self, board, lines):
+        return lines.length
 
 
 class StayBack(Strategy):
-    def rank_move(self, board, move, **kwargs):
-        start, end = self._get_start_end_squares(move)
-        diff = start.row - end.row
-        return (start.row + 1) ** diff
+    # Ranks a line (from_row + row_offset) ** (row_weight * rows moved back), other_params row_offset and row_weight
+    # default to 1
+    def __init__(self, player_id=None, **kwargs):
+        super().__init__(player_id, **kwargs)
+        self.row_offset = kwargs.get('row_offset', 1)
+        self.row_weight = kwargs.get('row_weight', 1)
+
+    def rank_moves(self, board, lines):
+        diff = lines.from_row - lines.to_row
+        return np.power((lines.from_row + self.row_offset).astype(float), self.row_weight * diff)
 
 
 class PushForward(StayBack):
-    def rank_move(self, board, move, **kwargs):
-        stay_back_rank = super().rank_move(board, move)
+    def rank_moves(self, board, lines):
+        stay_back_rank = super().rank_moves(board, lines)
         return - stay_back_rank
 
 
 class TowardEnemyCenter(Strategy):
-    def rank_move(self, board, move, **board_data):
-        start, end = self._get_start_end_squares(move)
-        col_d = end.col - board_data['col']
-        row_d = end.col - board_data['row']
-        return sqrt(row_d**2 + col_d**2)
-
-    def analyze_board(self, board):
+    # Ranks a line by its weighted distance to the center of the enemy pieces, other_params row_weight and
+    # col_weight default to 1
+    def __init__(self, player_id=None, **kwargs):
+        super().__init__(player_id, **kwargs)
+        self.row_weight = kwargs.get('row_weight', 1)
+        self.col_weight = kwargs.get('col_weight', 1)
+
+    def rank_moves(self, board, lines):
         other_player = (self.player_id + 1) % 2
-        enemy_location = board.player_pieces[other_player]
-        avg_col = mean([sqr.col for sqr in enemy_location])
-        avg_row = mean([sqr.row for sqr in enemy_location])
-        return dict(row=avg_row, col=avg_col)
+        enemy_location = board.get_player_pieces_location(other_player)
+        avg_col = np.mean([sqr.col for sqr in enemy_location])
+        avg_row = np.mean([sqr.row for sqr in enemy_location])
+        col_d = lines.to_col - avg_col
+        # Measured from the end column, the way this strategy has always played
+        row_d = lines.to_col - avg_row
+        return np.sqrt(self.row_weight * row_d**2 + self.col_weight * col_d**2)
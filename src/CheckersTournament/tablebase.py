@@ -0,0 +1,352 @@
+import itertools
+import json
+import struct
+from math import comb
+from typing import List
+
+import numpy as np
+
+from batch_simulator import BatchSimulator, MAN, KING
+from game_elements.bitboard import NUM_OF_SQUARES, square_to_index
+from game_elements.board import Board, Move, PLAYABLE_SQUARES
+from game_elements.piece import PieceType, PlayerId
+
+# Positions are stored from the point of view of the side to move, as if it were moving with orientation 1.
+# A position with the other orientation is turned around first, which maps playable square index i to 31 - i.
+# A material signature is (mover men, mover kings, opponent men, opponent kings). Inside a signature a
+# placement is ranked group by group (mover men, opponent men, mover kings, opponent kings), every group as a
+# combination of the squares left free by the groups before it, so every placement has its own index.
+#
+# Every position holds a uint16: 0 for a draw, otherwise the number of plies to the end of the game plus one.
+# The game ends when the side to move has no legal move or no pieces and loses, so an even distance is a loss
+# for the side to move and an odd one a win.
+#
+# Building uses BatchSimulator to generate the lines of a whole chunk of positions at once.
+FILE_HEADER = b'CKTB\x01'
+DIRECTORY_LENGTH = struct.Struct('<I')
+DATA_ALIGNMENT = 64
+WIN, LOSS, DRAW = 'win', 'loss', 'draw'
+# Men never stand on the row they are crowned on
+MOVER_MAN_SQUARES = frozenset(range(NUM_OF_SQUARES - 4))
+OPPONENT_MAN_SQUARES = frozenset(range(4, NUM_OF_SQUARES))
+MOVER, OPPONENT = 0, 1
+
+
+def turn_around(index: int) -> int:
+    return NUM_OF_SQUARES - 1 - index
+
+
+def signature_size(signature: tuple) -> int:
+    mover_men, mover_kings, opponent_men, opponent_kings = signature
+    size, used = 1, 0
+    for count in (mover_men, opponent_men, mover_kings, opponent_kings):
+        size *= comb(NUM_OF_SQUARES - used, count)
+        used += count
+    return size
+
+
+_COMB = tuple(tuple(comb(n, k) for k in range(NUM_OF_SQUARES + 1)) for n in range(NUM_OF_SQUARES + 1))
+
+
+def position_index(mover_men, opponent_men, mover_kings, opponent_kings) -> int:
+    index, used, free = 0, 0, NUM_OF_SQUARES
+    for group in (mover_men, opponent_men, mover_kings, opponent_kings):
+        # Rank among the squares not taken by the previous groups, as a combination in colex order
+        rank = 0
+        for k, square in enumerate(sorted(group), 1):
+            rank += _COMB[square - (used & ((1 << square) - 1)).bit_count()][k]
+        index = index * _COMB[free][len(group)] + rank
+        for square in group:
+            used |= 1 << square
+        free -= len(group)
+    return index
+
+
+def get_signatures(max_pieces: int) -> List[tuple]:
+    # Ordered so every position only leads to positions of signatures already solved, or of its own group:
+    # captures lower the number of pieces and crowning the number of men
+    signatures = []
+    for mover_pieces in range(1, max_pieces):
+        for opponent_pieces in range(1, max_pieces - mover_pieces + 1):
+            for mover_kings in range(mover_pieces + 1):
+                for opponent_kings in range(opponent_pieces + 1):
+                    signatures.append((mover_pieces - mover_kings, mover_kings,
+                                       opponent_pieces - opponent_kings, opponent_kings))
+    return sorted(signatures, key=lambda s: (s[0] + s[1] + s[2] + s[3], s[0] + s[2], s))
+
+
+def swap_sides(signature: tuple) -> tuple:
+    mover_men, mover_kings, opponent_men, opponent_kings = signature
+    return opponent_men, opponent_kings, mover_men, mover_kings
+
+
+def encode_value(distance: int) -> int:
+    return distance + 1
+
+
+def decode_value(value: int) -> tuple:
+    # (result for the side to move, plies to the end of the game)
+    if value == 0:
+        return DRAW, None
+    distance = value - 1
+    return (LOSS if distance % 2 == 0 else WIN), distance
+
+
+# Playable square index -> flat row * 8 + col cell
+FLAT_SQUARES = np.array([square.row * Board.MAX_COL + square.col for square in PLAYABLE_SQUARES])
+SQUARE_BITS = np.left_shift(np.int64(1), np.arange(NUM_OF_SQUARES, dtype=np.int64))
+COMB_TABLE = np.array(_COMB, dtype=np.int64)
+BUILD_CHUNK_SIZE = 2 ** 15
+
+
+def position_indices(mover_men, opponent_men, mover_kings, opponent_kings) -> np.ndarray:
+    # position_index for arrays of square bit masks
+    index = np.zeros(len(mover_men), dtype=np.int64)
+    used = np.zeros(len(mover_men), dtype=np.int64)
+    free = np.full(len(mover_men), NUM_OF_SQUARES, dtype=np.int64)
+    for group in (mover_men, opponent_men, mover_kings, opponent_kings):
+        rank = np.zeros(len(group), dtype=np.int64)
+        count = np.zeros(len(group), dtype=np.int64)
+        used_below = np.zeros(len(group), dtype=np.int64)
+        for square in range(NUM_OF_SQUARES):
+            bit = (group >> square) & 1
+            count += bit
+            rank += bit * COMB_TABLE[square - used_below, count]
+            used_below += (used >> square) & 1
+        index = index * COMB_TABLE[free, count] + rank
+        used |= group
+        free -= count
+    return index
+
+
+def _square_masks(cells: np.ndarray, value: int) -> np.ndarray:
+    return ((cells == value).astype(np.int64) * SQUARE_BITS).sum(axis=1)
+
+
+def _combinations(squares, count: int) -> np.ndarray:
+    return np.array([sum(1 << square for square in combination)
+                     for combination in itertools.combinations(sorted(squares), count)], dtype=np.int64)
+
+
+def _enumerate_positions(signature: tuple) -> tuple:
+    # Square bit masks of (mover men, opponent men, mover kings, opponent kings) of every position
+    mover_men, mover_kings, opponent_men, opponent_kings = signature
+    placed = _combinations(MOVER_MAN_SQUARES, mover_men)[:, None]
+    for squares, count in ((OPPONENT_MAN_SQUARES, opponent_men), (range(NUM_OF_SQUARES), mover_kings),
+                           (range(NUM_OF_SQUARES), opponent_kings)):
+        used = np.bitwise_or.reduce(placed, axis=1)
+        added = _combinations(squares, count)
+        first, second = np.nonzero((used[:, None] & added[None, :]) == 0)
+        placed = np.concatenate([placed[first], added[second, None]], axis=1)
+    return tuple(placed.T)
+
+
+def _to_boards(mover_men, opponent_men, mover_kings, opponent_kings) -> np.ndarray:
+    cells = np.zeros((len(mover_men), NUM_OF_SQUARES), dtype=np.int8)
+    for group, value in ((mover_men, MAN), (opponent_men, -MAN), (mover_kings, KING), (opponent_kings, -KING)):
+        cells += (((group[:, None] & SQUARE_BITS) != 0) * value).astype(np.int8)
+    boards = np.zeros((len(mover_men), Board.MAX_ROW * Board.MAX_COL), dtype=np.int8)
+    boards[:, FLAT_SQUARES] = cells
+    return boards.reshape(-1, Board.MAX_ROW, Board.MAX_COL)
+
+
+def _children(boards: np.ndarray) -> tuple:
+    # Every legal line of the mover (white, orientation 1) in every board: the board it was played in and the
+    # position reached, seen from the opponent who moves next
+    lines = BatchSimulator.get_legal_lines(boards, np.arange(len(boards)), PlayerId.white.value)
+    # Turning the board around and swapping colors makes the opponent the mover
+    cells = -lines.resulting_boards[:, ::-1, ::-1].reshape(len(lines), -1)[:, FLAT_SQUARES]
+    return lines.game, tuple(_square_masks(cells, value) for value in (MAN, -MAN, KING, -KING))
+
+
+def _solve_group(group: List[tuple], tables: dict):
+    # Distances by increasing ply count: a position is won in k plies once a move reaches a position lost in
+    # k - 1, and lost in k once every move reaches a position already known as won. Whatever is left is a draw.
+    offsets, total = {}, 0
+    for signature in group:
+        offsets[signature] = total
+        total += signature_size(signature)
+    valid = np.zeros(total, dtype=bool)
+    degree = np.zeros(total, dtype=np.int64)
+    internal_parents, internal_children = [], []
+    external_parents, external_distances = [], []
+    for signature in group:
+        positions = _enumerate_positions(signature)
+        parents = offsets[signature] + position_indices(*positions)
+        valid[parents] = True
+        for start in range(0, len(parents), BUILD_CHUNK_SIZE):
+            chunk = [group_masks[start:start + BUILD_CHUNK_SIZE] for group_masks in positions]
+            games, children = _children(_to_boards(*chunk))
+            line_parents = parents[start:start + BUILD_CHUNK_SIZE][games]
+            degree += np.bincount(line_parents, minlength=total)
+            counts = np.stack([((masks[:, None] & SQUARE_BITS) != 0).sum(axis=1) for masks in children], axis=1)
+            # Child signatures as (mover men, mover kings, opponent men, opponent kings)
+            child_signatures = counts[:, [0, 2, 1, 3]]
+            child_indices = position_indices(*children)
+            # Every piece of the opponent was captured
+            captured_all = child_signatures[:, 0] + child_signatures[:, 1] == 0
+            external_parents.append(line_parents[captured_all])
+            external_distances.append(np.zeros(captured_all.sum(), dtype=np.int64))
+            for child_signature in np.unique(child_signatures[~captured_all], axis=0):
+                selected = ~captured_all & (child_signatures == child_signature).all(axis=1)
+                child_signature = tuple(child_signature.tolist())
+                if child_signature in offsets:
+                    internal_parents.append(line_parents[selected])
+                    internal_children.append(offsets[child_signature] + child_indices[selected])
+                else:
+                    external_parents.append(line_parents[selected])
+                    external_distances.append(tables[child_signature][child_indices[selected]].astype(np.int64) - 1)
+
+    internal_parents = np.concatenate(internal_parents or [np.zeros(0, dtype=np.int64)])
+    internal_children = np.concatenate(internal_children or [np.zeros(0, dtype=np.int64)])
+    external_parents = np.concatenate(external_parents or [np.zeros(0, dtype=np.int64)])
+    external_distances = np.concatenate(external_distances or [np.zeros(0, dtype=np.int64)])
+    is_draw = external_distances < 0
+    is_loss = ~is_draw & (external_distances % 2 == 0)
+    is_win = ~is_draw & ~is_loss
+    # A drawn move means the position can never be lost
+    never_lost = np.zeros(total, dtype=bool)
+    never_lost[external_parents[is_draw]] = True
+    won_moves = np.zeros(total, dtype=np.int64)
+    np.add.at(won_moves, external_parents[is_win], 1)
+    latest_win = np.full(total, -1, dtype=np.int64)
+    np.maximum.at(latest_win, external_parents[is_win], external_distances[is_win])
+    earliest_loss = np.full(total, np.iinfo(np.int64).max, dtype=np.int64)
+    np.minimum.at(earliest_loss, external_parents[is_loss], external_distances[is_loss])
+
+    distance = np.full(total, -1, dtype=np.int64)
+    distance[valid & (degree == 0)] = 0
+    last_external = int(external_distances.max(initial=0))
+    ply, last_change = 1, 0
+    while ply <= last_external + 1 or ply <= last_change + 2:
+        unknown = valid & (distance < 0)
+        if ply % 2:
+            found = np.zeros(total, dtype=bool)
+            found[internal_parents[distance[internal_children] == ply - 1]] = True
+            found |= earliest_loss == ply - 1
+        else:
+            found = (won_moves == degree) & (latest_win < ply) & ~never_lost
+        found &= unknown
+        if found.any():
+            distance[found] = ply
+            last_change = ply
+        if ply % 2:
+            np.add.at(won_moves, internal_parents[distance[internal_children] == ply], 1)
+        ply += 1
+
+    values = np.where(distance >= 0, distance + 1, 0).astype(np.uint16)
+    for signature in group:
+        offset = offsets[signature]
+        tables[signature] = values[offset:offset + signature_size(signature)]
+
+
+def build_tablebase(path: str, max_pieces: int = 4, progress=None):
+    tables = {}
+    solved = set()
+    for signature in get_signatures(max_pieces):
+        if signature in solved:
+            continue
+        group = [signature] if swap_sides(signature) == signature else [signature, swap_sides(signature)]
+        _solve_group(group, tables)
+        solved.update(group)
+        if progress is not None:
+            progress(group)
+    write_tablebase(path, tables, max_pieces)
+
+
+def write_tablebase(path: str, tables: dict, max_pieces: int):
+    directory = {'max_pieces': max_pieces, 'tables': {}}
+    offset = 0
+    for signature, values in tables.items():
+        directory['tables'][','.join(map(str, signature))] = [offset, len(values)]
+        offset += values.nbytes
+    encoded = json.dumps(directory).encode()
+    data_start = len(FILE_HEADER) + DIRECTORY_LENGTH.size + len(encoded)
+    padding = -data_start % DATA_ALIGNMENT
+    with open(path, 'wb') as f:
+        f.write(FILE_HEADER + DIRECTORY_LENGTH.pack(len(encoded) + padding) + encoded + b' ' * padding)
+        for values in tables.values():
+            f.write(values.astype('<u2').tobytes())
+
+
+class Tablebase:
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            if f.read(len(FILE_HEADER)) != FILE_HEADER:
+                raise ValueError(f'{path} is not a tablebase file')
+            (length, ) = DIRECTORY_LENGTH.unpack(f.read(DIRECTORY_LENGTH.size))
+            directory = json.loads(f.read(length))
+        self.max_pieces = directory['max_pieces']
+        data_start = len(FILE_HEADER) + DIRECTORY_LENGTH.size + length
+        self.data = np.memmap(path, dtype='<u2', mode='r', offset=data_start)
+        self.tables = {}
+        for key, (offset, size) in directory['tables'].items():
+            signature = tuple(int(count) for count in key.split(','))
+            self.tables[signature] = self.data[offset // 2:offset // 2 + size]
+
+    def probe_value(self, board: Board, player_id: int):
+        # Raw value of the position with player_id to move, None when it is not in the tablebase
+        if sum(len(board.get_player_pieces_location(player)) for player in (player_id, player_id ^ 1)) \
+                > self.max_pieces:
+            return None
+        pieces = ([], []), ([], [])
+        for owner, player in ((MOVER, player_id), (OPPONENT, player_id ^ 1)):
+            for square in board.get_player_pieces_location(player):
+                index = square_to_index(square)
+                if board.orientation == -1:
+                    index = turn_around(index)
+                piece_type, _ = board.get_location(square)
+                pieces[piece_type == PieceType.king][owner].append(index)
+        (mover_men, opponent_men), (mover_kings, opponent_kings) = pieces
+        if not mover_men and not mover_kings:
+            return encode_value(0)
+        table = self.tables.get((len(mover_men), len(mover_kings), len(opponent_men), len(opponent_kings)))
+        if table is None:
+            return None
+        if not MOVER_MAN_SQUARES.issuperset(mover_men) or not OPPONENT_MAN_SQUARES.issuperset(opponent_men):
+            return None
+        return int(table[position_index(mover_men, opponent_men, mover_kings, opponent_kings)])
+
+    def probe(self, board: Board, player_id: int):
+        # (result for player_id, plies to the end of the game) with player_id to move, None when not covered
+        value = self.probe_value(board, player_id)
+        if value is None:
+            return None
+        return decode_value(value)
+
+    def best_move(self, board: Board, player_id: int, legal_moves: List[List[Move]]):
+        # The line winning fastest, or drawing, or losing slowest. None when the position is not covered.
+        # The board has to be oriented for player_id to move and is left unchanged.
+        best_line, best_key = None, None
+        for line in legal_moves:
+            undo = board.make_move(line)
+            try:
+                value = self.probe_value(board, player_id ^ 1)
+            finally:
+                board.unmake_move(undo)
+            if value is None:
+                return None
+            result, distance = decode_value(value)
+            # The opponent moves next, its loss is our win
+            if result == LOSS:
+                key = (2, -distance)
+            elif result == DRAW:
+                key = (1, 0)
+            else:
+                key = (0, distance)
+            if best_key is None or key > best_key:
+                best_line, best_key = line, key
+        return best_line
+
+
+if __name__ == '__main__':
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description='Build an endgame tablebase')
+    parser.add_argument('path')
+    parser.add_argument('--max-pieces', type=int, default=4)
+    args = parser.parse_args()
+    start = time.perf_counter()
+    build_tablebase(args.path, args.max_pieces,
+                    lambda group: print(f'{group} solved after {time.perf_counter() - start:.1f}s'))
@@ -0,0 +1,40 @@
+FORFEIT = 'forfeit'
+DEFAULT_MOVE = 'default_move'
+OVERRUN_POLICIES = (FORFEIT, DEFAULT_MOVE)
+
+
+class MoveTimeout(Exception):
+    # Raised by a strategy that could not choose a move before its deadline
+    pass
+
+
+class TimeControl:
+    # move_time - seconds allowed per move, game_time - seconds on each player's clock for the whole game,
+    # increment - seconds added to the clock after every move. Any of the limits can be None (unlimited).
+    # A player going over its budget by more than grace seconds either forfeits the game or has the first
+    # legal move played for it, by on_overrun.
+    def __init__(self, move_time: float = None, game_time: float = None, increment: float = 0.0,
+                 on_overrun: str = FORFEIT, grace: float = 0.0):
+        if on_overrun not in OVERRUN_POLICIES:
+            raise ValueError(f'Unknown overrun policy {on_overrun}, expected one of {OVERRUN_POLICIES}')
+        self.move_time = move_time
+        self.game_time = game_time
+        self.increment = increment
+        self.on_overrun = on_overrun
+        self.grace = grace
+
+    def get_move_budget(self, clock: float):
+        # Seconds the next move may take given the time left on the player's clock, None when unlimited
+        if self.move_time is None:
+            return clock
+        if clock is None:
+            return self.move_time
+        return min(self.move_time, clock)
+
+    def update_clock(self, clock: float, elapsed: float):
+        if clock is None:
+            return None
+        return clock - elapsed + self.increment
+
+    def is_overrun(self, budget: float, elapsed: float) -> bool:
+        return budget is not None and elapsed > budget + self.grace
@@ -1,38 +1,379 @@
-from game_elements.board import Board
+import contextlib
+import random
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Type
 
+from draw_rules import DrawRules
+from game_elements import get_board_class
 from game_elements.piece import PlayerId
+from game_record import GameRecordEncoder, GameRecordBuffer, GameRecorder
 from match import Player, Match
-from strategies import ALL_STRATEGIES
+from opening_book import OpeningBook, random_opening
+from profiling import Profiler, write_profiles
+from result_store import ResultStore, game_key
+from scheduler import AdaptiveScheduler, STOPPING_RULES
+from strategies import Strategy, IsolatedStrategy, ALL_STRATEGIES
+from tablebase import Tablebase
+from time_control import TimeControl, OVERRUN_POLICIES
+from training_data import TrainingDataWriter
+from transposition_table import TranspositionTable
 
 NUM_OF_GAMES = 50
+# A game to play, the play_game arguments plus whether to record and profile it
+WorkUnit = namedtuple('WorkUnit', 'white_strategy black_strategy game_seed board_backend cache_size record profile '
+                                  'time_control isolate tablebase_path draw_rules book_path opening_plies '
+                                  'opening_seed')
+# Whether the game is recorded or profiled does not change how it is played, record and profile are not part of
+# its key
+GAME_KEY_FIELDS = ('game_seed', 'board_backend', 'cache_size', 'time_control', 'isolate', 'tablebase_path',
+                   'draw_rules', 'book_path', 'opening_plies', 'opening_seed')
+
+# Caches live for the whole life of a (worker) process so later games reuse the positions of earlier ones
+_process_caches = {}
+
+
+def get_process_cache(name, cache_size: int) -> TranspositionTable:
+    if name not in _process_caches:
+        _process_caches[name] = TranspositionTable(cache_size)
+    return _process_caches[name]
+
+
+def get_process_tablebase(path: str) -> Tablebase:
+    key = ('tablebase', path)
+    if key not in _process_caches:
+        _process_caches[key] = Tablebase(path)
+    return _process_caches[key]
+
+
+def get_process_book(path: str) -> OpeningBook:
+    key = ('opening_book', path)
+    if key not in _process_caches:
+        _process_caches[key] = OpeningBook(path)
+    return _process_caches[key]
+
+
+def check_store_seed(store_path: str, seed):
+    # Stored games are looked up by their seeds, games of an unseeded run would be taken for another run's
+    if store_path is not None and seed is None:
+        raise ValueError('a result store needs a tournament seed')
+
+
+def get_tournament_seed(seed=None) -> int:
+    # A run without a seed gets one drawn here, its game and opening seeds are derived from it like from a given
+    # one, so both colorings of a pairing still play the same openings
+    return random.SystemRandom().getrandbits(32) if seed is None else seed
+
+
+def get_game_seed(seed, white_index: int, black_index: int, game_index: int):
+    # Every game gets its own seed so the result does not depend on which worker played it, or when
+    if seed is None:
+        return None
+    return random.Random(f'{seed}-{white_index}-{black_index}-{game_index}').getrandbits(32)
+
+
+def get_opening_seed(seed, white_index: int, black_index: int, game_index: int):
+    # Both colorings of a pairing play the same openings, so neither strategy gets the better ones
+    if seed is None:
+        return None
+    first, second = sorted((white_index, black_index))
+    return random.Random(f'{seed}-opening-{first}-{second}-{game_index}').getrandbits(32)
+
+
+def play_game(white_strategy: Type[Strategy], black_strategy: Type[Strategy], game_seed=None,
+              board_backend: str = 'list', cache_size: int = 0, recorder: GameRecordEncoder = None,
+              profiler: Profiler = None, time_control: TimeControl = None, isolate: bool = False,
+              tablebase_path: str = None, draw_rules: DrawRules = None, book_path: str = None,
+              opening_plies: int = 0, opening_seed=None) -> int:
+    move_cache = None
+    white_params, black_params = {}, {}
+    book = get_process_book(book_path) if book_path else None
+    if book is not None:
+        white_params['opening_book'] = black_params['opening_book'] = book
+    # The game starts after opening_plies lines drawn from the book, or random ones without a book
+    opening = random_opening(opening_plies, opening_seed, book) if opening_plies else None
+    if cache_size:
+        move_cache = get_process_cache('legal_moves', cache_size)
+        white_params['evaluation_cache'] = get_process_cache(white_strategy, cache_size)
+        black_params['evaluation_cache'] = get_process_cache(black_strategy, cache_size)
+    if isolate:
+        # Every strategy moves in a process of its own that is killed when it overruns its deadline
+        white_params['wrapped_strategy'], white_strategy = white_strategy, IsolatedStrategy
+        black_params['wrapped_strategy'], black_strategy = black_strategy, IsolatedStrategy
+    player1 = Player(PlayerId.white.value, white_strategy, **white_params)
+    player2 = Player(PlayerId.black.value, black_strategy, **black_params)
+    match = Match([player1, player2], get_board_class(board_backend)(), move_cache, recorder, game_seed,
+                  profiler=profiler, time_control=time_control,
+                  tablebase=get_process_tablebase(tablebase_path) if tablebase_path else None,
+                  draw_rules=draw_rules, opening=opening)
+    return match.match()
+
+
+def _play_work_unit(work_unit: WorkUnit) -> tuple:
+    # Recorded games are encoded and profiles collected where they are played, the parent process writes the
+    # records and merges the profiles
+    game_args = work_unit._asdict()
+    record, profile = game_args.pop('record'), game_args.pop('profile')
+    recorder = GameRecordBuffer() if record else None
+    profiler = Profiler() if profile else None
+    winner = play_game(**game_args, recorder=recorder, profiler=profiler)
+    return (winner, recorder.getvalue() if record else None,
+            profiler.to_dict() if profile else None)
+
+
+def open_outputs(stack: contextlib.ExitStack, record_path: str = None, training_data_path: str = None,
+                 store_path: str = None) -> tuple:
+    # (recorders, store) of a tournament, closed by stack
+    recorders = []
+    if record_path is not None:
+        recorders.append(stack.enter_context(GameRecorder(record_path)))
+    if training_data_path is not None:
+        recorders.append(stack.enter_context(TrainingDataWriter(training_data_path)))
+    store = stack.enter_context(ResultStore(store_path)) if store_path is not None else None
+    return recorders, store
+
+
+def get_game_key(work_unit: WorkUnit, game_index: int) -> str:
+    return game_key(work_unit.white_strategy, work_unit.black_strategy, game_index,
+                    *(getattr(work_unit, field) for field in GAME_KEY_FIELDS))
 
 
 class Tournament:
     @staticmethod
-    def run_tournament():
-        len_strat = len(ALL_STRATEGIES)
-        result = []
-        board = Board()
-        for i in range(len_strat):
-            line_result = []
-            for j in range(len_strat):
+    def get_work_unit(strategies: List[Type[Strategy]], white: int, black: int, game_index: int, seed=None,
+                      board_backend: str = 'list', cache_size: int = 0, record: bool = False,
+                      profile: bool = False, time_control: TimeControl = None, isolate: bool = False,
+                      tablebase_path: str = None, draw_rules: DrawRules = None, book_path: str = None,
+                      opening_plies: int = 0) -> WorkUnit:
+        return WorkUnit(strategies[white], strategies[black], get_game_seed(seed, white, black, game_index),
+                        board_backend, cache_size, record, profile, time_control, isolate, tablebase_path, draw_rules,
+                        book_path, opening_plies, get_opening_seed(seed, white, black, game_index))
+
+    @staticmethod
+    def get_work_units(strategies: List[Type[Strategy]], num_of_games: int, seed=None, *game_settings):
+        # game_settings are the get_work_unit parameters following seed
+        pairings = []
+        work_units = []
+        for i in range(len(strategies)):
+            for j in range(len(strategies)):
                 if i == j:
-                    line_result.append(-1)
                     continue
-                player1 = Player(PlayerId.white.value, ALL_STRATEGIES[i])
-                player2 = Player(PlayerId.black.value, ALL_STRATEGIES[j])
-                match = Match([player1, player2], board)
-                black_wins = 0
-                print(f'Matching {player1.strategy.__class__.__name__} as white\n'
-                      f'     VS. {player2.strategy.__class__.__name__} as black')
-                for games in range(NUM_OF_GAMES):
-                    black_wins += match.match()
-                white_win_rate = (NUM_OF_GAMES - black_wins)/NUM_OF_GAMES
-                line_result.append(white_win_rate)
-                print(f'White won {white_win_rate * 100}%')
-            result.append(line_result)
-        print(list(map(lambda x: x.__name__, ALL_STRATEGIES)))
+                pairings.append((i, j))
+                for game_index in range(num_of_games):
+                    work_units.append(Tournament.get_work_unit(strategies, i, j, game_index, seed, *game_settings))
+        return pairings, work_units
+
+    @staticmethod
+    def play_work_units(work_units: list, workers: int = 1, chunk_size: int = 1,
+                        executor: ProcessPoolExecutor = None):
+        # Yields (winner, encoded record, profile) in work unit order, as soon as each game is done.
+        # Pass an executor to reuse its worker processes between calls.
+        if executor is not None:
+            yield from executor.map(_play_work_unit, work_units, chunksize=chunk_size)
+            return
+        if workers <= 1:
+            for work_unit in work_units:
+                yield _play_work_unit(work_unit)
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            yield from executor.map(_play_work_unit, work_units, chunksize=chunk_size)
+
+    @staticmethod
+    def play_stored_work_units(work_units: list, game_indices: List[int], store: ResultStore = None,
+                               workers: int = 1, chunk_size: int = 1, executor: ProcessPoolExecutor = None):
+        # play_work_units, except that games found in the store are not played again and played ones are added
+        if store is None:
+            yield from Tournament.play_work_units(work_units, workers, chunk_size, executor)
+            return
+        keys = [get_game_key(work_unit, game_index) for work_unit, game_index in zip(work_units, game_indices)]
+        stored = store.load(keys)
+        # A game stored without the record or profile this run asks for is played again
+        for work_unit, key in zip(work_units, keys):
+            if key in stored and ((work_unit.record and stored[key][1] is None) or
+                                  (work_unit.profile and stored[key][2] is None)):
+                del stored[key]
+        played = Tournament.play_work_units([work_unit for work_unit, key in zip(work_units, keys)
+                                             if key not in stored], workers, chunk_size, executor)
+        for work_unit, key, game_index in zip(work_units, keys, game_indices):
+            result = stored.get(key)
+            if result is None:
+                result = next(played)
+                store.add_game(key, work_unit.white_strategy.__name__, work_unit.black_strategy.__name__, game_index,
+                               *result)
+            yield result
+
+    @staticmethod
+    def get_rates(winners: List[int], pairings: list, num_of_games: int, len_strat: int):
+        # White win and draw rates of every pairing, by white and black strategy index, -1 on the diagonal
+        win_rates = [[-1] * len_strat for _ in range(len_strat)]
+        draw_rates = [[-1] * len_strat for _ in range(len_strat)]
+        for pairing_index, (i, j) in enumerate(pairings):
+            games = winners[pairing_index * num_of_games:(pairing_index + 1) * num_of_games]
+            win_rates[i][j] = games.count(PlayerId.white.value) / num_of_games
+            draw_rates[i][j] = games.count(Match.DRAW) / num_of_games
+        return win_rates, draw_rates
+
+    @staticmethod
+    def run_tournament(board_backend: str = 'list', num_of_games: int = NUM_OF_GAMES, seed=None,
+                       workers: int = 1, chunk_size: int = 1, strategies: List[Type[Strategy]] = None,
+                       cache_size: int = 0, record_path: str = None, profile_path: str = None,
+                       stacks_path: str = None, time_control: TimeControl = None, isolate: bool = False,
+                       tablebase_path: str = None, draw_rules: DrawRules = None, book_path: str = None,
+                       opening_plies: int = 0, store_path: str = None, training_data_path: str = None):
+        # profile_path gets a JSON profile and stacks_path flamegraph collapsed stacks, per strategy pairing.
+        # With store_path every game is kept in a ResultStore, games it already holds are not played again.
+        # training_data_path gets the positions of every game (see TrainingDataWriter), from the game records.
+        strategies = strategies or ALL_STRATEGIES
+        len_strat = len(strategies)
+        check_store_seed(store_path, seed)
+        seed = get_tournament_seed(seed)
+        profile = profile_path is not None or stacks_path is not None
+        record = record_path is not None or training_data_path is not None
+        pairings, work_units = Tournament.get_work_units(strategies, num_of_games, seed, board_backend,
+                                                           cache_size, record, profile,
+                                                           time_control, isolate, tablebase_path, draw_rules,
+                                                           book_path, opening_plies)
+        profiles = [Profiler() for _ in pairings]
+        winners = []
+        with contextlib.ExitStack() as stack:
+            # Every output is closed even when closing another one fails, the errors are chained
+            recorders, store = open_outputs(stack, record_path, training_data_path, store_path)
+            game_indices = [index % num_of_games for index in range(len(work_units))]
+            work_results = Tournament.play_stored_work_units(work_units, game_indices, store, workers, chunk_size)
+            for game_index, (winner, record, game_profile) in enumerate(work_results):
+                winners.append(winner)
+                for recorder in recorders:
+                    recorder.write_record(record)
+                if game_profile is not None:
+                    profiles[game_index // num_of_games].merge(Profiler.from_dict(game_profile))
+            if store is not None:
+                for pairing_index, (i, j) in enumerate(pairings):
+                    games = winners[pairing_index * num_of_games:(pairing_index + 1) * num_of_games]
+                    store.add_pairing(strategies[i], strategies[j], num_of_games,
+                                      games.count(PlayerId.white.value), games.count(Match.DRAW))
+        if profile:
+            write_profiles({f'{strategies[i].__name__}-vs-{strategies[j].__name__}': profiles[pairing_index]
+                            for pairing_index, (i, j) in enumerate(pairings)}, profile_path, stacks_path)
+        result, draws = Tournament.get_rates(winners, pairings, num_of_games, len_strat)
+        for i, j in pairings:
+            print(f'Matching {strategies[i].__name__} as white\n'
+                  f'     VS. {strategies[j].__name__} as black')
+            print(f'White won {result[i][j] * 100}%, drew {draws[i][j] * 100}%')
+        print(list(map(lambda x: x.__name__, strategies)))
         print('\n'.join([str(l) for l in result]))
+        if any(rate > 0 for row in draws for rate in row):
+            print('Draws:')
+            print('\n'.join([str(l) for l in draws]))
+        return result
+
+    @staticmethod
+    def run_adaptive_tournament(board_backend: str = 'list', num_of_games: int = NUM_OF_GAMES, seed=None,
+                                workers: int = 1, chunk_size: int = 1, strategies: List[Type[Strategy]] = None,
+                                cache_size: int = 0, record_path: str = None, profile_path: str = None,
+                                stacks_path: str = None, time_control: TimeControl = None, isolate: bool = False,
+                                tablebase_path: str = None, draw_rules: DrawRules = None, book_path: str = None,
+                                opening_plies: int = 0, min_games: int = 10, max_pairing_games: int = None,
+                                stopping: str = STOPPING_RULES[0], store_path: str = None,
+                                training_data_path: str = None) -> AdaptiveScheduler:
+        # Plays at most the games of run_tournament, stopping every pairing once its result is settled (see
+        # AdaptiveScheduler). Pass opening_plies so the color swapped games of a pair start from the same opening.
+        strategies = strategies or ALL_STRATEGIES
+        len_strat = len(strategies)
+        check_store_seed(store_path, seed)
+        seed = get_tournament_seed(seed)
+        profile = profile_path is not None or stacks_path is not None
+        record = record_path is not None or training_data_path is not None
+        game_settings = (board_backend, cache_size, record, profile, time_control, isolate,
+                         tablebase_path, draw_rules, book_path, opening_plies)
+        scheduler = AdaptiveScheduler(len_strat, num_of_games * len_strat * (len_strat - 1), min_games,
+                                      max_pairing_games, stopping)
+        profiles = {}
+        with contextlib.ExitStack() as stack:
+            recorders, store = open_outputs(stack, record_path, training_data_path, store_path)
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers)) if workers > 1 else None
+            games = scheduler.next_round()
+            while games:
+                work_units = [Tournament.get_work_unit(strategies, white, black, game_index, seed, *game_settings)
+                              for white, black, game_index in games]
+                work_results = Tournament.play_stored_work_units(work_units, [game[2] for game in games], store,
+                                                                 workers, chunk_size, executor)
+                for (white, black, _), (winner, record, game_profile) in zip(games, work_results):
+                    scheduler.add_result(white, black, winner)
+                    for recorder in recorders:
+                        recorder.write_record(record)
+                    if game_profile is not None:
+                        profiles.setdefault((white, black), Profiler()).merge(Profiler.from_dict(game_profile))
+                games = scheduler.next_round()
+            if store is not None:
+                for (white, black), (wins, draws, games) in scheduler.color_results.items():
+                    store.add_pairing(strategies[white], strategies[black], games, wins, draws)
+        if profile:
+            write_profiles({f'{strategies[i].__name__}-vs-{strategies[j].__name__}': pairing_profile
+                            for (i, j), pairing_profile in sorted(profiles.items())}, profile_path, stacks_path)
+        for a, b in scheduler.pairings:
+            wins, draws, losses = scheduler.results[(a, b)]
+            low, high = scheduler.get_interval((a, b))
+            print(f'{strategies[a].__name__} VS. {strategies[b].__name__}: +{wins} ={draws} -{losses}, '
+                  f'score {low * 100:.1f}%-{high * 100:.1f}%, {scheduler.get_verdict((a, b)) or "open"}')
+        print(f'{scheduler.games_scheduled} games played out of {scheduler.budget}')
+        result, _ = scheduler.get_rates()
+        print(list(map(lambda x: x.__name__, strategies)))
+        print('\n'.join([str(l) for l in result]))
+        elos, errors = scheduler.get_ratings()
+        for index in sorted(range(len_strat), key=lambda i: -elos[i]):
+            print(f'{strategies[index].__name__:<24}{elos[index]:+8.1f} +/- {errors[index]:.1f}')
+        return scheduler
+
 
 if __name__ == "__main__":
-    Tournament.run_tournament()
\ No newline at end of file
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--games', type=int, default=NUM_OF_GAMES)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=1)
+    parser.add_argument('--backend', default='list')
+    parser.add_argument('--cache-size', type=int, default=0)
+    parser.add_argument('--record', help='append every game to this game record file')
+    parser.add_argument('--profile', help='write per pairing counters and timers to this JSON file')
+    parser.add_argument('--profile-stacks', help='write per pairing collapsed stacks for flamegraph.pl to this file')
+    parser.add_argument('--move-time', type=float, help='seconds allowed per move')
+    parser.add_argument('--game-time', type=float, help='seconds on each clock for the whole game')
+    parser.add_argument('--increment', type=float, default=0.0, help='seconds added to the clock every move')
+    parser.add_argument('--on-overrun', choices=OVERRUN_POLICIES, default=OVERRUN_POLICIES[0])
+    parser.add_argument('--isolate', action='store_true', help='run every strategy in a process of its own')
+    parser.add_argument('--tablebase', help='end games once this tablebase knows the winner')
+    parser.add_argument('--repetitions', type=int, help='draw when a position is reached this many times')
+    parser.add_argument('--quiet-plies', type=int, help='draw after this many plies without a capture or man move')
+    parser.add_argument('--max-plies', type=int, help='draw games reaching this many plies')
+    parser.add_argument('--material-margin', type=float, help='win for a player this much material ahead')
+    parser.add_argument('--book', help='opening book the strategies play from until they leave it')
+    parser.add_argument('--opening-plies', type=int, default=0,
+                        help='start every game with this many plies drawn from the book, or random ones')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='stop every pairing once its result is settled, --games per pairing at most on average')
+    parser.add_argument('--stopping', choices=STOPPING_RULES, default=STOPPING_RULES[0])
+    parser.add_argument('--min-games', type=int, default=10, help='games a pairing plays before it can stop')
+    parser.add_argument('--max-pairing-games', type=int, help='games a pairing plays at most')
+    parser.add_argument('--store', help='keep every game in this SQLite file and skip the games it already has')
+    parser.add_argument('--training-data', help='write the positions of every game to .npy shards in this directory')
+    args = parser.parse_args()
+    if args.store is not None and args.seed is None:
+        parser.error('--store needs --seed')
+    time_control = None
+    if args.move_time is not None or args.game_time is not None:
+        time_control = TimeControl(args.move_time, args.game_time, args.increment, args.on_overrun)
+    draw_rules = None
+    if any(rule is not None for rule in (args.repetitions, args.quiet_plies, args.max_plies, args.material_margin)):
+        draw_rules = DrawRules(args.repetitions, args.quiet_plies, args.max_plies, args.material_margin)
+    tournament_args = dict(board_backend=args.backend, num_of_games=args.games, seed=args.seed,
+                           workers=args.workers, chunk_size=args.chunk_size, cache_size=args.cache_size,
+                           record_path=args.record, profile_path=args.profile, stacks_path=args.profile_stacks,
+                           time_control=time_control, isolate=args.isolate, tablebase_path=args.tablebase,
+                           draw_rules=draw_rules, book_path=args.book, opening_plies=args.opening_plies,
+                           store_path=args.store, training_data_path=args.training_data)
+    if args.adaptive:
+        Tournament.run_adaptive_tournament(min_games=args.min_games, max_pairing_games=args.max_pairing_games,
+                                           stopping=args.stopping, **tournament_args)
+    else:
+        Tournament.run_tournament(**tournament_args)
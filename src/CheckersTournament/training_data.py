@@ -0,0 +1,174 @@
+import os
+import re
+from typing import List, Iterator
+
+import numpy as np
+
+from game_elements.board import Board, PLAYABLE_SQUARES
+from game_record import BackgroundRecordWriter, GameRecordReader, GameRecord, decode_record, encode_line
+from move_generator import MoveGenerator
+
+# Every position a recorded game went through, one fixed width record per position:
+#   cells - cell code (see game_elements.piece) of every playable square, in Square.from_index order
+#   orientation - 1 when white is to move, -1 when black is
+#   legal_moves - number of legal lines of the player to move
+#   line - the line played, as in game records: number of squares, then their playable square indices, 0 padded
+#   ply - plies played before the position, result - winner of the game, 0 white, 1 black, -1 draw
+# Shards are .npy files of POSITION_DTYPE records, np.load(path, mmap_mode='r') maps them.
+MAX_LINE_SQUARES = 13
+POSITION_DTYPE = np.dtype([('cells', 'u1', (len(PLAYABLE_SQUARES), )), ('orientation', 'i1'),
+                           ('legal_moves', 'u2'), ('line', 'u1', (MAX_LINE_SQUARES + 1, )), ('ply', 'u2'),
+                           ('result', 'i1')])
+SHARD_NAME = 'positions-{:05d}.npy'
+SHARD_PATTERN = re.compile(r'positions-(\d{5})\.npy$')
+NPY_MAGIC = b'\x93NUMPY\x01\x00'
+# The header is rewritten in place with the number of records written so far, so it is padded to a fixed size
+NPY_HEADER_SIZE = 256
+# Flat row * 8 + col index of every playable square
+PLAYABLE_INDICES = np.array([square.row * Board.MAX_COL + square.col for square in PLAYABLE_SQUARES])
+
+
+def _npy_header(count: int) -> bytes:
+    header = repr({'descr': np.lib.format.dtype_to_descr(POSITION_DTYPE), 'fortran_order': False,
+                   'shape': (count, )}).encode()
+    padding = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2 - len(header) - 1
+    assert padding >= 0
+    return NPY_MAGIC + (NPY_HEADER_SIZE - len(NPY_MAGIC) - 2).to_bytes(2, 'little') + header + \
+        b' ' * padding + b'\n'
+
+
+def game_positions(record: GameRecord) -> np.ndarray:
+    # Replays a recorded game from the starting position
+    positions = np.zeros(len(record.lines), dtype=POSITION_DTYPE)
+    board = Board()
+    for ply, line in enumerate(record.lines):
+        position = positions[ply]
+        position['cells'] = np.array(board._board, dtype=np.uint8).ravel()[PLAYABLE_INDICES]
+        position['orientation'] = board.orientation
+        position['legal_moves'] = MoveGenerator.count_legal_moves(board, ply % 2)
+        encoded = encode_line(line)
+        position['line'][:len(encoded)] = list(encoded)
+        position['ply'] = ply
+        board.make_move(line)
+    positions['result'] = record.result
+    return positions
+
+
+def get_shard_paths(directory: str) -> List[str]:
+    names = sorted(name for name in os.listdir(directory) if SHARD_PATTERN.match(name))
+    return [os.path.join(directory, name) for name in names]
+
+
+class ShardWriter:
+    # Appends position records to the shards of directory, starting a new shard once the current one holds
+    # max_shard_bytes. Shards already in directory are kept, new ones are numbered after them. The header of the
+    # current shard is updated after every write, so the shards are readable while they are being written.
+    def __init__(self, directory: str, max_shard_bytes: int = 2 ** 26):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.shard_records = max(1, (max_shard_bytes - NPY_HEADER_SIZE) // POSITION_DTYPE.itemsize)
+        existing = get_shard_paths(directory)
+        self.shard_index = int(SHARD_PATTERN.search(existing[-1]).group(1)) + 1 if existing else 0
+        self.file = None
+        self.count = 0
+
+    def _open_shard(self):
+        path = os.path.join(self.directory, SHARD_NAME.format(self.shard_index))
+        self.shard_index += 1
+        self.file = open(path, 'wb')
+        self.file.write(_npy_header(0))
+        self.count = 0
+
+    def write(self, positions: np.ndarray):
+        while len(positions):
+            if self.file is None or self.count == self.shard_records:
+                self.close()
+                self._open_shard()
+            part = positions[:self.shard_records - self.count]
+            positions = positions[len(part):]
+            self.file.write(part.tobytes())
+            self.count += len(part)
+            self.file.seek(0)
+            self.file.write(_npy_header(self.count))
+            self.file.seek(0, os.SEEK_END)
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class TrainingDataWriter(BackgroundRecordWriter):
+    # Records the positions of every game as training data, a recorder for Match like GameRecorder. Tournaments
+    # hand it the records played in their workers with write_record. Games are replayed and written from the
+    # background thread.
+    def __init__(self, directory: str, max_shard_bytes: int = 2 ** 26):
+        self.shards = ShardWriter(directory, max_shard_bytes)
+        super().__init__()
+
+    def _write(self, record: bytes):
+        self.shards.write(game_positions(decode_record(record)))
+
+    def _close_output(self):
+        self.shards.close()
+
+
+class TrainingDataReader:
+    # Memory maps the shards of directory, positions are only read when a minibatch needs them
+    def __init__(self, directory: str):
+        self.shards = [np.load(path, mmap_mode='r') for path in get_shard_paths(directory)]
+        self.shards = [shard for shard in self.shards if len(shard)]
+        self.offsets = np.cumsum([0] + [len(shard) for shard in self.shards])
+
+    def __len__(self):
+        return int(self.offsets[-1])
+
+    def __getitem__(self, index: int) -> np.void:
+        shard = np.searchsorted(self.offsets, index, side='right') - 1
+        return self.shards[shard][index - self.offsets[shard]]
+
+    def read(self, start: int, stop: int) -> np.ndarray:
+        # Positions start to stop, in order, copied out of the shards they span
+        parts = []
+        for shard, offset in zip(self.shards, self.offsets):
+            if offset < stop and start < offset + len(shard):
+                parts.append(shard[max(start - offset, 0):stop - offset])
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=POSITION_DTYPE)
+
+    def minibatches(self, batch_size: int, seed=None, drop_last: bool = False) -> Iterator[np.ndarray]:
+        # One pass over every position in a random order. Only the order, 8 bytes a position, is held in memory.
+        order = np.random.default_rng(seed).permutation(len(self))
+        for start in range(0, len(order), batch_size):
+            indices = order[start:start + batch_size]
+            if drop_last and len(indices) < batch_size:
+                break
+            batch = np.empty(len(indices), dtype=POSITION_DTYPE)
+            shards = np.searchsorted(self.offsets, indices, side='right') - 1
+            for shard in np.unique(shards):
+                selected = shards == shard
+                batch[selected] = self.shards[shard][indices[selected] - self.offsets[shard]]
+            yield batch
+
+
+def convert_records(directory: str, record_paths: List[str], max_shard_bytes: int = 2 ** 26):
+    shards = ShardWriter(directory, max_shard_bytes)
+    try:
+        for path in record_paths:
+            with GameRecordReader(path) as reader:
+                for record in reader:
+                    shards.write(game_positions(record))
+    finally:
+        shards.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Write the positions of recorded games as training data shards')
+    parser.add_argument('directory')
+    parser.add_argument('records', nargs='+')
+    parser.add_argument('--max-shard-bytes', type=int, default=2 ** 26)
+    args = parser.parse_args()
+    convert_records(args.directory, args.records, args.max_shard_bytes)
+    print(f'{len(TrainingDataReader(args.directory))} positions in {args.directory}')
@@ -0,0 +1,40 @@
+from collections import OrderedDict
+
+DEFAULT_TABLE_SIZE = 2 ** 16
+
+
+class TranspositionTable:
+    # Size capped position cache, the least recently used entry is replaced once the table is full
+    def __init__(self, max_size: int = DEFAULT_TABLE_SIZE):
+        assert max_size > 0
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries
+
+    def get(self, key, default=None):
+        value = self.entries.get(key, self)
+        if value is self:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+        elif len(self.entries) >= self.max_size:
+            self.entries.popitem(last=False)
+        self.entries[key] = value
+
+    def clear(self):
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
@@ -0,0 +1,125 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from strategies.linear_evaluation import FEATURES, DEFAULT_WEIGHTS, position_features, get_weights_vector
+from training_data import TrainingDataReader
+
+# Texel tuning: the weights w of LinearEvaluation are fitted so that sigmoid(scale * features . w), the expected
+# score of white in a position, predicts the results of the games the training data positions come from. The
+# mean squared error and its gradient are computed over chunks of positions in worker processes, every worker
+# keeps the features of its chunks between iterations.
+SCALES = np.logspace(-2, 1, 61)
+
+# Features and white scores of chunks, kept for the whole life of a (worker) process
+_process_chunks = {}
+
+
+def load_chunk(directory: str, start: int, stop: int, quiet_only: bool = True) -> tuple:
+    key = (directory, start, stop, quiet_only)
+    if key not in _process_chunks:
+        positions = TrainingDataReader(directory).read(start, stop)
+        if quiet_only:
+            # Positions where a capture was played are left out, their evaluation changes on the next ply
+            rows = positions['line'][:, 1:3] // 4
+            positions = positions[np.abs(rows[:, 1].astype(int) - rows[:, 0]) == 1]
+        scores = np.where(positions['result'] == 0, 1.0, np.where(positions['result'] == 1, 0.0, 0.5))
+        _process_chunks[key] = position_features(positions['cells']), scores
+    return _process_chunks[key]
+
+
+def chunk_loss(features: np.ndarray, scores: np.ndarray, weights: np.ndarray, scale: float) -> tuple:
+    # (sum of squared errors, its gradient by the weights) over a chunk
+    predicted = 1 / (1 + np.exp(-scale * (features @ weights)))
+    errors = predicted - scores
+    return float(errors @ errors), features.T @ (2 * scale * errors * predicted * (1 - predicted))
+
+
+def _chunk_task(task: tuple) -> tuple:
+    *chunk, weights, scale = task
+    features, scores = load_chunk(*chunk)
+    return (*chunk_loss(features, scores, weights, scale), len(scores))
+
+
+class TexelTuner:
+    def __init__(self, directory: str, workers: int = 1, chunk_size: int = 2 ** 18, quiet_only: bool = True):
+        self.directory = directory
+        size = len(TrainingDataReader(directory))
+        self.chunks = [(directory, start, min(start + chunk_size, size), quiet_only)
+                       for start in range(0, size, chunk_size)]
+        self.executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+        # Set by tune
+        self.scale = None
+
+    def loss(self, weights: np.ndarray, scale: float) -> tuple:
+        # (mean squared error, its gradient by the weights) over every position
+        tasks = [(*chunk, weights, scale) for chunk in self.chunks]
+        results = map(_chunk_task, tasks) if self.executor is None else self.executor.map(_chunk_task, tasks)
+        total, gradient, count = 0.0, np.zeros(len(FEATURES)), 0
+        for chunk_total, chunk_gradient, chunk_count in results:
+            total += chunk_total
+            gradient += chunk_gradient
+            count += chunk_count
+        if count == 0:
+            raise ValueError(f'no positions to tune on in {self.directory}')
+        return total / count, gradient / count
+
+    def fit_scale(self, weights: dict = None) -> float:
+        # The scale turning evaluations into expected scores best, for the weights tuning starts from
+        vector = get_weights_vector(weights or DEFAULT_WEIGHTS)
+        return float(min(SCALES, key=lambda scale: self.loss(vector, scale)[0]))
+
+    def tune(self, weights: dict = None, iterations: int = 200, learning_rate: float = 0.05, scale: float = None,
+             tolerance: float = 1e-9) -> dict:
+        # Adam steps from weights (DEFAULT_WEIGHTS by default) until the loss improves by less than tolerance
+        weights = weights or DEFAULT_WEIGHTS
+        if scale is None:
+            scale = self.fit_scale(weights)
+        vector = get_weights_vector(weights)
+        first_moment, second_moment = np.zeros_like(vector), np.zeros_like(vector)
+        beta1, beta2 = 0.9, 0.999
+        last_loss = None
+        for step in range(1, iterations + 1):
+            loss, gradient = self.loss(vector, scale)
+            if last_loss is not None and abs(last_loss - loss) < tolerance:
+                break
+            last_loss = loss
+            first_moment = beta1 * first_moment + (1 - beta1) * gradient
+            second_moment = beta2 * second_moment + (1 - beta2) * gradient ** 2
+            vector = vector - learning_rate * (first_moment / (1 - beta1 ** step)) / \
+                (np.sqrt(second_moment / (1 - beta2 ** step)) + 1e-12)
+        self.scale = scale
+        return {name: float(weight) for name, weight in zip(FEATURES, vector)}
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Tune LinearEvaluationStrategy weights on training data')
+    parser.add_argument('directory', help='training data shards, see training_data.py')
+    parser.add_argument('--output', help='write the weights to this JSON file')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--chunk-size', type=int, default=2 ** 18, help='positions per worker task')
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--learning-rate', type=float, default=0.05)
+    parser.add_argument('--all-positions', action='store_true', help='tune on positions where a capture was played')
+    args = parser.parse_args()
+    with TexelTuner(args.directory, args.workers, args.chunk_size, not args.all_positions) as tuner:
+        tuned = tuner.tune(iterations=args.iterations, learning_rate=args.learning_rate)
+        print(f'scale {tuner.scale:.4f}, loss {tuner.loss(get_weights_vector(tuned), tuner.scale)[0]:.6f}')
+    print(json.dumps(tuned, indent=2))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(tuned, f, indent=2)
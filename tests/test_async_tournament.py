@@ -0,0 +1,87 @@
+import io
+import os
+import sys
+
+from CheckersTournament import engine_protocol
+from CheckersTournament.async_tournament import AsyncTournament
+from CheckersTournament.engine_protocol import encode_message, decode_message, encode_move_request, \
+    decode_move_request, serve_strategy
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.game_elements.piece import PlayerId
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.strategies import LongestLineStrategy
+from CheckersTournament.time_control import TimeControl
+
+ENGINE = [sys.executable, engine_protocol.__file__]
+SLEEPING_ENGINE = [sys.executable, '-c', f'''
+import sys, time
+sys.path.insert(0, {os.path.dirname(engine_protocol.__file__)!r})
+from engine_protocol import serve_strategy
+from strategies import Strategy
+
+class SleepingStrategy(Strategy):
+    def choose_best_move(self, board, legal_moves):
+        time.sleep(60)
+
+serve_strategy(SleepingStrategy)
+''']
+# Answers move requests with reply, after a valid handshake
+MISBEHAVING_ENGINE = '''
+import json, sys
+print(json.dumps({{"type": "ready", "name": "misbehaving", "protocol": 1}}), flush=True)
+for line in sys.stdin:
+    if json.loads(line)["type"] == "move":
+        print({reply!r}, flush=True)
+'''
+
+
+def test_move_request_round_trip():
+    board = Board()
+    board.run_moves(MoveGenerator.get_player_legal_moves(board, PlayerId.white.value)[0])
+    board.rotate()
+    legal_moves = MoveGenerator.get_player_legal_moves(board, PlayerId.black.value)
+    message = decode_message(encode_message(encode_move_request(1, board, legal_moves, seed=3, time_left=0.5)))
+    decoded, decoded_moves = decode_move_request(message)
+    assert str(decoded) == str(board) and decoded.orientation == board.orientation
+    assert decoded.zobrist_hash == board.zobrist_hash
+    assert decoded_moves == legal_moves
+
+
+def test_serve_strategy():
+    board = Board()
+    legal_moves = MoveGenerator.get_player_legal_moves(board, PlayerId.white.value)
+    requests = [{'type': 'new_game', 'player': PlayerId.white.value},
+                encode_move_request(7, board, legal_moves, seed=1), {'type': 'quit'}]
+    output = io.BytesIO()
+    stdout = sys.stdout
+    serve_strategy(LongestLineStrategy, io.BytesIO(b''.join(map(encode_message, requests))), output)
+    # Only the strategy's own prints go to stderr, the caller's stdout is left alone
+    assert sys.stdout is stdout
+    ready, reply = [decode_message(line) for line in output.getvalue().splitlines()]
+    assert ready['name'] == 'LongestLineStrategy'
+    assert reply['id'] == 7 and 0 <= reply['index'] < len(legal_moves)
+
+
+def test_engines_tournament():
+    engines = {name: ENGINE + [name] for name in ('RandomStrategy', 'LongestLineStrategy', 'TowardEnemyCenter')}
+    result = AsyncTournament(engines, pool_size=1).run(num_of_games=2, seed=4)
+    assert AsyncTournament(engines, pool_size=2, max_concurrent_games=6).run(num_of_games=2, seed=4) == result
+    assert all(result[i][i] == -1 for i in range(3))
+
+
+def test_move_timeout_forfeits():
+    engines = {'sleeping': SLEEPING_ENGINE, 'random': ENGINE + ['RandomStrategy']}
+    tournament = AsyncTournament(engines, time_control=TimeControl(move_time=0.2), max_concurrent_games=1)
+    # The sleeping engine is killed at every move it overruns and restarted for its next game
+    assert tournament.run(num_of_games=2, seed=1) == [[-1, 0.0], [1.0, -1]]
+
+
+def test_misbehaving_engines_lose():
+    for reply in ('debug: thinking', '5'):
+        engines = {'misbehaving': [sys.executable, '-c', MISBEHAVING_ENGINE.format(reply=reply)],
+                   'random': ENGINE + ['RandomStrategy']}
+        tournament = AsyncTournament(engines, time_control=TimeControl(move_time=5), max_concurrent_games=1)
+        assert tournament.run(num_of_games=2, seed=1) == [[-1, 0.0], [1.0, -1]]
+    # An engine exiting before its handshake loses every game it can not be started for
+    engines = {'broken': [sys.executable, '-c', 'pass'], 'random': ENGINE + ['RandomStrategy']}
+    assert AsyncTournament(engines).run(num_of_games=2, seed=1) == [[-1, 0.0], [1.0, -1]]
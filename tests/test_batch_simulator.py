@@ -0,0 +1,41 @@
+import random
+
+import numpy as np
+
+from CheckersTournament.batch_simulator import BatchSimulator, encode_board, decode_board
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.game_elements.piece import PlayerId
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.strategies import BatchRandomStrategy, BatchLongestLineStrategy
+from test_move_generator import random_board
+
+
+def test_encode_decode():
+    board = Board()
+    assert str(decode_board(encode_board(board))) == str(board)
+
+
+def test_lines_match_move_generator():
+    rng = random.Random(21)
+    for _ in range(300):
+        board = random_board(rng)
+        player = rng.choice((PlayerId.white.value, PlayerId.black.value))
+        # The batch engine has no orientation, a player always moves in its own forward direction
+        if board.orientation != (1 if player == PlayerId.white.value else -1):
+            board.rotate()
+        expected = MoveGenerator.get_player_legal_moves(board, player)
+        lines = BatchSimulator.get_legal_lines(encode_board(board)[None], np.array([0]), player)
+        assert sorted(lines.to_moves(i) for i in range(len(lines))) == sorted(expected)
+        for i in range(len(lines)):
+            played = Board.duplicate(board)
+            played.run_moves(lines.to_moves(i))
+            assert str(decode_board(lines.resulting_boards[i])) == str(played)
+
+
+def test_batch_games_finish():
+    simulator = BatchSimulator(64, max_plies=300, seed=3)
+    winners, plies = simulator.run(BatchLongestLineStrategy(), BatchRandomStrategy())
+    assert winners.shape == (64, )
+    assert set(np.unique(winners)) <= {-1, 0, 1}
+    assert (plies > 0).all()
+    assert (winners >= 0).sum() > 32
@@ -0,0 +1,86 @@
+import random
+
+from CheckersTournament.game import GameMechanics
+from CheckersTournament.game_elements import get_board_class
+from CheckersTournament.game_elements.bitboard import BitBoard, square_to_index, index_to_square
+from CheckersTournament.game_elements.board import Board, Square
+from CheckersTournament.game_elements.piece import PieceType, PlayerId
+
+BOARD_STR = """---------------------------------
+|   |@@@|   |@@@|   |@@@|   |@@@|
+---------------------------------
+|@@@|   |@@@|1,0|@@@|   |@@@|2,0|
+---------------------------------
+|   |@@@|   |@@@|   |@@@|1,0|@@@|
+---------------------------------
+|@@@|   |@@@|1,0|@@@|   |@@@|   |
+---------------------------------
+|2,0|@@@|   |@@@|1,1|@@@|   |@@@|
+---------------------------------
+|@@@|   |@@@|1,1|@@@|   |@@@|   |
+---------------------------------
+|   |@@@|1,1|@@@|   |@@@|   |@@@|
+---------------------------------
+|@@@|   |@@@|   |@@@|   |@@@|   |
+---------------------------------"""
+
+
+def test_square_index():
+    for index in range(32):
+        assert square_to_index(index_to_square(index)) == index
+
+
+def test_str():
+    assert str(BitBoard()) == str(Board())
+    assert str(BitBoard.load_from_str(BOARD_STR)) == BOARD_STR
+
+
+def test_get_board_class():
+    assert get_board_class() is Board
+    assert get_board_class('bitboard') is BitBoard
+
+
+def test_crowning():
+    board = BitBoard.load_from_str(BOARD_STR)
+    moves = GameMechanics.get_valid_captures(board, Square(4, 4), True)
+    board.run_moves(moves[0])
+    piece, player = board.get_location(Square(0, 4))
+    assert piece == PieceType.king
+    assert player == PlayerId.black.value
+
+
+def test_same_games_as_list_board():
+    rng = random.Random(7)
+    for _ in range(5):
+        board, bit_board = Board(), BitBoard()
+        player = PlayerId.white.value
+        for ply in range(200):
+            legal_moves = sorted(GameMechanics.get_player_legal_moves(board, player))
+            assert legal_moves == sorted(GameMechanics.get_player_legal_moves(bit_board, player))
+            if not legal_moves:
+                break
+            line = rng.choice(legal_moves)
+            board.run_moves(line)
+            bit_board.run_moves(line)
+            assert str(board) == str(bit_board)
+            for p in (PlayerId.white.value, PlayerId.black.value):
+                assert sorted(board.get_player_pieces_location(p)) == \
+                    sorted(bit_board.get_player_pieces_location(p))
+            board.rotate()
+            bit_board.rotate()
+            player ^= 1
+
+
+def test_move_hop_by_hop():
+    # Hops one at a time and whole lines update the masks and the hash like the list board, crowning included
+    for line in GameMechanics.get_valid_captures(Board.load_from_str(BOARD_STR), Square(4, 4), True):
+        board, hop_board, line_board = (Board.load_from_str(BOARD_STR), BitBoard.load_from_str(BOARD_STR),
+                                        BitBoard.load_from_str(BOARD_STR))
+        for move in line:
+            board.move(move)
+            hop_board.move(move)
+            assert str(hop_board) == str(board)
+            assert hop_board.zobrist_hash == board.zobrist_hash
+        line_board.run_moves(line)
+        assert str(line_board) == str(board)
+        assert line_board.zobrist_hash == board.zobrist_hash
@@ -1,3 +1,5 @@
+import pickle
+
 from CheckersTournament.game_elements.board import Square, Vector, Move, Board
 
 def test_square():
@@ -39,3 +41,12 @@ def test_str():
 ---------------------------------"""
     b = Board.load_from_str(board_str)
     assert str(b) == board_str
+
+
+def test_square_interning():
+    assert Square(3, 5) is Square(3, 5)
+    assert Square(3, 5) + Vector(1, 1) is Square(4, 6)
+    assert Square(0, 0) != (0, 0)
+    assert Square(-1, 9) == Square(-1, 9)
+    assert Square.from_index(5) is Square(1, 3)
+    assert pickle.loads(pickle.dumps(Square(2, 4))) is Square(2, 4)
@@ -0,0 +1,60 @@
+from CheckersTournament.draw_rules import DrawRules
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.game_elements.piece import PlayerId
+from CheckersTournament.match import Player, Match
+from CheckersTournament.strategies import RandomStrategy, TowardEnemyCenter
+from CheckersTournament.strategies.search_strategy import material_evaluation
+from CheckersTournament.tournament import Tournament
+
+
+def play(white, black, draw_rules, seed):
+    match = Match([Player(PlayerId.white.value, white), Player(PlayerId.black.value, black)], Board(), seed=seed,
+                  draw_rules=draw_rules)
+    return match, match.match()
+
+
+def test_rules():
+    draw_rules = DrawRules(repetitions=3, quiet_plies=40, max_plies=None, material_margin=2)
+    assert not draw_rules.is_draw(2, 39, 1000)
+    assert draw_rules.is_draw(3, 0, 0)
+    assert draw_rules.is_draw(1, 40, 0)
+    assert DrawRules(repetitions=None, max_plies=10).is_draw(5, 0, 10)
+    assert draw_rules.is_decisive_material(-2.5) and not draw_rules.is_decisive_material(1.5)
+
+
+def test_max_plies():
+    match, winner = play(RandomStrategy, RandomStrategy, DrawRules(repetitions=None, max_plies=10), seed=1)
+    assert winner == Match.DRAW
+    assert match.moves_count == 10
+
+
+def test_repetition_and_quiet_draws():
+    draw_rules = DrawRules(repetitions=3, quiet_plies=40)
+    draws = 0
+    for seed in range(10):
+        match, winner = play(TowardEnemyCenter, RandomStrategy, draw_rules, seed)
+        if winner != Match.DRAW:
+            continue
+        draws += 1
+        assert match.quiet_plies >= 40 or max(match.position_counts.values()) >= 3
+    assert draws > 0
+
+
+def test_material_adjudication():
+    draw_rules = DrawRules(repetitions=None, material_margin=3)
+    adjudicated = 0
+    for seed in range(5):
+        match, winner = play(RandomStrategy, RandomStrategy, draw_rules, seed)
+        if match.adjudicated_winner is None:
+            continue
+        adjudicated += 1
+        assert match.adjudicated_winner == winner
+        assert material_evaluation(match.board, match.players[winner].player_id) >= 3
+    assert adjudicated > 0
+
+
+def test_draw_rates():
+    winners = [0, 1, Match.DRAW, Match.DRAW, 1, 1, 0, 1]
+    win_rates, draw_rates = Tournament.get_rates(winners, [(0, 1), (1, 0)], 4, 2)
+    assert win_rates == [[-1, 0.25], [0.25, -1]]
+    assert draw_rates == [[-1, 0.5], [0.0, -1]]
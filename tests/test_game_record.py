@@ -0,0 +1,74 @@
+import random
+
+import pytest
+
+from CheckersTournament.game_elements.board import Board, Square, Move
+from CheckersTournament.game_elements.piece import PlayerId
+from CheckersTournament.game_record import GameRecorder, GameRecordReader, encode_line, decode_line
+from CheckersTournament.match import Player, Match
+from CheckersTournament.strategies import RandomStrategy, LongestLineStrategy
+from CheckersTournament.tournament import Tournament
+
+
+def test_line_round_trip():
+    capture = [Move(Square(1, 1), Square(2, 2)), Move(Square(2, 2), Square(3, 3)),
+               Move(Square(3, 3), Square(2, 4)), Move(Square(2, 4), Square(1, 5))]
+    step = [Move(Square(2, 2), Square(3, 3))]
+    for line in (capture, step):
+        assert decode_line(encode_line(line)[1:]) == line
+
+
+def test_record_and_replay(tmp_path):
+    path = str(tmp_path / 'games.ckgr')
+    final_boards, winners = [], []
+    with GameRecorder(path) as recorder:
+        for seed in range(5):
+            match = Match([Player(PlayerId.white.value, RandomStrategy),
+                           Player(PlayerId.black.value, LongestLineStrategy)], Board(),
+                          recorder=recorder, seed=seed)
+            winners.append(match.match())
+            final_boards.append(str(match.board))
+    with GameRecorder(path) as recorder:
+        match = Match([Player(PlayerId.white.value, RandomStrategy),
+                       Player(PlayerId.black.value, RandomStrategy)], Board(), recorder=recorder)
+        match.match()
+    with GameRecordReader(path) as reader:
+        assert len(reader) == 6
+        for index in random.Random(0).sample(range(5), 5):
+            record = reader[index]
+            assert (record.white, record.black) == ('RandomStrategy', 'LongestLineStrategy')
+            assert (record.seed, record.result) == (index, winners[index])
+            assert str(reader.replay(index)) == final_boards[index]
+        assert reader[5].seed is None
+        assert len(reader.replay(0, plies=2).get_player_pieces_location(PlayerId.white.value)) == 12
+
+
+def test_tournament_records(tmp_path):
+    path = str(tmp_path / 'games.ckgr')
+    Tournament.run_tournament(num_of_games=2, seed=1, workers=2, record_path=path)
+    with GameRecordReader(path) as reader:
+        assert len(reader) == 12
+        assert all(record.seed is not None for record in reader)
+
+
+class FailingFile:
+    closed = False
+
+    def write(self, data):
+        raise OSError('disk full')
+
+    def close(self):
+        self.closed = True
+
+
+def test_write_error_is_raised(tmp_path):
+    recorder = GameRecorder(str(tmp_path / 'games.ckgr'))
+    recorder.file.close()
+    recorder.file = failing = FailingFile()
+    recorder.write_record(b'record')
+    with pytest.raises(OSError):
+        recorder.close()
+    # The file is closed even though the thread stopped on the error
+    assert failing.closed
+    with pytest.raises(OSError):
+        recorder.write_record(b'record')
@@ -0,0 +1,31 @@
+import random
+
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.game_elements.piece import PlayerId
+from CheckersTournament.match import Player, Match
+from CheckersTournament.move_generator import IncrementalMoveGenerator
+from CheckersTournament.strategies import RandomStrategy, LongestLineStrategy, TowardEnemyCenter
+
+
+def test_incremental_matches_full_regeneration():
+    strategies = [RandomStrategy, LongestLineStrategy, TowardEnemyCenter]
+    incremental_moves = IncrementalMoveGenerator(debug=True)
+    rng = random.Random(8)
+    for seed in range(20):
+        match = Match([Player(PlayerId.white.value, rng.choice(strategies)),
+                       Player(PlayerId.black.value, rng.choice(strategies))], Board(),
+                      seed=seed, incremental_moves=incremental_moves)
+        match.match()
+    assert incremental_moves.regenerated > 0
+
+
+def test_same_games_as_full_regeneration():
+    for seed in range(5):
+        boards = []
+        for incremental_moves in (None, IncrementalMoveGenerator()):
+            match = Match([Player(PlayerId.white.value, RandomStrategy),
+                           Player(PlayerId.black.value, RandomStrategy)], Board(),
+                          seed=seed, incremental_moves=incremental_moves)
+            match.match()
+            boards.append((str(match.board), match.moves_count))
+        assert boards[0] == boards[1]
@@ -0,0 +1,69 @@
+import random
+
+from CheckersTournament.game_elements.bitboard import BitBoard
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.move_generator import MoveGenerator
+
+
+def state(board):
+    return str(board), board.zobrist_hash, board.orientation, [list(board.player_pieces[player]) for player in (0, 1)]
+
+
+def random_positions(board_cls, seed, plies=120):
+    # (board, player, legal moves) along a random game
+    rng = random.Random(seed)
+    board = board_cls()
+    player = 0
+    for _ in range(plies):
+        legal_moves = MoveGenerator.get_player_legal_moves(board, player)
+        if not legal_moves:
+            return
+        yield board, player, legal_moves
+        board.run_moves(rng.choice(legal_moves))
+        board.rotate()
+        player ^= 1
+
+
+def test_unmake_restores_board():
+    for board_cls in (Board, BitBoard):
+        captures = 0
+        for seed in range(5):
+            for board, _, legal_moves in random_positions(board_cls, seed):
+                before = state(board)
+                for line in legal_moves:
+                    # Capture lines hold a pair of moves per hop
+                    captures += len(line) > 1
+                    for rotate in (True, False):
+                        board.unmake_move(board.make_move(line, rotate))
+                        assert state(board) == before
+        assert captures
+
+
+def test_make_move_matches_run_moves():
+    for board_cls in (Board, BitBoard):
+        for board, _, legal_moves in random_positions(board_cls, 7):
+            for line in legal_moves:
+                expected = board.snapshot()
+                expected.run_moves(line)
+                expected.rotate()
+                undo = board.make_move(line)
+                assert state(board) == state(expected)
+                board.unmake_move(undo)
+
+
+def test_snapshot_is_independent():
+    for board_cls in (Board, BitBoard):
+        for board, _, legal_moves in random_positions(board_cls, 2, plies=60):
+            before = state(board)
+            snapshot = board.snapshot()
+            assert state(snapshot) == before
+            snapshot.make_move(legal_moves[0])
+            assert state(board) == before
+            played = state(snapshot)
+            board.unmake_move(board.make_move(legal_moves[-1]))
+            assert state(board) == before and state(snapshot) == played
+            # A snapshot taken between make and unmake keeps the move
+            undo = board.make_move(legal_moves[0])
+            snapshot = board.snapshot()
+            board.unmake_move(undo)
+            assert state(board) == before and state(snapshot) == played
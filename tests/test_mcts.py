@@ -0,0 +1,66 @@
+import random
+
+import pytest
+
+from CheckersTournament.draw_rules import DrawRules
+from CheckersTournament.game_elements.board import Board, Square
+from CheckersTournament.game_elements.piece import PieceType, PlayerId
+from CheckersTournament.match import Match, Player
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.strategies import MCTSStrategy, RandomStrategy
+from CheckersTournament.strategies.mcts_strategy import rollout, LONGEST_LINE_ROLLOUT
+
+
+def nodes(node):
+    yield node
+    for child in node.children:
+        yield from nodes(child)
+
+
+def play(workers, seed=5):
+    match = Match([Player(PlayerId.white.value, MCTSStrategy, max_nodes=48, time_limit=None, workers=workers,
+                         batch_size=4),
+                   Player(PlayerId.black.value, RandomStrategy)], Board(), seed=seed,
+                  draw_rules=DrawRules(max_plies=120))
+    return match.match(), match.moves_count, str(match.board)
+
+
+def test_beats_random():
+    assert all(play(1, seed)[0] == PlayerId.white.value for seed in range(3))
+
+
+def test_parallel_rollouts_play_the_same():
+    # Rollouts are seeded when their leaf is selected, whichever process plays them
+    assert play(2) == play(1)
+
+
+def test_tree_is_reused():
+    random.seed(1)
+    board = Board()
+    strategy = MCTSStrategy(PlayerId.white.value, max_nodes=300, time_limit=None, batch_size=3)
+    line = strategy.choose_best_move(board, MoveGenerator.get_player_legal_moves(board, PlayerId.white.value))
+    assert all(node.virtual_losses == 0 for node in nodes(strategy.root))
+    assert sum(child.visits for child in strategy.root.children) >= 300
+    played = next(child for child in strategy.root.children if child.line == line)
+    board.make_move(line)
+    reply = max(played.children, key=lambda child: child.visits)
+    board.make_move(reply.line)
+    visits = reply.visits
+    strategy.choose_best_move(board, MoveGenerator.get_player_legal_moves(board, PlayerId.white.value))
+    assert strategy.root is reply and strategy.root.parent is None
+    assert strategy.root.visits == visits + strategy.simulations
+
+
+def test_rollout():
+    board = Board(empty=True)
+    board.set_location(Square(2, 2), PieceType.man, PlayerId.white.value)
+    board.set_location(Square(3, 3), PieceType.man, PlayerId.black.value)
+    board.rotate()
+    # Black takes the only white piece, white has no move left
+    assert rollout(board, PlayerId.black.value, seed=1, policy=LONGEST_LINE_ROLLOUT) == PlayerId.black.value
+
+
+def test_search_must_stop():
+    with pytest.raises(ValueError):
+        MCTSStrategy(PlayerId.white.value, time_limit=None)
+    assert MCTSStrategy(PlayerId.white.value, time_limit=None, max_nodes=10).max_nodes == 10
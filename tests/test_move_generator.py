@@ -0,0 +1,70 @@
+import random
+
+from CheckersTournament.game import GameMechanics
+from CheckersTournament.move_generator import MoveGenerator, MoveTables
+from CheckersTournament.game_elements.bitboard import BitBoard
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.game_elements.piece import PieceType, PlayerId
+
+
+def random_board(rng, board_cls=Board):
+    board = board_cls(empty=True)
+    squares = rng.sample(MoveTables.SQUARES, rng.randint(2, 16))
+    for square in squares:
+        piece = PieceType.king if rng.random() < 0.3 else PieceType.man
+        board.set_location(square, piece, rng.choice((PlayerId.white.value, PlayerId.black.value)))
+    if rng.random() < 0.5:
+        board.rotate()
+    return board
+
+
+def test_random_positions_match_game_mechanics():
+    rng = random.Random(1234)
+    for board_cls in (Board, BitBoard):
+        for _ in range(500):
+            board = random_board(rng, board_cls)
+            for player in (PlayerId.white.value, PlayerId.black.value):
+                assert MoveGenerator.get_player_legal_moves(board, player) == \
+                    GameMechanics.get_player_legal_moves(board, player)
+
+
+def test_played_games_match_game_mechanics():
+    rng = random.Random(99)
+    for _ in range(10):
+        board = Board()
+        player = PlayerId.white.value
+        for ply in range(150):
+            legal_moves = GameMechanics.get_player_legal_moves(board, player)
+            assert MoveGenerator.get_player_legal_moves(board, player) == legal_moves
+            if not legal_moves:
+                break
+            board.run_moves(rng.choice(legal_moves))
+            board.rotate()
+            player ^= 1
+
+
+def test_streamed_moves_match_move_lists():
+    rng = random.Random(77)
+    for board_cls in (Board, BitBoard):
+        for _ in range(500):
+            board = random_board(rng, board_cls)
+            for player in (PlayerId.white.value, PlayerId.black.value):
+                legal_moves = MoveGenerator.get_player_legal_moves(board, player)
+                assert list(MoveGenerator.iter_player_legal_moves(board, player)) == legal_moves
+                assert MoveGenerator.count_legal_moves(board, player) == len(legal_moves)
+                assert MoveGenerator.count_legal_moves(board, player, limit=2) == min(len(legal_moves), 2)
+                assert MoveGenerator.has_any_legal_move(board, player) == bool(legal_moves)
+                assert GameMechanics.count_legal_moves(board, player) == len(legal_moves)
+
+
+def test_streamed_moves_stop_early():
+    board = Board()
+    first = next(MoveGenerator.iter_player_legal_moves(board, PlayerId.white.value))
+    assert first == MoveGenerator.get_player_legal_moves(board, PlayerId.white.value)[0]
+    # Captures are mandatory, no step is looked at once one was found
+    board = BitBoard(empty=True)
+    board.set_location(MoveTables.SQUARES[13], PieceType.man, PlayerId.white.value)
+    board.set_location(MoveTables.SQUARES[17], PieceType.man, PlayerId.black.value)
+    board.set_location(MoveTables.SQUARES[0], PieceType.man, PlayerId.white.value)
+    lines = list(MoveGenerator.iter_player_legal_moves(board, PlayerId.white.value))
+    assert lines and all(len(line) > 1 for line in lines)
@@ -0,0 +1,93 @@
+import pytest
+
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.game_elements.piece import PlayerId
+from CheckersTournament.game_record import GameRecorder, GameRecordReader, GameRecordBuffer
+from CheckersTournament.match import Player, Match
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.opening_book import OpeningBook, build_opening_book, random_opening, GAMES, WINS
+from CheckersTournament.strategies import RandomStrategy, LongestLineStrategy
+from CheckersTournament import tournament
+from CheckersTournament.tournament import Tournament, get_opening_seed
+
+NUM_OF_GAMES = 20
+
+
+@pytest.fixture(scope='module')
+def book_paths(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('book')
+    records, book = str(directory / 'games.ckgr'), str(directory / 'book.bin')
+    with GameRecorder(records) as recorder:
+        for seed in range(NUM_OF_GAMES):
+            Match([Player(PlayerId.white.value, RandomStrategy),
+                   Player(PlayerId.black.value, LongestLineStrategy)], Board(), recorder=recorder, seed=seed).match()
+    build_opening_book(book, [records], max_plies=8)
+    return records, book
+
+
+def test_statistics(book_paths):
+    records, path = book_paths
+    book = OpeningBook(path)
+    board = Board()
+    lines = book.get_book_lines(board, MoveGenerator.get_player_legal_moves(board, PlayerId.white.value))
+    assert sum(stats[GAMES] for _, stats in lines) == NUM_OF_GAMES
+    with GameRecordReader(records) as reader:
+        white_wins = sum(record.result == PlayerId.white.value for record in reader)
+    assert sum(stats[WINS] for _, stats in lines) == white_wins
+
+
+def test_strategy_plays_book_until_exit(book_paths):
+    records, path = book_paths
+    book = OpeningBook(path)
+    strategy = LongestLineStrategy(PlayerId.white.value, opening_book=book)
+    board = Board()
+    legal_moves = MoveGenerator.get_player_legal_moves(board, PlayerId.white.value)
+    assert strategy.choose_best_move(board, legal_moves) == book.best_move(board, legal_moves)
+    # Past the plies that went in the book every position is a book exit
+    with GameRecordReader(records) as reader:
+        board = reader.replay(0, plies=8)
+    player_id = PlayerId.white.value
+    assert book.best_move(board, MoveGenerator.get_player_legal_moves(board, player_id)) is None
+
+
+def test_random_openings(book_paths):
+    _, path = book_paths
+    book = OpeningBook(path)
+    opening = random_opening(6, seed=3, book=book)
+    assert opening == random_opening(6, seed=3, book=book)
+    assert 0 < len(opening) <= 6
+    assert len(random_opening(20, seed=3, book=book)) <= 8
+    assert len(random_opening(6, seed=3)) == 6
+    assert get_opening_seed(1, 0, 2, 5) == get_opening_seed(1, 2, 0, 5)
+
+
+def test_match_starts_after_opening(tmp_path):
+    opening = random_opening(4, seed=1)
+    recorder = GameRecordBuffer()
+    match = Match([Player(PlayerId.white.value, RandomStrategy),
+                   Player(PlayerId.black.value, RandomStrategy)], Board(), recorder=recorder, seed=1,
+                  opening=opening)
+    match.match()
+    assert match.moves_count > len(opening)
+    path = tmp_path / 'games.ckgr'
+    with GameRecorder(str(path)) as file_recorder:
+        file_recorder.write_record(recorder.getvalue())
+    with GameRecordReader(str(path)) as reader:
+        assert reader[0].lines[:len(opening)] == opening
+
+
+def test_unseeded_tournament_shares_openings(monkeypatch):
+    # Without a seed both colorings of a pairing still start from the same openings
+    work_units = []
+    play_work_unit = tournament._play_work_unit
+
+    def recording_play_work_unit(work_unit):
+        work_units.append(work_unit)
+        return play_work_unit(work_unit)
+
+    monkeypatch.setattr(tournament, '_play_work_unit', recording_play_work_unit)
+    Tournament.run_tournament(num_of_games=2, strategies=[RandomStrategy, LongestLineStrategy], opening_plies=4)
+    openings = {(unit.white_strategy, index % 2): unit.opening_seed for index, unit in enumerate(work_units)}
+    assert None not in openings.values()
+    for game_index in range(2):
+        assert openings[(RandomStrategy, game_index)] == openings[(LongestLineStrategy, game_index)]
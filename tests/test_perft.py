@@ -0,0 +1,46 @@
+from CheckersTournament.game import GameMechanics
+from CheckersTournament.game_elements.bitboard import BitBoard
+from CheckersTournament.game_elements.board import Board, Square, Move
+from CheckersTournament.perft import perft, perft_divide, line_to_str
+from CheckersTournament.transposition_table import TranspositionTable
+
+# Node counts from the starting position with white to move
+OPENING_PERFT = {1: 7, 2: 49, 3: 302, 4: 1469, 5: 7493}
+
+
+def test_opening_perft():
+    board = Board()
+    for depth, nodes in OPENING_PERFT.items():
+        assert perft(board, 0, depth) == nodes
+    assert perft(board, 0, 4, GameMechanics) == OPENING_PERFT[4]
+    assert str(board) == str(Board()) and board.orientation == 1
+
+
+def test_bitboard_perft():
+    # Bit-parallel generation and mask based make/unmake count the same nodes
+    board = BitBoard()
+    for depth, nodes in OPENING_PERFT.items():
+        assert perft(board, 0, depth) == nodes
+    assert perft(board, 0, 4, GameMechanics) == OPENING_PERFT[4]
+    assert board.zobrist_hash == BitBoard().zobrist_hash and board.orientation == 1
+
+
+def test_cached_perft():
+    cache = TranspositionTable(10000)
+    assert perft(Board(), 0, 5, cache=cache) == OPENING_PERFT[5]
+    assert perft(Board(), 0, 5, cache=cache) == OPENING_PERFT[5]
+    assert cache.hits > 0
+
+
+def test_divide():
+    divide = perft_divide(Board(), 0, 3)
+    assert len(divide) == OPENING_PERFT[1]
+    assert sum(divide.values()) == OPENING_PERFT[3]
+    assert '2,0-3,1' in divide
+
+
+def test_line_to_str():
+    capture = [Move(Square(1, 1), Square(2, 2)), Move(Square(2, 2), Square(3, 3)),
+               Move(Square(3, 3), Square(4, 4)), Move(Square(4, 4), Square(5, 5))]
+    assert line_to_str(capture) == '1,1-3,3-5,5'
+    assert line_to_str([Move(Square(1, 1), Square(2, 2))]) == '1,1-2,2'
@@ -0,0 +1,51 @@
+import json
+
+from CheckersTournament.game import GameMechanics
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.profiling import Profiler
+from CheckersTournament.strategies import RandomStrategy, LongestLineStrategy
+from CheckersTournament.tournament import Tournament, play_game
+
+
+def test_off_by_default():
+    assert Profiler.active is None
+    play_game(RandomStrategy, LongestLineStrategy, game_seed=1)
+    assert Profiler.active is None
+
+
+def test_game_profile():
+    profiler = Profiler()
+    play_game(RandomStrategy, LongestLineStrategy, game_seed=1, profiler=profiler)
+    assert Profiler.active is None
+    assert profiler.counters['games'] == 1
+    plies = profiler.histograms['plies_per_game']
+    (moves_count, ) = plies
+    # The position left to the loser is only checked for any legal line
+    assert moves_count == profiler.counters['MoveGenerator.get_player_legal_moves']
+    assert profiler.timers['Match.match;RandomStrategy.choose_best_move'][1] > 0
+    assert profiler.timers['Match.match;LongestLineStrategy.choose_best_move'][1] > 0
+    merged = Profiler()
+    merged.merge(Profiler.from_dict(json.loads(json.dumps(profiler.to_dict()))))
+    merged.merge(profiler)
+    assert merged.counters['games'] == 2
+    assert merged.histograms['plies_per_game'] == {value: 2 * n for value, n in plies.items()}
+    for line in merged.collapsed_stacks('pairing'):
+        stack, micros = line.rsplit(' ', 1)
+        assert stack.startswith('pairing;Match.match') and int(micros) >= 0
+
+
+def test_engine_counters():
+    board = Board()
+    with Profiler() as profiler:
+        GameMechanics.get_player_legal_moves(board, 0)
+    assert profiler.counters == {'GameMechanics.get_player_legal_moves': 1}
+
+
+def test_tournament_profiles(tmp_path):
+    json_path, stacks_path = tmp_path / 'profile.json', tmp_path / 'profile.folded'
+    Tournament.run_tournament(num_of_games=2, seed=5, workers=2, strategies=[RandomStrategy, LongestLineStrategy],
+                              profile_path=str(json_path), stacks_path=str(stacks_path))
+    profiles = json.loads(json_path.read_text())
+    assert set(profiles) == {'RandomStrategy-vs-LongestLineStrategy', 'LongestLineStrategy-vs-RandomStrategy'}
+    assert all(profile['counters']['games'] == 2 for profile in profiles.values())
+    assert stacks_path.read_text().startswith('RandomStrategy-vs-LongestLineStrategy;Match.match')
@@ -0,0 +1,108 @@
+import pytest
+
+from CheckersTournament import game_record, result_store, tournament
+from CheckersTournament.result_store import ResultStore
+from CheckersTournament.strategies import RandomStrategy, LongestLineStrategy, TowardEnemyCenter
+from CheckersTournament.tournament import Tournament
+
+STRATEGIES = [RandomStrategy, LongestLineStrategy, TowardEnemyCenter]
+NUM_OF_GAMES = 4
+play_work_unit = tournament._play_work_unit
+
+
+class Interrupted(Exception):
+    pass
+
+
+def count_played(monkeypatch, fail_after: int = None):
+    played = []
+
+    def counting_play_work_unit(work_unit):
+        if fail_after is not None and len(played) == fail_after:
+            raise Interrupted
+        played.append((work_unit.white_strategy, work_unit.black_strategy))
+        return play_work_unit(work_unit)
+
+    monkeypatch.setattr(tournament, '_play_work_unit', counting_play_work_unit)
+    return played
+
+
+def run(store_path):
+    return Tournament.run_tournament(num_of_games=NUM_OF_GAMES, seed=5, strategies=STRATEGIES,
+                                     store_path=str(store_path))
+
+
+def test_rerun_reuses_games(tmp_path, monkeypatch):
+    expected = run(tmp_path / 'results.sqlite')
+    played = count_played(monkeypatch)
+    assert run(tmp_path / 'results.sqlite') == expected
+    assert played == []
+    with ResultStore(str(tmp_path / 'results.sqlite')) as store:
+        pairings = store.get_pairings()
+    assert len(pairings) == 6
+    assert all(games == NUM_OF_GAMES for games, _, _ in pairings.values())
+
+
+def test_resume_after_interruption(tmp_path, monkeypatch):
+    expected = Tournament.run_tournament(num_of_games=NUM_OF_GAMES, seed=5, strategies=STRATEGIES)
+    path = tmp_path / 'results.sqlite'
+    count_played(monkeypatch, fail_after=10)
+    with pytest.raises(Interrupted):
+        run(path)
+    played = count_played(monkeypatch)
+    assert run(path) == expected
+    assert len(played) == 6 * NUM_OF_GAMES - 10
+
+
+def test_changed_strategy_replays_its_pairings(tmp_path, monkeypatch):
+    path = tmp_path / 'results.sqlite'
+    run(path)
+    fingerprint = result_store.strategy_fingerprint
+    monkeypatch.setattr(result_store, 'strategy_fingerprint',
+                        lambda strategy: 'changed' if strategy is TowardEnemyCenter else fingerprint(strategy))
+    played = count_played(monkeypatch)
+    run(path)
+    assert len(played) == 4 * NUM_OF_GAMES
+    assert all(TowardEnemyCenter in pairing for pairing in played)
+
+
+def test_batched_writes(tmp_path):
+    path = str(tmp_path / 'results.sqlite')
+    with ResultStore(path, batch_size=3, flush_interval=60) as store:
+        for index in range(5):
+            store.add_game(f'game{index}', 'white', 'black', index, index % 2)
+        # Only whole batches were written so far
+        with ResultStore(path) as reader:
+            assert len(reader.load([f'game{index}' for index in range(5)])) == 3
+    with ResultStore(path) as store:
+        assert store.load(['game4']) == {'game4': (0, None, None)}
+
+
+def test_game_key_ignores_record_and_profile():
+    work_unit = Tournament.get_work_unit(STRATEGIES, 0, 1, 3, seed=5)
+    key = tournament.get_game_key(work_unit, 3)
+    assert tournament.get_game_key(work_unit._replace(record=True, profile=True), 3) == key
+    assert tournament.get_game_key(work_unit._replace(opening_plies=4), 3) != key
+
+
+def test_store_closed_when_a_recorder_fails(tmp_path, monkeypatch):
+    def failing_write(recorder, record):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(game_record.GameRecorder, '_write', failing_write)
+    with pytest.raises(OSError):
+        Tournament.run_tournament(num_of_games=NUM_OF_GAMES, seed=5, strategies=STRATEGIES,
+                                  store_path=str(tmp_path / 'results.sqlite'), record_path=str(tmp_path / 'games'))
+    # The games played before the error were still written to the store
+    played = count_played(monkeypatch)
+    run(tmp_path / 'results.sqlite')
+    assert len(played) < 6 * NUM_OF_GAMES
+
+
+def test_store_needs_a_seed(tmp_path):
+    with pytest.raises(ValueError):
+        Tournament.run_tournament(num_of_games=NUM_OF_GAMES, strategies=STRATEGIES,
+                                  store_path=str(tmp_path / 'results.sqlite'))
+    with pytest.raises(ValueError):
+        Tournament.run_adaptive_tournament(num_of_games=NUM_OF_GAMES, strategies=STRATEGIES,
+                                           store_path=str(tmp_path / 'results.sqlite'))
@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from CheckersTournament.scheduler import AdaptiveScheduler, wilson_interval, sprt_llr, sprt_bounds, fit_ratings, \
+    WILSON, DRAW
+from CheckersTournament.tournament import Tournament
+
+
+def play_rounds(scheduler, strengths, seed=0):
+    # Plays the scheduled games with each strategy winning in proportion to its strength
+    rng = random.Random(seed)
+    games = scheduler.next_round()
+    while games:
+        for white, black, _ in games:
+            if rng.random() < 0.1:
+                scheduler.add_result(white, black, DRAW)
+            else:
+                white_wins = rng.random() < strengths[white] / (strengths[white] + strengths[black])
+                scheduler.add_result(white, black, 0 if white_wins else 1)
+        games = scheduler.next_round()
+
+
+def test_statistics():
+    low, high = wilson_interval(10, 10)
+    assert high == pytest.approx(1.0) and low == pytest.approx(0.7225, abs=1e-3)
+    assert wilson_interval(5, 10)[0] < 0.5 < wilson_interval(5, 10)[1]
+    lower, upper = sprt_bounds(0.05, 0.05)
+    assert sprt_llr(30, 0, 0, 0, 50) > upper
+    assert sprt_llr(0, 0, 30, 0, 50) < lower
+
+
+def test_lopsided_pairings_stop_early():
+    for stopping in ('sprt', WILSON):
+        scheduler = AdaptiveScheduler(3, budget=600, stopping=stopping)
+        play_rounds(scheduler, [50, 1, 1.05])
+        assert scheduler.get_verdict((0, 1)) == 'first' and scheduler.get_verdict((0, 2)) == 'first'
+        # The games saved go to the close pairing
+        assert scheduler.get_games((1, 2)) > 4 * scheduler.get_games((0, 1))
+        assert scheduler.games_scheduled <= 600
+
+
+def test_ratings():
+    scheduler = AdaptiveScheduler(3, budget=3000, max_pairing_games=1000)
+    play_rounds(scheduler, [4, 2, 1])
+    elos, errors = scheduler.get_ratings()
+    assert elos[0] > elos[1] > elos[2]
+    assert abs(sum(elos)) < 1e-6
+    assert all(0 < error < 200 for error in errors)
+    elos, errors = fit_ratings({(0, 1): [20, 0, 0]}, 2)
+    assert elos[0] > 0 > elos[1] and errors[0] > 0
+
+
+def test_adaptive_tournament():
+    serial = Tournament.run_adaptive_tournament(num_of_games=3, seed=11, min_games=4, opening_plies=2)
+    parallel = Tournament.run_adaptive_tournament(num_of_games=3, seed=11, min_games=4, opening_plies=2,
+                                                  workers=2, chunk_size=2)
+    assert serial.results == parallel.results
+    assert serial.games_scheduled <= serial.budget
+    assert serial.get_rates() == parallel.get_rates()
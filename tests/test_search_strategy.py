@@ -0,0 +1,47 @@
+import random
+
+from CheckersTournament.game_elements.board import Board, Square, Move
+from CheckersTournament.game_elements.piece import PieceType, PlayerId
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.strategies import SearchStrategy
+
+
+def test_make_unmake_move():
+    rng = random.Random(5)
+    board = Board()
+    player = PlayerId.white.value
+    for _ in range(60):
+        legal_moves = MoveGenerator.get_player_legal_moves(board, player)
+        if not legal_moves:
+            break
+        before = str(board), board.zobrist_hash, board.orientation
+        for line in legal_moves:
+            undo = board.make_move(line)
+            assert board.orientation == -before[2]
+            board.unmake_move(undo)
+            assert (str(board), board.zobrist_hash, board.orientation) == before
+        board.make_move(rng.choice(legal_moves))
+        player ^= 1
+
+
+def test_search_avoids_losing_move():
+    board = Board(empty=True)
+    board.set_location(Square(3, 3), PieceType.man, PlayerId.white.value)
+    board.set_location(Square(5, 5), PieceType.man, PlayerId.black.value)
+    legal_moves = MoveGenerator.get_player_legal_moves(board, PlayerId.white.value)
+    for _ in range(5):
+        strategy = SearchStrategy(PlayerId.white.value, max_depth=4, time_limit=None)
+        best = strategy.choose_best_move(board, legal_moves)
+        assert best == [Move(Square(3, 3), Square(4, 2))]
+    assert str(board) == str(Board.load_from_str(str(board)))
+
+
+def test_node_budget():
+    board = Board()
+    strategy = SearchStrategy(PlayerId.white.value, max_nodes=500, time_limit=None)
+    legal_moves = MoveGenerator.get_player_legal_moves(board, PlayerId.white.value)
+    before = str(board), board.zobrist_hash
+    assert strategy.choose_best_move(board, legal_moves) in legal_moves
+    assert strategy.nodes <= 501
+    assert strategy.completed_depth >= 2
+    assert (str(board), board.zobrist_hash) == before
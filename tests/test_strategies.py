@@ -0,0 +1,83 @@
+import random
+from math import sqrt
+from statistics import mean
+
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.strategies import Strategy, PackedLines, LongestLineStrategy, StayBack, PushForward, \
+    TowardEnemyCenter
+from CheckersTournament.transposition_table import TranspositionTable
+
+
+class PerLineTowardEnemyCenter(Strategy):
+    # TowardEnemyCenter as it was written before rank_moves
+    def rank_move(self, board, move, **board_data):
+        start, end = self._get_start_end_squares(move)
+        col_d = end.col - board_data['col']
+        row_d = end.col - board_data['row']
+        return sqrt(row_d**2 + col_d**2)
+
+    def analyze_board(self, board):
+        enemy_location = board.player_pieces[(self.player_id + 1) % 2]
+        return dict(row=mean([sqr.row for sqr in enemy_location]), col=mean([sqr.col for sqr in enemy_location]))
+
+
+def positions(seed=1, plies=60):
+    rng = random.Random(seed)
+    board = Board()
+    player = 0
+    for _ in range(plies):
+        legal_moves = MoveGenerator.get_player_legal_moves(board, player)
+        if not legal_moves:
+            return
+        yield board, player, legal_moves
+        board.make_move(rng.choice(legal_moves))
+        player ^= 1
+
+
+def test_packed_lines():
+    for board, _, legal_moves in positions():
+        lines = PackedLines(legal_moves)
+        assert len(lines) == len(legal_moves)
+        for index, line in enumerate(legal_moves):
+            assert (lines.from_row[index], lines.from_col[index]) == (line[0].from_square.row, line[0].from_square.col)
+            assert (lines.to_row[index], lines.to_col[index]) == (line[-1].to_square.row, line[-1].to_square.col)
+            assert lines.length[index] == len(line)
+            assert lines.captures[index] == len(line) // 2 * (len(line) > 1)
+
+
+def test_rank_moves_match_rank_move():
+    for board, player, legal_moves in positions():
+        ranks = TowardEnemyCenter(player).rank_legal_moves(board, legal_moves)
+        per_line = PerLineTowardEnemyCenter(player).rank_legal_moves(board, legal_moves)
+        assert ranks.tolist() == per_line.tolist()
+        assert LongestLineStrategy(player).rank_legal_moves(board, legal_moves).tolist() == \
+            [len(line) for line in legal_moves]
+        stay_back = StayBack(player).rank_legal_moves(board, legal_moves)
+        assert stay_back.tolist() == [(line[0].from_square.row + 1) ** (line[0].from_square.row -
+                                                                        line[-1].to_square.row)
+                                      for line in legal_moves]
+        assert (PushForward(player).rank_legal_moves(board, legal_moves) == -stay_back).all()
+
+
+def test_cached_ranks_choose_the_same_move():
+    cache = TranspositionTable()
+    for board, player, legal_moves in positions(seed=3):
+        cached = TowardEnemyCenter(player, evaluation_cache=cache)
+        # The second time round the ranks come from the cache, with the lines in another order
+        for moves in (legal_moves, legal_moves[::-1], legal_moves[::-1]):
+            random.seed(player)
+            expected = TowardEnemyCenter(player).choose_best_move(board, moves)
+            random.seed(player)
+            assert cached.choose_best_move(board, moves) == expected
+
+
+def test_rank_parameters():
+    for board, player, legal_moves in positions(plies=20):
+        stay_back = StayBack(player, row_offset=2, row_weight=0.5).rank_legal_moves(board, legal_moves)
+        assert stay_back.tolist() == [(line[0].from_square.row + 2.0) ** (0.5 * (line[0].from_square.row -
+                                                                                 line[-1].to_square.row))
+                                      for line in legal_moves]
+        enemy_rows = [square.row for square in board.get_player_pieces_location(player ^ 1)]
+        toward = TowardEnemyCenter(player, row_weight=4, col_weight=0).rank_legal_moves(board, legal_moves)
+        assert toward.tolist() == [2 * abs(line[-1].to_square.col - mean(enemy_rows)) for line in legal_moves]
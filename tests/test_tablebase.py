@@ -0,0 +1,111 @@
+import random
+
+import numpy as np
+import pytest
+
+from CheckersTournament.game import GameMechanics
+from CheckersTournament.game_elements.board import Board, PLAYABLE_SQUARES
+from CheckersTournament.game_elements.piece import PieceType, PlayerId
+from CheckersTournament.match import Player, Match
+from CheckersTournament.strategies import RandomStrategy, LongestLineStrategy
+from CheckersTournament.tablebase import Tablebase, build_tablebase, position_index, position_indices, \
+    signature_size, SQUARE_BITS, WIN, LOSS, DRAW
+
+MAX_PIECES = 3
+
+
+@pytest.fixture(scope='module')
+def tablebase(tmp_path_factory):
+    path = tmp_path_factory.mktemp('tablebase') / 'tablebase.bin'
+    build_tablebase(str(path), MAX_PIECES)
+    return Tablebase(str(path))
+
+
+def random_endgame(rng, player_id):
+    board = Board(empty=True)
+    squares = rng.sample(PLAYABLE_SQUARES, rng.randint(2, MAX_PIECES))
+    for i, square in enumerate(squares):
+        owner = i % 2
+        crowning_row = Board.MAX_ROW - 1 if owner == PlayerId.white.value else 0
+        piece = PieceType.king if square.row == crowning_row or rng.random() < 0.5 else PieceType.man
+        board.set_location(square, piece, owner)
+    # White moves with orientation 1, black with -1
+    if player_id == PlayerId.black.value:
+        board.rotate()
+    return board
+
+
+def test_position_index_is_perfect():
+    rng = random.Random(2)
+    signature = (1, 1, 0, 2)
+    seen = set()
+    for _ in range(300):
+        squares = rng.sample(range(28), 4)
+        groups = [squares[:1], [], squares[1:2], squares[2:]]
+        index = position_index(*groups)
+        assert 0 <= index < signature_size(signature)
+        masks = [np.array([sum(int(SQUARE_BITS[s]) for s in group)], dtype=np.int64) for group in groups]
+        assert position_indices(*masks)[0] == index
+        seen.add((index, tuple(sorted(squares[2:])), squares[0], squares[1]))
+    assert len({index for index, *_ in seen}) == len(seen)
+
+
+def test_values_follow_the_rules(tablebase):
+    rng = random.Random(5)
+    for _ in range(300):
+        player_id = rng.choice((PlayerId.white.value, PlayerId.black.value))
+        board = random_endgame(rng, player_id)
+        result, distance = tablebase.probe(board, player_id)
+        legal_moves = GameMechanics.get_player_legal_moves(board, player_id)
+        children = []
+        for line in legal_moves:
+            undo = board.make_move(line)
+            children.append(tablebase.probe(board, player_id ^ 1))
+            board.unmake_move(undo)
+        if not legal_moves:
+            assert (result, distance) == (LOSS, 0)
+        elif any(child_result == LOSS for child_result, _ in children):
+            assert result == WIN
+            assert distance == 1 + min(d for r, d in children if r == LOSS)
+        elif all(child_result == WIN for child_result, _ in children):
+            assert result == LOSS
+            assert distance == 1 + max(d for _, d in children)
+        else:
+            assert result == DRAW
+
+
+def test_best_move_converts_wins(tablebase):
+    rng = random.Random(9)
+    wins = 0
+    while wins < 10:
+        player_id = rng.choice((PlayerId.white.value, PlayerId.black.value))
+        board = random_endgame(rng, player_id)
+        result, distance = tablebase.probe(board, player_id)
+        if result != WIN:
+            continue
+        wins += 1
+        winner = LongestLineStrategy(player_id, tablebase=tablebase)
+        loser = RandomStrategy(player_id ^ 1)
+        to_move, plies = player_id, 0
+        legal_moves = GameMechanics.get_player_legal_moves(board, to_move)
+        while legal_moves:
+            strategy = winner if to_move == player_id else loser
+            board.make_move(strategy.choose_best_move(board, legal_moves))
+            to_move, plies = to_move ^ 1, plies + 1
+            legal_moves = GameMechanics.get_player_legal_moves(board, to_move)
+        # Mistakes of the loser only make the game shorter
+        assert to_move == player_id ^ 1 and plies <= distance
+
+
+def test_match_adjudication(tablebase):
+    adjudicated = 0
+    for seed in range(30):
+        match = Match([Player(PlayerId.white.value, RandomStrategy),
+                       Player(PlayerId.black.value, RandomStrategy)], Board(), seed=seed, tablebase=tablebase)
+        winner = match.match()
+        if match.adjudicated_winner is not None:
+            adjudicated += 1
+            current = match.players[match.current_player_index].player_id
+            result, _ = tablebase.probe(match.board, current)
+            assert winner == (current if result == WIN else current ^ 1)
+    assert adjudicated > 0
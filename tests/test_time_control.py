@@ -0,0 +1,90 @@
+import time
+
+import pytest
+
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.game_elements.piece import PlayerId
+from CheckersTournament.match import Player, Match
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.strategies import Strategy, RandomStrategy, SearchStrategy, IsolatedStrategy
+from CheckersTournament.time_control import TimeControl, DEFAULT_MOVE
+
+
+class SleepingStrategy(Strategy):
+    def choose_best_move(self, board, legal_moves):
+        time.sleep(self.other_params.get('seconds', 60))
+        return legal_moves[-1]
+
+
+class CrashingStrategy(Strategy):
+    def choose_best_move(self, board, legal_moves):
+        raise ValueError('no move')
+
+
+def play(white, black, time_control, seed=1, **black_params):
+    match = Match([Player(PlayerId.white.value, white),
+                   Player(PlayerId.black.value, black, **black_params)], Board(), seed=seed,
+                  time_control=time_control)
+    return match, match.match()
+
+
+def test_clock():
+    time_control = TimeControl(move_time=1.0, game_time=5.0, increment=0.5)
+    assert time_control.get_move_budget(5.0) == 1.0
+    assert time_control.get_move_budget(0.25) == 0.25
+    assert time_control.update_clock(5.0, 2.0) == 3.5
+    assert TimeControl().get_move_budget(None) is None
+    with pytest.raises(ValueError):
+        TimeControl(on_overrun='resign')
+
+
+def test_overrun_forfeits():
+    match, winner = play(RandomStrategy, SleepingStrategy, TimeControl(move_time=0.01), seconds=0.05)
+    assert winner == PlayerId.white.value
+    assert match.forfeited and match.moves_count == 1
+
+
+def test_overrun_plays_default_move():
+    time_control = TimeControl(game_time=0.05, on_overrun=DEFAULT_MOVE)
+    match, _ = play(RandomStrategy, SleepingStrategy, time_control, seconds=0.02)
+    assert not match.forfeited
+    assert match.clocks[PlayerId.black.value] < 0
+
+
+def test_search_respects_deadline():
+    strategy = SearchStrategy(PlayerId.white.value, time_limit=None)
+    board = Board()
+    legal_moves = MoveGenerator.get_player_legal_moves(board, PlayerId.white.value)
+    start = time.perf_counter()
+    strategy.deadline = start + 0.05
+    strategy.choose_best_move(board, legal_moves)
+    assert time.perf_counter() - start < 0.5
+
+
+def test_isolated_strategy_is_deterministic():
+    boards = []
+    for _ in range(2):
+        match = Match([Player(PlayerId.white.value, RandomStrategy),
+                       Player(PlayerId.black.value, IsolatedStrategy, wrapped_strategy=RandomStrategy)], Board(), seed=4)
+        match.match()
+        boards.append((str(match.board), match.moves_count))
+    assert boards[0] == boards[1]
+
+
+def test_isolated_strategy_is_preempted():
+    start = time.perf_counter()
+    match, winner = play(RandomStrategy, IsolatedStrategy, TimeControl(move_time=0.2),
+                         wrapped_strategy=SleepingStrategy)
+    assert winner == PlayerId.white.value and match.forfeited
+    assert time.perf_counter() - start < 5
+    assert match.players[1].strategy.process is None
+
+
+def test_isolated_strategy_crash_names_strategy():
+    with pytest.raises(RuntimeError, match='CrashingStrategy'):
+        play(RandomStrategy, IsolatedStrategy, TimeControl(move_time=5), wrapped_strategy=CrashingStrategy)
+    strategy = IsolatedStrategy(PlayerId.black.value, wrapped_strategy=CrashingStrategy)
+    board = Board()
+    with pytest.raises(RuntimeError):
+        strategy.choose_best_move(board, MoveGenerator().get_player_legal_moves(board, PlayerId.black.value))
+    assert strategy.process is None
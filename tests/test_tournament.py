@@ -0,0 +1,8 @@
+from CheckersTournament.tournament import Tournament
+
+
+def test_parallel_matches_serial():
+    serial = Tournament.run_tournament(num_of_games=3, seed=11)
+    parallel = Tournament.run_tournament(num_of_games=3, seed=11, workers=2, chunk_size=2)
+    assert serial == parallel
+    assert all(serial[i][i] == -1 for i in range(len(serial)))
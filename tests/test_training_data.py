@@ -0,0 +1,81 @@
+import os
+import struct
+
+import numpy as np
+import pytest
+
+from CheckersTournament.game_elements.board import Board, PLAYABLE_SQUARES
+from CheckersTournament.game_record import GameRecorder, GameRecordReader, decode_line
+from CheckersTournament.match import Match, Player
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.strategies import RandomStrategy, LongestLineStrategy, TowardEnemyCenter
+from CheckersTournament.tournament import Tournament
+from CheckersTournament.training_data import TrainingDataWriter, TrainingDataReader, POSITION_DTYPE, \
+    get_shard_paths
+
+
+def play(recorder, seeds):
+    return [Match([Player(0, RandomStrategy), Player(1, LongestLineStrategy)], Board(), recorder=recorder,
+                  seed=seed).match() for seed in seeds]
+
+
+def test_positions_replay_games(tmp_path):
+    with GameRecorder(str(tmp_path / 'games.ckgr')) as recorder:
+        winners = play(recorder, range(3))
+    with TrainingDataWriter(str(tmp_path / 'positions')) as writer:
+        play(writer, range(3))
+    reader = TrainingDataReader(str(tmp_path / 'positions'))
+    positions = [reader[index] for index in range(len(reader))]
+    with GameRecordReader(str(tmp_path / 'games.ckgr')) as records:
+        assert len(positions) == sum(len(record.lines) for record in records)
+        for game_index, record in enumerate(records):
+            board = Board()
+            for ply, line in enumerate(record.lines):
+                position = positions.pop(0)
+                assert list(position['cells']) == [board.get_cell(square) for square in PLAYABLE_SQUARES]
+                assert position['orientation'] == board.orientation
+                assert position['legal_moves'] == len(MoveGenerator.get_player_legal_moves(board, ply % 2))
+                assert decode_line(position['line'][1:1 + position['line'][0]]) == line
+                assert (position['ply'], position['result']) == (ply, winners[game_index])
+                board.make_move(line)
+
+
+def test_shard_rotation_and_minibatches(tmp_path):
+    max_shard_bytes = 4096
+    with TrainingDataWriter(str(tmp_path), max_shard_bytes) as writer:
+        play(writer, range(4))
+    first_run = get_shard_paths(str(tmp_path))
+    assert len(first_run) > 1
+    assert all(os.path.getsize(path) <= max_shard_bytes for path in first_run)
+    # A second run adds shards of its own
+    with TrainingDataWriter(str(tmp_path), max_shard_bytes) as writer:
+        play(writer, range(4, 6))
+    assert get_shard_paths(str(tmp_path))[:len(first_run)] == first_run
+    reader = TrainingDataReader(str(tmp_path))
+    everything = np.concatenate([np.load(path) for path in get_shard_paths(str(tmp_path))])
+    batches = list(reader.minibatches(50, seed=3))
+    assert all(batch.dtype == POSITION_DTYPE for batch in batches)
+    assert [len(batch) for batch in batches[:-1]] == [50] * (len(batches) - 1)
+    shuffled = np.concatenate(batches)
+    assert len(shuffled) == len(reader) == len(everything)
+    assert sorted(map(bytes, shuffled)) == sorted(map(bytes, everything))
+    assert not np.array_equal(shuffled, everything)
+    assert all(np.array_equal(a, b) for a, b in zip(batches, reader.minibatches(50, seed=3)))
+    assert all(len(batch) == 50 for batch in reader.minibatches(50, seed=3, drop_last=True))
+
+
+def test_tournament_training_data(tmp_path):
+    Tournament.run_tournament(num_of_games=2, seed=1, strategies=[RandomStrategy, TowardEnemyCenter],
+                              record_path=str(tmp_path / 'games.ckgr'),
+                              training_data_path=str(tmp_path / 'positions'))
+    with GameRecordReader(str(tmp_path / 'games.ckgr')) as records:
+        plies = sum(len(record.lines) for record in records)
+    assert len(TrainingDataReader(str(tmp_path / 'positions'))) == plies
+
+
+def test_write_error_is_raised(tmp_path):
+    writer = TrainingDataWriter(str(tmp_path))
+    writer.write_record(b'not a record')
+    with pytest.raises(struct.error):
+        writer.close()
+    assert writer.shards.file is None
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from CheckersTournament.draw_rules import DrawRules
+from CheckersTournament.game_elements.bitboard import BitBoard
+from CheckersTournament.game_elements.board import Board, PLAYABLE_SQUARES
+from CheckersTournament.match import Match, Player
+from CheckersTournament.strategies import RandomStrategy, LongestLineStrategy, TowardEnemyCenter, \
+    LinearEvaluation, LinearEvaluationStrategy, material_evaluation
+from CheckersTournament.strategies.linear_evaluation import FEATURES, DEFAULT_WEIGHTS, position_features, \
+    get_weights_vector
+from CheckersTournament.training_data import TrainingDataWriter, TrainingDataReader
+from CheckersTournament.tuner import TexelTuner, chunk_loss, load_chunk
+
+WEIGHTS = dict(zip(FEATURES, (1.0, 2.0, 0.3, 0.2, 0.1, -0.1)))
+
+
+@pytest.fixture(scope='module')
+def positions(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp('positions'))
+    strategies = [RandomStrategy, LongestLineStrategy, TowardEnemyCenter]
+    with TrainingDataWriter(directory) as writer:
+        for seed in range(30):
+            Match([Player(0, strategies[seed % 3]), Player(1, strategies[seed // 3 % 3])], Board(),
+                  recorder=writer, seed=seed, draw_rules=DrawRules(max_plies=200)).match()
+    return directory
+
+
+def test_linear_evaluation(positions):
+    evaluation = LinearEvaluation(WEIGHTS)
+    material = LinearEvaluation(DEFAULT_WEIGHTS)
+    weights = get_weights_vector(WEIGHTS)
+    for position in TrainingDataReader(positions).read(0, 200):
+        for board_cls in (Board, BitBoard):
+            board = board_cls(empty=True)
+            for square, cell in zip(PLAYABLE_SQUARES, position['cells']):
+                if cell != board.get_cell(square):
+                    board.set_cell(square, int(cell))
+            expected = position_features(position['cells'][None])[0] @ weights
+            assert evaluation(board, 0) == pytest.approx(expected)
+            assert evaluation(board, 1) == pytest.approx(-expected)
+            assert material(board, 1) == pytest.approx(material_evaluation(board, 1))
+
+
+def test_gradient(positions):
+    features, scores = load_chunk(positions, 0, 500)
+    weights = get_weights_vector(WEIGHTS)
+    _, gradient = chunk_loss(features, scores, weights, 0.5)
+    for index in range(len(FEATURES)):
+        step = np.zeros(len(FEATURES))
+        step[index] = 1e-6
+        numeric = (chunk_loss(features, scores, weights + step, 0.5)[0] -
+                   chunk_loss(features, scores, weights - step, 0.5)[0]) / 2e-6
+        assert gradient[index] == pytest.approx(numeric, rel=1e-4, abs=1e-6)
+
+
+def test_tuning_lowers_loss(positions):
+    with TexelTuner(positions, chunk_size=700) as tuner:
+        tuned = tuner.tune(iterations=50)
+        before = tuner.loss(get_weights_vector(DEFAULT_WEIGHTS), tuner.scale)[0]
+        assert tuner.loss(get_weights_vector(tuned), tuner.scale)[0] < before
+    # Chunks are summed in the same order whichever process computes them
+    with TexelTuner(positions, workers=2, chunk_size=700) as tuner:
+        assert tuner.tune(iterations=50) == tuned
+
+
+def test_tuned_weights_play():
+    match = Match([Player(0, LinearEvaluationStrategy, weights=WEIGHTS, max_nodes=200, time_limit=None),
+                   Player(1, LinearEvaluationStrategy, max_nodes=200, time_limit=None)], Board(), seed=3,
+                  draw_rules=DrawRules(max_plies=60))
+    assert match.match() in (0, 1, Match.DRAW)
+    assert match.players[0].strategy.evaluate.weights == WEIGHTS
+    with pytest.raises(ValueError):
+        LinearEvaluation({'mobility': 1.0})
@@ -0,0 +1,54 @@
+import random
+
+from CheckersTournament.game_elements.bitboard import BitBoard
+from CheckersTournament.game_elements.board import Board
+from CheckersTournament.game_elements.zobrist import Zobrist
+from CheckersTournament.move_generator import MoveGenerator
+from CheckersTournament.transposition_table import TranspositionTable
+
+
+def test_incremental_hash():
+    rng = random.Random(3)
+    for board_cls in (Board, BitBoard):
+        board = board_cls()
+        player = 0
+        for _ in range(100):
+            assert board.zobrist_hash == Zobrist.hash_board(board)
+            legal_moves = MoveGenerator.get_player_legal_moves(board, player)
+            if not legal_moves:
+                break
+            board.run_moves(rng.choice(legal_moves))
+            board.rotate()
+            player ^= 1
+
+
+def test_hash_identifies_position():
+    board = Board()
+    assert board.zobrist_hash == BitBoard().zobrist_hash
+    assert board.zobrist_hash == Board.load_from_str(str(board)).zobrist_hash
+    board.rotate()
+    assert board.zobrist_hash != Board().zobrist_hash
+    board.rotate()
+    assert board.zobrist_hash == Board().zobrist_hash
+
+
+def test_transposition_table_replacement():
+    table = TranspositionTable(max_size=2)
+    table.put(1, 'a')
+    table.put(2, 'b')
+    assert table.get(1) == 'a'
+    table.put(3, 'c')
+    assert 2 not in table
+    assert table.get(1) == 'a' and table.get(3) == 'c'
+    assert len(table) == 2
+    assert table.get(2) is None
+    assert (table.hits, table.misses) == (3, 1)
+
+
+def test_cached_legal_moves():
+    table = TranspositionTable()
+    board = Board()
+    legal_moves = MoveGenerator.get_cached_player_legal_moves(board, 0, table)
+    assert legal_moves == MoveGenerator.get_player_legal_moves(board, 0)
+    assert MoveGenerator.get_cached_player_legal_moves(Board(), 0, table) is legal_moves
+    assert table.hits == 1